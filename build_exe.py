@@ -173,7 +173,7 @@ def create_release_package(exe_path):
 ## 文件说明
 - ArxivMonitor.exe: 主程序
 - arxiv_config.json: 配置文件
-- arxiv_monitor.log: 运行日志（运行后生成）
+- arxiv_monitor.log: 运行日志（运行后生成；worker/daemon 模式写 arxiv_monitor.<工作进程ID>.log / arxiv_monitor.daemon.log）
 - arxiv_papers/: 论文下载目录（运行后生成）
 
 ## 注意事项
@@ -9,9 +9,38 @@ default_config = {
             "check_interval_hours": 6,
             "last_check": None,  # 保留用于兼容性
             "query_last_check": {},  # 新增：每个查询的最后检查时间
-            "downloaded_papers": [],
             "first_run": True,
-            "organize_by_query": True  # 是否按搜索词组织文件夹
+            "organize_by_query": True,  # 是否按搜索词组织文件夹
+            "storage_reconcile_hours": 24,  # 存储统计索引的全量校准周期（小时），0表示只在索引缺失时校准
+            "version_check_interval_hours": 24,  # 监控模式下检查论文新版本的间隔（小时），0表示不检查
+            "library_scan": True,  # 下载前按论文ID扫描下载目录中已有的PDF，避免重复下载
+            "verify_interval_hours": 168,  # 监控模式下后台校验PDF完整性的间隔（小时），0表示不校验
+            "verify_io_mb_per_sec": 20,  # 完整性校验每秒最多读取的MB数，0表示不限速
+            "verify_workers": 0,  # 完整性校验的进程数，0表示按CPU数
+            "download_kb_per_sec": 0,  # 全局下载带宽上限（KB/s），0表示不限速
+            "query_priority": {},  # 查询的下载优先级，如 {"cat:cs.CV": 10}，越大越先下载，未配置为0
+            "offpeak_windows": [],  # 允许批量下载的空闲时段，如 ["22:00-07:00"]，为空表示不限制
+            "immediate_downloads": 20,  # 空闲时段外每次检查立即下载的论文数，其余延后，0表示不延后
+            "download_retry_minutes": 30,  # 下载失败的论文放回延后队列，首次重试间隔（分钟），之后每次翻倍
+            "download_max_attempts": 5,  # 累计下载失败这么多次后移出延后队列
+            "extract_text": False,  # 下载后在后台提取PDF全文（需要 pypdf）
+            "extract_workers": 0,  # 文本提取的进程数，0表示按CPU数
+            "relevance_top_k": 0,  # 每次检查按相关性最多下载的论文数，0表示不限（需要 numpy）
+            "relevance_threshold": 0.0,  # 相关性得分（0~1）低于此值的论文不下载，0表示不限
+            "relevance_profile_size": 2000,  # 用最近多少篇已下载论文建立兴趣画像
+            "relevance_min_profile": 20,  # 已下载论文少于此数时不做相关性筛选
+            "near_duplicate_action": "flag",  # 近重复论文的处理："skip" 不下载，"flag" 只标出，"off" 不检测
+            "near_duplicate_threshold": 0.7,  # 标题+摘要的估计Jaccard相似度达到此值视为近重复
+            "checkpoint_every": 10,  # 检查过程中每处理多少篇论文提交一次论文库
+            "log_max_mb": 10,  # 日志文件达到此大小（MB）时轮转，0 表示每天轮转
+            "log_backups": 5,  # 保留的旧日志文件数
+            "api_port": 0,  # 监控时提供只读HTTP接口的端口，0 表示不启动
+            "api_host": "127.0.0.1",  # HTTP接口的监听地址，团队共享时改为 0.0.0.0
+            "storage_quota_mb": 0,  # PDF库的空间配额（MB），超出后淘汰冷论文，0 表示不限
+            "storage_target_ratio": 0.9,  # 淘汰到配额的这个比例为止，避免每轮都触发
+            "storage_eviction_policy": "lru",  # 淘汰顺序："lru" 最久未访问优先，"relevance" 最不相关优先（需要 numpy）
+            "storage_cold_action": "evict",  # "evict" 删除PDF只保留元数据，"archive" 先压缩成 .pdf.xz 归档
+            "storage_keep_days": 7  # 这么多天内下载或打开过的论文不淘汰
         }
 
 
@@ -0,0 +1,84 @@
+import time
+import threading
+from datetime import datetime
+
+
+class RateLimiter:
+    """
+    全局下载带宽限制（字节/秒）
+
+    所有下载共用一个实例，每读到一块数据就登记一次，
+    累计速度超过上限时让调用方睡眠到配额恢复为止。
+    """
+
+    def __init__(self, bytes_per_sec=None):
+        """
+        Args:
+            bytes_per_sec: 每秒最多下载的字节数，None或0表示不限速
+        """
+        self.bytes_per_sec = bytes_per_sec or None
+        self.lock = threading.Lock()
+        self.next_free = time.monotonic()
+
+    def consume(self, size):
+        """登记已下载的 size 字节，必要时等待"""
+        if not self.bytes_per_sec:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_free - now
+            self.next_free = max(self.next_free, now) + size / self.bytes_per_sec
+        if wait > 0:
+            time.sleep(wait)
+
+
+def parse_window(text):
+    """
+    解析 "HH:MM-HH:MM" 形式的时间窗口
+
+    Returns:
+        (开始分钟, 结束分钟)，结束早于开始表示跨越午夜
+    """
+    start, end = text.split("-")
+    minutes = []
+    for part in (start, end):
+        hour, minute = part.strip().split(":")
+        minutes.append(int(hour) * 60 + int(minute))
+    return minutes[0], minutes[1]
+
+
+def in_windows(windows, now=None):
+    """
+    当前时间是否落在任一时间窗口内
+
+    Args:
+        windows: "HH:MM-HH:MM" 字符串列表，为空表示不限制（任何时候都算窗口内）
+        now: 用于判断的时间，缺省为当前本地时间
+    """
+    if not windows:
+        return True
+    now = now or datetime.now()
+    current = now.hour * 60 + now.minute
+    for window in windows:
+        start, end = parse_window(window)
+        if start <= end:
+            if start <= current < end:
+                return True
+        elif current >= start or current < end:
+            return True
+    return False
+
+
+def paper_priority(paper, queries, query_priority):
+    """
+    论文的下载优先级排序键（越小越先下载）
+
+    先按匹配查询中最高的优先级，再按发布时间从新到旧。
+
+    Args:
+        paper: Paper 实例
+        queries: 论文匹配的查询列表
+        query_priority: {查询: 优先级}，没有配置的查询优先级为0
+    """
+    priority = max((query_priority.get(q, 0) for q in queries if q), default=0)
+    return -priority, -paper.published_ts
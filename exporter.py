@@ -0,0 +1,130 @@
+import os
+import gzip
+import json
+from datetime import datetime, timezone
+
+# pyarrow 是可选依赖：有就写 Parquet，没有就写分块的 gzip JSONL
+
+# 导出目录中记录上次导出水位线的文件（下划线开头，分析工具读取分区时会忽略）
+WATERMARK_FILE = "_watermark.json"
+
+
+def parquet_available():
+    """是否安装了写 Parquet 所需的 pyarrow（可选依赖）"""
+    try:
+        import pyarrow
+    except ImportError:
+        return False
+    return True
+
+
+def read_watermark(out_dir):
+    """
+    Returns:
+        上次导出的论文写入时间上限（UNIX秒），没有导出过时返回None
+    """
+    try:
+        with open(os.path.join(out_dir, WATERMARK_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)["stored_ts"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_watermark(out_dir, stored_ts, rows):
+    """原子地更新导出水位线"""
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({"stored_ts": stored_ts, "exported_at": datetime.now().isoformat(), "rows": rows}, f)
+    os.replace(path + ".tmp", path)
+
+
+def partition_key(published_ts):
+    """按发布月份分区，如 "2025-07" """
+    return datetime.fromtimestamp(published_ts, timezone.utc).strftime("%Y-%m")
+
+
+def parquet_schema():
+    """导出的 Parquet 列定义"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("title", pa.string()),
+        ("authors", pa.list_(pa.string())),
+        ("categories", pa.list_(pa.string())),
+        ("published", pa.timestamp("s", tz="UTC")),
+        ("updated", pa.timestamp("s", tz="UTC")),
+        ("version", pa.int32()),
+        ("query", pa.string()),
+        ("queries", pa.list_(pa.string())),
+    ])
+
+
+def write_parquet(path, rows):
+    """把一组论文写成一个 Parquet 文件"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = {
+        "id": [r["id"] for r in rows],
+        "title": [r["title"] for r in rows],
+        "authors": [r["authors"] for r in rows],
+        "categories": [r["categories"] for r in rows],
+        "published": [datetime.fromtimestamp(r["published_ts"], timezone.utc) for r in rows],
+        "updated": [datetime.fromtimestamp(r["updated_ts"], timezone.utc) if r["updated_ts"] else None
+                    for r in rows],
+        "version": [r["version"] for r in rows],
+        "query": [r["query"] for r in rows],
+        "queries": [r["queries"] for r in rows],
+    }
+    pq.write_table(pa.table(columns, schema=parquet_schema()), path, compression="zstd")
+
+
+def write_jsonl(path, rows):
+    """把一组论文写成一个 gzip 压缩的 JSONL 文件"""
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for r in rows:
+            record = dict(r)
+            record["published"] = datetime.fromtimestamp(record.pop("published_ts"), timezone.utc).isoformat()
+            updated_ts = record.pop("updated_ts")
+            record["updated"] = datetime.fromtimestamp(updated_ts, timezone.utc).isoformat() if updated_ts else None
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def export_batches(batches, out_dir, fmt="auto"):
+    """
+    把论文元数据流式导出到按发布月份分区的目录
+
+    每一批按月份拆开各写一个文件（published_month=YYYY-MM/part-<时间戳>-<序号>.*），
+    内存中只保留一批；文件先写临时名再改名，中断不会留下半个文件。
+
+    Args:
+        batches: 可迭代的论文 dict 列表（PaperStore.export_batches 的输出）
+        out_dir: 导出目录
+        fmt: "parquet"、"jsonl" 或 "auto"（有 pyarrow 时用 Parquet）
+
+    Returns:
+        (格式, 导出的行数, 写出的文件数)
+    """
+    if fmt == "auto":
+        fmt = "parquet" if parquet_available() else "jsonl"
+    writer, suffix = (write_parquet, ".parquet") if fmt == "parquet" else (write_jsonl, ".jsonl.gz")
+
+    # 时间戳精确到微秒：同一秒内的两次增量导出不能写出同名文件互相覆盖
+    run = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    rows_written = files = 0
+    for batch in batches:
+        partitions = {}
+        for row in batch:
+            partitions.setdefault(partition_key(row["published_ts"]), []).append(row)
+        for month, rows in sorted(partitions.items()):
+            folder = os.path.join(out_dir, f"published_month={month}")
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"part-{run}-{files:05d}{suffix}")
+            writer(path + ".tmp", rows)
+            os.replace(path + ".tmp", path)
+            rows_written += len(rows)
+            files += 1
+
+    return fmt, rows_written, files
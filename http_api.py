@@ -0,0 +1,237 @@
+import os
+import json
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_TS = 2 ** 63 - 1  # SQLite 整数上限，超出的时间戳绑定参数时会溢出
+
+
+class ApiError(Exception):
+    """请求参数错误，返回给客户端的HTTP状态码和说明"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_since(value):
+    """
+    解析 since 参数：UNIX秒或ISO时间（无时区时按本地时间）
+
+    Raises:
+        ApiError: 格式不正确
+    """
+    if value is None:
+        return 0
+    try:
+        ts = int(float(value))
+    except (ValueError, OverflowError):  # inf 转整数时溢出
+        try:
+            ts = int(datetime.fromisoformat(value).timestamp())
+        except (ValueError, OverflowError):
+            raise ApiError(400, f"since 参数格式不正确: {value}")
+    if abs(ts) > MAX_TS:
+        raise ApiError(400, f"since 参数超出范围: {value}")
+    return ts
+
+
+def parse_cursor(value):
+    """
+    解析分页游标 "<排序时间>:<论文ID>"
+
+    Raises:
+        ApiError: 格式不正确
+    """
+    if value is None:
+        return None
+    ts, _, paper_id = value.partition(":")
+    try:
+        ts = int(ts)
+    except ValueError:
+        raise ApiError(400, f"cursor 参数格式不正确: {value}")
+    if abs(ts) > MAX_TS:
+        raise ApiError(400, f"cursor 参数超出范围: {value}")
+    return ts, paper_id
+
+
+def parse_limit(value):
+    """每页篇数，限制在 1..MAX_LIMIT"""
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        return max(1, min(MAX_LIMIT, int(value)))
+    except ValueError:
+        raise ApiError(400, f"limit 参数格式不正确: {value}")
+
+
+class PaperApi:
+    """
+    论文库的只读HTTP JSON接口（随监控一起运行，供团队看板轮询）
+
+    所有数据都来自本地论文库，不会请求arXiv。列表按键集分页，
+    响应带 ETag（论文库的版本号，包括其他进程提交的修改），内容没变时客户端用
+    If-None-Match 轮询只会得到 304，不会查询数据库。
+
+    接口:
+        GET /papers?since=&query=&limit=&cursor=   按写入时间顺序列出论文
+        GET /papers/<论文ID>                        单篇论文（含摘要）
+        GET /papers/<论文ID>/text                   论文PDF提取出的全文
+        GET /queries                                各查询的论文数
+        GET /search?q=&limit=&cursor=               按标题和作者关键词搜索
+    """
+
+    def __init__(self, paper_store, host="127.0.0.1", port=8080, folder_for=None):
+        """
+        Args:
+            paper_store: PaperStore 实例
+            host: 监听地址（默认只监听本机）
+            port: 监听端口，0 表示随机端口
+            folder_for: 查询 → 文件夹名的函数，用于 /queries
+        """
+        self.paper_store = paper_store
+        self.folder_for = folder_for
+        # 进程重启后修改计数从头开始，ETag 里带上启动标识避免和旧值相撞
+        self.boot = os.urandom(4).hex()
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        """(实际监听的地址, 端口)"""
+        return self.server.server_address[:2]
+
+    def etag(self):
+        return f'"{self.boot}-{self.paper_store.revision()}"'
+
+    def handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            server_version = "arxiv-monitor"
+
+            def do_GET(self):
+                api.handle(self)
+
+            def log_message(self, format, *args):
+                pass  # 看板频繁轮询，不写访问日志
+
+        return Handler
+
+    def handle(self, request):
+        """分发一个GET请求并写出响应"""
+        url = urlsplit(request.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        etag = self.etag()
+        if request.headers.get("If-None-Match") == etag:
+            self.respond(request, 304, None, etag)
+            return
+        try:
+            body = self.route(url.path, params)
+        except ApiError as e:
+            self.respond(request, e.status, {"error": str(e)})
+            return
+        self.respond(request, 200, body, etag)
+
+    def route(self, path, params):
+        """
+        Returns:
+            响应内容
+
+        Raises:
+            ApiError: 路径不存在或参数错误
+        """
+        if path == "/papers":
+            return self.list_papers(params)
+        if path.startswith("/papers/") and path.endswith("/text"):
+            return self.paper_text(unquote(path[len("/papers/"):-len("/text")]))
+        if path.startswith("/papers/"):
+            return self.paper_detail(unquote(path[len("/papers/"):]))
+        if path == "/queries":
+            return self.list_queries()
+        if path == "/search":
+            return self.search(params)
+        raise ApiError(404, f"未知的接口: {path}")
+
+    def paper_record(self, paper, queries):
+        record = paper.to_dict()
+        record["queries"] = queries or ([paper.query] if paper.query else [])
+        return record
+
+    def list_papers(self, params):
+        limit = parse_limit(params.get("limit"))
+        rows = self.paper_store.papers_since(parse_since(params.get("since")), parse_cursor(params.get("cursor")),
+                                             params.get("query"), limit)
+        queries = self.paper_store.query_map(paper.id for paper, _ in rows)
+        papers = []
+        for paper, stored_ts in rows:
+            record = self.paper_record(paper, queries.get(paper.id))
+            record["stored_at"] = datetime.fromtimestamp(stored_ts).isoformat()
+            papers.append(record)
+        last_paper, last_ts = rows[-1] if rows else (None, None)
+        return {
+            "papers": papers,
+            "next_cursor": f"{last_ts}:{last_paper.id}" if len(rows) == limit else None,
+        }
+
+    def paper_detail(self, paper_id):
+        paper = self.paper_store.get(paper_id)
+        if paper is None or not paper.title:
+            raise ApiError(404, f"论文不在库中: {paper_id}")
+        record = self.paper_record(paper, sorted(self.paper_store.queries(paper_id)))
+        record["summary"] = paper.summary
+        return record
+
+    def paper_text(self, paper_id):
+        text = self.paper_store.get_text(paper_id)
+        if text is None:
+            raise ApiError(404, f"论文没有提取出的全文: {paper_id}")
+        return {"id": paper_id, "text": text}
+
+    def list_queries(self):
+        return {
+            "queries": [
+                {"query": query, "papers": count, "folder": self.folder_for(query) if self.folder_for else None}
+                for query, count in sorted(self.paper_store.query_counts().items())
+            ]
+        }
+
+    def search(self, params):
+        terms = (params.get("q") or "").split()
+        if not terms:
+            raise ApiError(400, "缺少关键词参数 q")
+        limit = parse_limit(params.get("limit"))
+        papers = self.paper_store.search(terms, parse_cursor(params.get("cursor")), limit)
+        queries = self.paper_store.query_map(paper.id for paper in papers)
+        return {
+            "papers": [self.paper_record(paper, queries.get(paper.id)) for paper in papers],
+            "next_cursor": f"{papers[-1].published_ts}:{papers[-1].id}" if len(papers) == limit else None,
+        }
+
+    def respond(self, request, status, body, etag=None):
+        data = b"" if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+        request.send_response(status)
+        if body is not None:
+            request.send_header("Content-Type", "application/json; charset=utf-8")
+        request.send_header("Content-Length", str(len(data)))
+        if etag:
+            request.send_header("ETag", etag)
+            request.send_header("Cache-Control", "no-cache")
+        request.end_headers()
+        request.wfile.write(data)
+
+    def start(self):
+        """在后台线程中开始服务"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """停止服务并关闭端口"""
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread.join()
+        self.server.server_close()
@@ -0,0 +1,220 @@
+import os
+import re
+import sys
+import mmap
+import array
+import bisect
+
+# 2007年4月之前的旧式ID所属的archive，顺序决定编码，只能在末尾追加
+LEGACY_ARCHIVES = [
+    "acc-phys", "adap-org", "alg-geom", "ao-sci", "astro-ph", "atom-ph",
+    "bayes-an", "chao-dyn", "chem-ph", "cmp-lg", "comp-gas", "cond-mat",
+    "cs", "dg-ga", "funct-an", "gr-qc", "hep-ex", "hep-lat", "hep-ph",
+    "hep-th", "math", "math-ph", "mtrl-th", "nlin", "nucl-ex", "nucl-th",
+    "patt-sol", "physics", "plasm-ph", "q-alg", "q-bio", "quant-ph",
+    "solv-int", "supr-con"
+]
+LEGACY_INDEX = {name: i for i, name in enumerate(LEGACY_ARCHIVES)}
+LEGACY_FLAG = 1 << 40
+
+NEW_ID_RE = re.compile(r'^(\d{4})\.(\d{4,5})$')
+LEGACY_ID_RE = re.compile(r'^([a-z\-]+)(?:\.[A-Za-z\-]+)?/(\d{7})$')
+VERSION_RE = re.compile(r'v\d+$')
+
+
+def encode_id(paper_id):
+    """
+    把arXiv ID编码为定宽整数
+
+    新式ID（如 2507.12345、0704.0001）编码为 YYMM*100000+序号；
+    旧式ID（如 hep-th/9901001、math.GT/0309136）编码为
+    LEGACY_FLAG | archive序号<<24 | YYMMNNN，学科子类不参与编码。
+
+    Args:
+        paper_id: arXiv ID，可以带版本号
+
+    Returns:
+        编码后的整数；无法识别的ID返回None
+    """
+    paper_id = VERSION_RE.sub('', paper_id.strip())
+    match = NEW_ID_RE.match(paper_id)
+    if match:
+        yymm, number = match.groups()
+        # 2015年1月起序号为5位，之前为4位
+        if (int(yymm) >= 1501) != (len(number) == 5):
+            return None
+        return int(yymm) * 100000 + int(number)
+    match = LEGACY_ID_RE.match(paper_id)
+    if match and match.group(1) in LEGACY_INDEX:
+        return LEGACY_FLAG | (LEGACY_INDEX[match.group(1)] << 24) | int(match.group(2))
+    return None
+
+
+def decode_id(value):
+    """encode_id 的逆运算"""
+    if value & LEGACY_FLAG:
+        archive = LEGACY_ARCHIVES[(value >> 24) & 0xFFFF]
+        return f"{archive}/{value & 0xFFFFFF:07d}"
+    yymm, number = divmod(value, 100000)
+    return f"{yymm:04d}.{number:05d}" if yymm >= 1501 else f"{yymm:04d}.{number:04d}"
+
+
+class CompactIdSet:
+    """
+    紧凑的已下载论文ID集合
+
+    ID编码为64位整数，存放在按序排列的内存映射文件里，成员判断为二分查找，
+    启动时不需要解析；最近插入的ID先放在内存增量缓冲中（其持久性由状态日志
+    保证），flush() 时合并成新文件并原子替换，其他进程可以只读地共享同一文件。
+    无法编码的ID保存在旁边的文本文件里。
+    """
+
+    MAGIC = b"ARXIDS1\0"
+    HEADER_SIZE = 16
+
+    def __init__(self, path, readonly=False):
+        """
+        Args:
+            path: 数据文件路径
+            readonly: 只读打开（其他进程共享查询时使用）
+        """
+        self.path = path
+        self.extra_path = path + ".extra"
+        self.readonly = readonly
+        self.delta = set()
+        self.extra = set()
+        self.mm = None
+        self.base = array.array('Q')
+        self.open()
+
+    def open(self):
+        """映射数据文件并加载无法编码的ID"""
+        self.extra = set()
+        if os.path.exists(self.extra_path):
+            with open(self.extra_path, 'r', encoding='utf-8') as f:
+                self.extra = {line.rstrip("\n") for line in f if line.strip()}
+
+        self.base = array.array('Q')
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            header = f.read(self.HEADER_SIZE)
+            if len(header) < self.HEADER_SIZE or header[:8] != self.MAGIC:
+                raise ValueError(f"不是有效的ID集合文件: {self.path}")
+            count = int.from_bytes(header[8:], 'little')
+            if count == 0:
+                return
+            if sys.byteorder != 'little':
+                self.base.frombytes(f.read(count * 8))
+                self.base.byteswap()
+                return
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.base = memoryview(self.mm)[self.HEADER_SIZE:self.HEADER_SIZE + count * 8].cast('Q')
+
+    def release(self):
+        """解除内存映射"""
+        if isinstance(self.base, memoryview):
+            self.base.release()
+        self.base = array.array('Q')
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def close(self):
+        """关闭集合（未flush的增量会丢弃，由状态日志负责恢复）"""
+        self.release()
+
+    def in_base(self, value):
+        """在有序主数组中二分查找"""
+        i = bisect.bisect_left(self.base, value)
+        return i < len(self.base) and self.base[i] == value
+
+    def __contains__(self, paper_id):
+        value = encode_id(paper_id)
+        if value is None:
+            return VERSION_RE.sub('', paper_id.strip()) in self.extra
+        return value in self.delta or self.in_base(value)
+
+    def __len__(self):
+        return len(self.base) + len(self.delta) + len(self.extra)
+
+    def __iter__(self):
+        for value in self.base:
+            yield decode_id(value)
+        for value in sorted(self.delta):
+            yield decode_id(value)
+        yield from sorted(self.extra)
+
+    def add(self, paper_id):
+        """
+        添加一个ID
+
+        Returns:
+            ID是否为新加入
+        """
+        value = encode_id(paper_id)
+        if value is None:
+            paper_id = VERSION_RE.sub('', paper_id.strip())
+            if paper_id in self.extra:
+                return False
+            self.extra.add(paper_id)
+            self.write_extra()
+            return True
+        if value in self.delta or self.in_base(value):
+            return False
+        self.delta.add(value)
+        return True
+
+    def update(self, paper_ids):
+        """批量添加ID并立即合并落盘（用于从旧版配置迁移）"""
+        for paper_id in paper_ids:
+            self.add(paper_id)
+        self.flush()
+
+    def write_extra(self):
+        """写出无法编码的ID"""
+        if self.readonly:
+            return
+        tmp_file = self.extra_path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write("".join(f"{paper_id}\n" for paper_id in sorted(self.extra)))
+        os.replace(tmp_file, self.extra_path)
+
+    def flush(self):
+        """把增量缓冲合并进有序主数组，写新文件并原子替换"""
+        if self.readonly:
+            raise RuntimeError("只读ID集合不能写入")
+        if not self.delta:
+            return
+        merged = array.array('Q')
+        start = 0
+        for value in sorted(self.delta):
+            i = bisect.bisect_left(self.base, value, start)
+            merged.frombytes(self.base[start:i].tobytes())
+            merged.append(value)
+            start = i
+        merged.frombytes(self.base[start:].tobytes())
+        self.write_file(merged)
+        self.delta.clear()
+
+    def write_file(self, values):
+        """写出数据文件（先解除映射，Windows上被映射的文件不能替换）"""
+        self.release()
+        if sys.byteorder != 'little':
+            values = array.array('Q', values)
+            values.byteswap()
+        tmp_file = self.path + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(self.MAGIC + len(values).to_bytes(8, 'little'))
+            values.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        self.open()
+
+    def clear(self):
+        """清空集合（重置下载记录时使用）"""
+        self.delta.clear()
+        self.extra.clear()
+        self.write_extra()
+        self.write_file(array.array('Q'))
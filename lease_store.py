@@ -0,0 +1,173 @@
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+
+class LeaseStore:
+    """
+    多个工作进程共用的查询租约库（SQLite，可放在共享文件系统上）
+
+    每个查询一行：持有者、租约到期时间和检查水位线。工作进程在一个
+    BEGIN IMMEDIATE 事务里认领空闲或已过期、且水位线早于检查间隔的查询；
+    进程退出或卡死后租约自然过期，由其他进程重新认领。水位线只能由
+    当前持有有效租约的进程向后推进，被接管的旧进程写不回去。
+
+    另外保存 (论文ID, 版本号) → (sha256, 字节数) 映射，接口与
+    ProfileHost.shared_files 相同，一篇论文被任一进程下载后其他进程直接链接。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS leases (
+            query TEXT PRIMARY KEY,
+            owner TEXT,
+            expires_ts REAL NOT NULL DEFAULT 0,
+            watermark TEXT
+        );
+        CREATE TABLE IF NOT EXISTS shared_files (
+            id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (id, version)
+        );
+    """
+
+    def __init__(self, db_file):
+        """
+        Args:
+            db_file: 租约库文件路径
+        """
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        # 自动提交模式，事务由 BEGIN IMMEDIATE 显式开启；不用WAL，网络文件系统上不可靠
+        self.conn = sqlite3.connect(db_file, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(self.SCHEMA)
+
+    def transaction(self, fn):
+        """在写事务中执行 fn(conn)，返回其结果"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def sync_queries(self, queries):
+        """让租约表与配置中的查询列表一致（新增的插入，删除的移除）"""
+        wanted = set(queries)
+
+        def apply(conn):
+            conn.executemany("INSERT OR IGNORE INTO leases (query) VALUES (?)", [(q,) for q in wanted])
+            existing = [row[0] for row in conn.execute("SELECT query FROM leases")]
+            conn.executemany("DELETE FROM leases WHERE query = ?", [(q,) for q in existing if q not in wanted])
+        self.transaction(apply)
+
+    def claim(self, owner, limit, lease_seconds, interval_hours):
+        """
+        认领最多 limit 个到期需要检查的查询（水位线最旧的优先）
+
+        Args:
+            owner: 工作进程标识
+            lease_seconds: 租约时长
+            interval_hours: 检查间隔，水位线比这更新的查询不认领
+
+        Returns:
+            [(查询, 水位线或None)]
+        """
+        now = time.time()
+        due = (datetime.now() - timedelta(hours=interval_hours)).isoformat()
+
+        def apply(conn):
+            rows = conn.execute(
+                "SELECT query, watermark FROM leases "
+                "WHERE (owner IS NULL OR expires_ts < ? OR owner = ?) AND (watermark IS NULL OR watermark < ?) "
+                "ORDER BY watermark IS NOT NULL, watermark LIMIT ?",
+                (now, owner, due, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE leases SET owner = ?, expires_ts = ? WHERE query = ?",
+                [(owner, now + lease_seconds, query) for query, _ in rows]
+            )
+            return rows
+        return self.transaction(apply)
+
+    def renew(self, owner, lease_seconds):
+        """
+        延长本进程持有的全部租约
+
+        Returns:
+            仍然持有的查询数
+        """
+        def apply(conn):
+            return conn.execute(
+                "UPDATE leases SET expires_ts = ? WHERE owner = ? AND expires_ts >= ?",
+                (time.time() + lease_seconds, owner, time.time())
+            ).rowcount
+        return self.transaction(apply)
+
+    def advance_watermark(self, query, owner, watermark):
+        """
+        推进查询的水位线（只有持有有效租约的进程可以推进，且只能向后推进）
+
+        Returns:
+            "advanced"：已写入；"lost"：租约已过期或被其他进程接管；
+            "unchanged"：租约仍有效，但库中的水位线不早于 watermark，无需推进
+        """
+        def apply(conn):
+            row = conn.execute(
+                "SELECT owner, expires_ts, watermark FROM leases WHERE query = ?", (query,)
+            ).fetchone()
+            if row is None or row[0] != owner or row[1] < time.time():
+                return "lost"
+            if row[2] is not None and row[2] >= watermark:
+                return "unchanged"
+            conn.execute("UPDATE leases SET watermark = ? WHERE query = ?", (watermark, query))
+            return "advanced"
+        return self.transaction(apply)
+
+    def release(self, owner):
+        """释放本进程持有的全部租约"""
+        self.transaction(lambda conn: conn.execute(
+            "UPDATE leases SET owner = NULL, expires_ts = 0 WHERE owner = ?", (owner,)
+        ))
+
+    def status(self):
+        """
+        Returns:
+            [{"query", "owner", "expires_in", "watermark"}]
+        """
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT query, owner, expires_ts, watermark FROM leases ORDER BY query"
+            ).fetchall()
+        return [
+            {"query": query, "owner": owner if owner and expires_ts >= now else None,
+             "expires_in": max(0, round(expires_ts - now)) if owner else 0, "watermark": watermark}
+            for query, owner, expires_ts, watermark in rows
+        ]
+
+    def get(self, key, default=None):
+        """按 (论文ID, 版本号) 查询其他进程下载的文件"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sha256, size FROM shared_files WHERE id = ? AND version = ?", key
+            ).fetchone()
+        return tuple(row) if row else default
+
+    def __setitem__(self, key, value):
+        paper_id, version = key
+        sha256, size = value
+        self.transaction(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO shared_files (id, version, sha256, size) VALUES (?, ?, ?, ?)",
+            (paper_id, version, sha256, size)
+        ))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,128 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# 文件名前缀中的arXiv ID：新式ID（可带版本号），或 '/' 换成 '_' 的旧式ID
+NEW_PREFIX_RE = re.compile(r'^(\d{4}\.\d{4,5})(?:v\d+)?_')
+LEGACY_PREFIX_RE = re.compile(r'^([a-z\-]+(?:\.[A-Za-z\-]+)?)_(\d{7})(?:v\d+)?_')
+
+
+def parse_file_id(filename):
+    """
+    从 "{id}_标题.pdf" 形式的文件名中解析arXiv ID
+
+    Returns:
+        arXiv ID，文件名不符合格式时返回None
+    """
+    if not filename.endswith('.pdf'):
+        return None
+    match = NEW_PREFIX_RE.match(filename)
+    if match:
+        return match.group(1)
+    match = LEGACY_PREFIX_RE.match(filename)
+    if match:
+        archive = match.group(1).split('.')[0]
+        return f"{archive}/{match.group(2)}"
+    return None
+
+
+def scan_tree(path):
+    """
+    递归扫描一个目录
+
+    Returns:
+        [(arXiv ID, 文件路径)]
+    """
+    found = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        paper_id = parse_file_id(entry.name)
+                        if paper_id:
+                            found.append((paper_id, entry.path))
+        except OSError:
+            continue
+    return found
+
+
+class LibraryIndex:
+    """
+    磁盘上已有PDF的 ID→路径 索引
+
+    按文件名的 {id}_ 前缀识别论文，与标题、文件夹结构和下载记录无关；
+    下载前先查这个索引，磁盘上已有的文件不会再从网络传输一遍。
+    """
+
+    def __init__(self, download_path, skip_dirs=(".objects",)):
+        """
+        Args:
+            download_path: 下载根目录
+            skip_dirs: 根目录下不扫描的子目录（对象库按哈希命名）
+        """
+        self.download_path = download_path
+        self.skip_dirs = set(skip_dirs)
+        self.paths = {}
+        self.scanned = False
+
+    def scan(self, workers=None):
+        """
+        并行扫描下载目录，重建索引（每个顶层子目录一个任务）
+
+        Args:
+            workers: 线程数，缺省按CPU数确定
+
+        Returns:
+            索引到的论文数
+        """
+        paths = {}
+        subdirs = []
+        try:
+            with os.scandir(self.download_path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.skip_dirs:
+                            subdirs.append(entry.path)
+                    else:
+                        paper_id = parse_file_id(entry.name)
+                        if paper_id:
+                            paths.setdefault(paper_id, entry.path)
+        except OSError:
+            pass
+
+        if subdirs:
+            workers = workers or min(32, (os.cpu_count() or 1) * 4)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for found in executor.map(scan_tree, subdirs):
+                    for paper_id, path in found:
+                        paths.setdefault(paper_id, path)
+
+        self.paths = paths
+        self.scanned = True
+        return len(paths)
+
+    def get(self, paper_id):
+        """
+        Returns:
+            该论文在磁盘上的一个PDF路径，没有或已被删除时返回None
+        """
+        path = self.paths.get(paper_id)
+        if path and not os.path.isfile(path):
+            del self.paths[paper_id]
+            return None
+        return path
+
+    def add(self, paper_id, path):
+        """下载后登记新文件"""
+        self.paths[paper_id] = path
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return iter(self.paths)
@@ -0,0 +1,62 @@
+import atexit
+import queue
+import logging
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener = None
+_queue_handler = None
+
+
+def setup_logging(log_file, max_mb=10, backups=5, level=logging.INFO):
+    """
+    配置进程级日志：业务线程只把记录放进队列，由后台线程写文件和终端
+
+    磁盘慢时下载和抓取线程不会卡在写日志上。日志文件按大小轮转；
+    max_mb 为0时改为每天零点轮转。同一进程内重复调用（多配置托管、
+    工作进程）只生效一次。
+
+    Args:
+        log_file: 日志文件路径
+        max_mb: 单个日志文件的大小上限（MB），0 表示按天轮转
+        backups: 保留的旧日志文件数
+        level: 日志级别
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    if max_mb:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups, encoding='utf-8')
+    else:
+        file_handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when='midnight', backupCount=backups, encoding='utf-8')
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, file_handler, stream_handler,
+                                               respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    _queue_handler = logging.handlers.QueueHandler(records)
+    root.addHandler(_queue_handler)
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """写完队列中剩余的日志并停止后台线程（进程退出时自动调用）"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = None
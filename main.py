@@ -1,70 +1,205 @@
 import os
+import sys
 import time
 import json
-import requests
-from datetime import datetime, timedelta
-import schedule
-from plyer import notification
+import copy
 import logging
-import xml.etree.ElementTree as ET
 import re
-from urllib.parse import quote
-from config import categories,query_mapping, default_config
+import zlib
+import threading
+from datetime import datetime, timedelta
+from storage_index import StorageIndex
+from state_journal import StateJournal, apply_event
+from id_set import CompactIdSet
+from paper import Paper
+from paper_store import PaperStore
+from pdf_store import PdfStore
+from library_scan import LibraryIndex
+from download_scheduler import RateLimiter, in_windows, paper_priority
+import logging_setup
+
+# requests / schedule / plyer / xml 解析器、config.py 中的大表以及校验、文本提取、
+# 去重、相关性、向量索引和导出模块都在用到的代码路径里按需导入，
+# 这样 cron/systemd 触发的一次性 `check` 可以快速启动
+
+# 命令行退出码
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
 
 class ArxivMonitor:
-    def __init__(self, config_file="arxiv_config.json"):
+    def __init__(self, config_file="arxiv_config.json", fetch_cache=None, objects_path=None, shared_files=None,
+                 shared_storage=False, log_file="arxiv_monitor.log"):
         """
         初始化arXiv监控器
         Args:
             config_file: 配置文件路径
+            fetch_cache: 多配置共用的搜索结果缓存（见 profile_host.FetchCache）
+            objects_path: PDF对象库目录，缺省为下载目录下的 .objects
+            shared_files: 多配置共用的 (论文ID, 版本号) → (sha256, 字节数) 映射
+            shared_storage: 下载目录由多个进程共用（工作进程），不写存储统计索引
+            log_file: 日志文件路径（轮转不能跨进程，同时运行的进程各用各的文件）
         """
         self.config_file = config_file
+        self.journal = StateJournal(config_file)
+        self.downloaded_ids = CompactIdSet(config_file + ".ids")
         self.config = self.load_config()
-        self.setup_logging()
+        self.setup_logging(log_file)
         self.base_url = "http://export.arxiv.org/api/query"
+        self.failed_queries = []  # 本轮请求失败的查询，用于命令行退出码
+        self.pdf_store = PdfStore(self.config["download_path"], objects_path)
+        self.storage_index = StorageIndex(self.config["download_path"], self.pdf_store.objects_path,
+                                          read_only=shared_storage)
+        self.fetch_cache = fetch_cache
+        self.shared_files = shared_files
+        self.profile_name = None  # 多配置托管时的配置名，用于通知标题
+        self.object_in_use = lambda sha256: self.paper_store.sha_references(sha256) > 0
+        self.library_index = LibraryIndex(self.config["download_path"], (PdfStore.OBJECTS_DIR,))
+        self.paper_store = PaperStore(config_file + ".db")
+        self.rate_limiter = RateLimiter((self.config.get("download_kb_per_sec") or 0) * 1024)
+        self.verify_thread = None  # 监控模式下的后台完整性校验线程
+        self.extract_thread = None  # 下载后的后台文本提取线程
+        self.stop_requested = threading.Event()  # 优雅停止：下载循环在论文之间检查
+        self.migrate_downloaded_papers()
+        self.persist_state()
         
     def load_config(self):
-        """加载配置文件"""
+        """
+        加载配置文件：读取快照并回放状态日志
         
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    config["search_queries"] = default_config["search_queries"]
-                # 合并默认配置和用户配置
-                for key in default_config:
-                    if key not in config:
-                        config[key] = default_config[key]
-                
-                # 如果没有query_last_check字段，创建一个空的字典
-                if "query_last_check" not in config:
-                    config["query_last_check"] = {}
-                
-                return config
-            except Exception as e:
-                print(f"配置文件加载失败，使用默认配置: {e}")
-                return default_config
-        else:
+        快照损坏时退回到上一份备份快照；两者都不可用时抛出RuntimeError，
+        而不是静默地使用默认配置（那会导致重新下载全部论文）。
+        """
+        from config import default_config
+        
+        config = self.journal.read_snapshot()
+        if config is None:
             # 创建默认配置文件
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
-            return default_config
+            config = copy.deepcopy(default_config)
+            self.journal.write_snapshot(json.dumps(config, indent=2, ensure_ascii=False))
+            return config
+        
+        # 合并默认配置和用户配置
+        for key in default_config:
+            if key not in config:
+                config[key] = copy.deepcopy(default_config[key])
+        
+        # 如果没有query_last_check字段，创建一个空的字典
+        if "query_last_check" not in config:
+            config["query_last_check"] = {}
+        
+        self.journal.replay(config, self.downloaded_ids)
+        return config
+    
+    def migrate_downloaded_papers(self):
+        """把旧版配置中的 downloaded_papers 列表迁移到紧凑ID集合"""
+        legacy_ids = self.config.get("downloaded_papers")
+        if legacy_ids is None:
+            return
+        self.downloaded_ids.update(legacy_ids)
+        del self.config["downloaded_papers"]
+        self.save_config()
+        self.logger.info("已把 %s 条下载记录迁移到 %s", len(legacy_ids), self.downloaded_ids.path)
     
     def save_config(self):
-        """保存配置文件"""
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.config, f, indent=2, ensure_ascii=False)
-    
-    def setup_logging(self):
-        """设置日志"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('arxiv_monitor.log', encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        """保存完整配置快照（原子替换并截断状态日志），以及有变化的存储统计索引"""
+        # 日志截断后下载记录只存在于ID集合文件中，必须先落盘
+        self.downloaded_ids.flush()
+        self.journal.compact(self.config)
+        self.storage_index.save()
+    
+    def record_event(self, op, **fields):
+        """
+        应用一条状态变化并追加到状态日志，写入开销与配置大小无关
+        
+        Args:
+            op: 事件类型（downloaded / watermark / set / query_add / query_remove）
+            fields: 事件字段
+        """
+        event = dict(op=op, **fields)
+        apply_event(self.config, event, self.downloaded_ids)
+        self.journal.append(event)
+    
+    def checkpoint(self):
+        """
+        下载过程中的检查点：提交论文库的写入，必要时压缩状态日志
+        
+        下载记录和水位线事件在追加时就已fsync；论文的元数据和文件记录在
+        追加下载事件之前已经提交（见 record_download），这里提交的只是
+        查询归属、版本检查等可以重新得到的写入。
+        """
+        self.paper_store.commit()
+        self.persist_state()
+    
+    def request_stop(self, signum=None, frame=None):
+        """
+        请求优雅停止（SIGINT/SIGTERM处理函数）：当前论文下载完、检查点写入后退出
+        
+        再次收到信号时立即中断。
+        """
+        if self.stop_requested.is_set():
+            raise KeyboardInterrupt
+        self.stop_requested.set()
+        print("\n⏳ 正在完成当前下载并保存进度，再按一次 Ctrl+C 立即退出...")
+    
+    def persist_state(self):
+        """一轮工作结束时持久化：必要时后台压缩状态日志，保存存储统计索引"""
+        if self.journal.should_compact():
+            self.downloaded_ids.flush()
+            self.journal.compact(self.config, background=True)
+        self.storage_index.save()
+        self.paper_store.commit()
+    
+    def record_download(self, paper, queries=None):
+        """
+        记录一篇下载成功的论文：写入并提交论文元数据库，再追加下载事件
+        
+        顺序不能反：下载事件一旦落盘，论文就不会再被下载，崩溃时如果
+        论文库里还没有它的元数据和文件记录，校验、配额、版本检查和导出
+        都会永远漏掉它。反过来只是下次检查时发现文件已在对象库中，补记一次。
+        
+        Args:
+            paper: Paper 实例
+            queries: 论文匹配的全部查询，缺省为 paper.query
+        """
+        self.paper_store.upsert(paper)
+        self.paper_store.add_queries(paper.id, [q for q in (queries or [paper.query]) if q])
+        if self.config.get("near_duplicate_action", "flag") != "off":
+            self.index_signature(paper.id, paper.title, paper.summary)
+        self.paper_store.commit()
+        self.record_event("downloaded", id=paper.id)
+    
+    def index_signature(self, paper_id, title, summary):
+        """计算论文的MinHash签名并加入近重复检测索引"""
+        from near_dup import band_buckets, minhash, pack
+        
+        signature = minhash(title, summary)
+        if signature is not None:
+            self.paper_store.add_signature(paper_id, pack(signature), band_buckets(signature))
+    
+    def stop_background(self):
+        """
+        让后台校验和文本提取在正在处理的文件完成后停下，并等待线程退出
+        
+        两者都按论文库里的记录增量处理，没做完的部分下次（或 verify/extract 子命令）继续。
+        """
+        self.stop_requested.set()
+        for thread in (self.verify_thread, self.extract_thread):
+            if thread is not None:
+                thread.join()
+        self.verify_thread = self.extract_thread = None
+    
+    def close(self):
+        """停止后台任务并释放文件句柄"""
+        self.stop_background()
+        self.journal.close()
+        self.downloaded_ids.close()
+        self.paper_store.close()
+    
+    def setup_logging(self, log_file):
+        """设置日志（经队列异步写入，日志文件自动轮转）"""
+        logging_setup.setup_logging(log_file, max_mb=self.config.get("log_max_mb", 10),
+                                    backups=self.config.get("log_backups", 5))
         self.logger = logging.getLogger(__name__)
     
     def get_folder_name_for_query(self, query):
@@ -77,6 +212,8 @@ class ArxivMonitor:
         Returns:
             安全的文件夹名称
         """
+        from config import query_mapping
+        
         # 如果有预定义映射，使用映射
         if query in query_mapping:
             return query_mapping[query]
@@ -109,34 +246,51 @@ class ArxivMonitor:
             query_path = os.path.join(base_path, folder_name)
             if not os.path.exists(query_path):
                 os.makedirs(query_path)
-                self.logger.info(f"创建查询目录: {query_path}")
+                self.logger.info("创建查询目录: %s", query_path)
             return query_path
         
         return base_path
     
-    def search_papers_direct_api(self, query, max_results=10):
+    def search_papers_direct_api(self, query, max_results=10, start=0):
         """
         直接使用arXiv API搜索论文
         
         Args:
             query: 搜索查询
             max_results: 最大结果数
+            start: 结果偏移量，用于分页回填
             
         Returns:
             论文列表
         """
-        try:
-            # 构建查询参数
-            params = {
-                'search_query': query,
-                'start': 0,
-                'max_results': max_results,
-                'sortBy': 'submittedDate',
-                'sortOrder': 'descending'
-            }
+        # 构建查询参数
+        params = {
+            'search_query': query,
+            'start': start,
+            'max_results': max_results,
+            'sortBy': 'submittedDate',
+            'sortOrder': 'descending'
+        }
+        return self.fetch_papers(params, query, query)
+    
+    def fetch_papers(self, params, query, label):
+        """
+        请求arXiv API并解析返回的Atom条目
+        
+        Args:
+            params: API查询参数（search_query 或 id_list）
+            query: 论文归属的搜索查询，按ID批量查询时为None
+            label: 日志和失败记录中使用的名称
             
+        Returns:
+            论文列表，请求或解析失败时为空列表
+        """
+        import requests
+        import xml.etree.ElementTree as ET
+        
+        try:
             # 发送请求
-            self.logger.info(f"正在请求arXiv API: {query}")
+            self.logger.info("正在请求arXiv API: %s", label)
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
@@ -158,8 +312,10 @@ class ArxivMonitor:
             
             for entry in entries:
                 try:
-                    # 提取论文信息
-                    paper_id = entry.find('atom:id', namespaces).text.split('/')[-1].split('v')[0]
+                    # 提取论文信息（旧式ID本身带 '/'，版本号只在末尾）
+                    abs_id = entry.find('atom:id', namespaces).text.strip().split('/abs/')[-1]
+                    match = re.match(r'^(.+?)v(\d+)$', abs_id)
+                    paper_id, version = (match.group(1), int(match.group(2))) if match else (abs_id, 1)
                     title = entry.find('atom:title', namespaces).text.strip()
                     summary = entry.find('atom:summary', namespaces).text.strip()
                     
@@ -173,6 +329,9 @@ class ArxivMonitor:
                     # 提取发布日期
                     published_str = entry.find('atom:published', namespaces).text
                     published = datetime.fromisoformat(published_str.replace('Z', '+00:00'))
+                    updated_node = entry.find('atom:updated', namespaces)
+                    updated = (datetime.fromisoformat(updated_node.text.replace('Z', '+00:00'))
+                               if updated_node is not None else published)
                     
                     # 提取PDF链接
                     pdf_url = ""
@@ -192,95 +351,285 @@ class ArxivMonitor:
                     if not pdf_url:
                         pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
                     
-                    papers.append({
-                        'id': paper_id,
-                        'title': title,
-                        'authors': authors,
-                        'summary': summary,
-                        'published': published,
-                        'pdf_url': pdf_url,
-                        'categories': categories,
-                        'query': query  # 添加查询信息
-                    })
+                    papers.append(Paper.create(
+                        paper_id, title, authors, published, pdf_url, categories,
+                        query=query,  # 添加查询信息
+                        summary=summary,
+                        version=version,
+                        updated=updated
+                    ))
                     
                 except Exception as e:
-                    self.logger.warning(f"解析论文条目时出错: {e}")
+                    self.logger.warning("解析论文条目时出错: %s", e)
                     continue
             
-            self.logger.info(f"成功获取 {len(papers)} 篇论文")
+            self.logger.info("成功获取 %s 篇论文", len(papers))
             return papers
             
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"请求arXiv API失败: {e}")
+            self.logger.error("请求arXiv API失败: %s", e)
+            self.failed_queries.append(label)
             return []
         except ET.ParseError as e:
-            self.logger.error(f"解析XML响应失败: {e}")
+            self.logger.error("解析XML响应失败: %s", e)
+            self.failed_queries.append(label)
             return []
         except Exception as e:
-            self.logger.error(f"搜索论文时出错: {e}")
+            self.logger.error("搜索论文时出错: %s", e)
+            self.failed_queries.append(label)
             return []
     
-    def search_papers(self, query, max_results=10):
+    def search_papers(self, query, max_results=10, start=0):
         """
-        搜索论文 - 主入口
+        搜索论文 - 主入口（多配置托管时先查本轮已抓取的结果）
         """
-        return self.search_papers_direct_api(query, max_results)
+        if self.fetch_cache is not None:
+            papers = self.fetch_cache.get(query, max_results, start)
+            if papers is not None:
+                self.logger.info("使用本轮已抓取的结果: %s", query)
+                return papers
+        return self.search_papers_direct_api(query, max_results, start)
+    
+    def paper_filename(self, paper):
+        """论文PDF的文件名：ID + 安全标题"""
+        safe_title = re.sub(r'[^\w\s-]', '', paper.title)
+        safe_title = re.sub(r'[-\s]+', '-', safe_title)
+        safe_title = safe_title[:100].strip('-')
+        return f"{paper.file_id}_{safe_title}.pdf"
     
-    def download_paper(self, paper):
+    def view_paths(self, paper, queries, organize_by_query=None):
         """
-        下载论文PDF到对应的查询文件夹
+        论文在目录视图中的文件路径
         
         Args:
-            paper: 论文信息字典
+            paper: Paper 实例
+            queries: 论文匹配的查询列表
+            organize_by_query: 目录结构，缺省为当前配置
+            
+        Returns:
+            按查询分文件夹时每个查询一个路径，否则只有根目录下的一个路径
+        """
+        if organize_by_query is None:
+            organize_by_query = self.config.get("organize_by_query", True)
+        base_path = self.config["download_path"]
+        filename = self.paper_filename(paper)
+        queries = [q for q in queries if q]
+        if not organize_by_query or not queries:
+            return [os.path.join(base_path, filename)]
+        return [os.path.join(base_path, self.get_folder_name_for_query(q), filename) for q in queries]
+    
+    def link_views(self, sha256, size, views):
+        """
+        为对象库中的PDF建立目录视图，并同步存储统计
+        
+        Returns:
+            新建的视图数
+        """
+        created = 0
+        for view in views:
+            old_size = os.path.getsize(view) if os.path.exists(view) else None
+            if self.pdf_store.link(sha256, view):
+                if old_size is not None:
+                    self.storage_index.record_remove(view, old_size)
+                self.storage_index.record_add(view, size)
+                created += 1
+        return created
+    
+    def download_paper(self, paper, replace=False, queries=None):
+        """
+        下载论文PDF到对象库，并链接到对应的查询文件夹
+        
+        Args:
+            paper: Paper 实例
+            replace: 文件已存在时是否重新下载并替换（论文出了新版本）
+            queries: 论文匹配的全部查询，缺省为 paper.query
             
         Returns:
             下载成功返回True，否则返回False
         """
+        import requests
+        from pdf_verify import TRAILER_WINDOW, has_pdf_trailer
+        
         try:
-            if not paper['pdf_url']:
-                self.logger.warning(f"论文 {paper['id']} 没有PDF链接")
+            if not paper.pdf_url:
+                self.logger.warning("论文 %s 没有PDF链接", paper.id)
                 return False
             
-            # 获取对应查询的下载目录
-            download_dir = self.create_download_directory(paper.get('query'))
+            queries = queries or [paper.query]
+            for query in queries:
+                self.create_download_directory(query)
+            views = self.view_paths(paper, queries)
+            filename = os.path.basename(views[0])
+            stored = self.paper_store.get_file(paper.id)
             
-            # 创建安全的文件名
-            safe_title = re.sub(r'[^\w\s-]', '', paper['title'])
-            safe_title = re.sub(r'[-\s]+', '-', safe_title)
-            safe_title = safe_title[:100].strip('-')
-            filename = f"{paper['id']}_{safe_title}.pdf"
-            filepath = os.path.join(download_dir, filename)
+            # 检查文件是否已存在：对象库里已有就只补链接，不重新下载
+            if not replace:
+                if stored and self.pdf_store.has(stored[0]):
+                    self.link_views(stored[0], stored[1], views)
+                    self.logger.info("文件已存在: %s", filename)
+                    return True
+                existing = next((v for v in views if os.path.isfile(v)), None)
+                if existing is None and self.config.get("library_scan", True):
+                    # 标题、文件夹或下载记录变化后文件名对不上，按ID在整个下载目录里找
+                    if not self.library_index.scanned:
+                        self.scan_library()
+                    existing = self.library_index.get(paper.id)
+                if existing:
+                    # 磁盘上已有的文件（包括旧版本直接下载到文件夹里的），移入对象库
+                    sha256, size = self.pdf_store.ingest(existing)
+                    self.link_views(sha256, size, views)
+                    self.paper_store.set_file(paper.id, sha256, size)
+                    self.logger.info("文件已存在: %s", existing)
+                    return True
             
-            # 检查文件是否已存在
-            if os.path.exists(filepath):
-                self.logger.info(f"文件已存在: {filename}")
+            # 其他配置已经下载过同一版本，直接链接共享对象库中的文件
+            shared = self.shared_files.get((paper.id, paper.version)) if self.shared_files is not None else None
+            if shared and self.pdf_store.has(shared[0]):
+                self.link_views(shared[0], shared[1], views)
+                self.paper_store.set_file(paper.id, shared[0], shared[1])
+                self.logger.info("使用其他配置或工作进程已下载的文件: %s", filename)
                 return True
             
             # 下载PDF
-            self.logger.info(f"正在下载到 {os.path.basename(download_dir)}: {paper['title'][:50]}...")
+            self.logger.info("正在下载到 %s: %s...", os.path.basename(os.path.dirname(views[0])), paper.title[:50])
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            # 尝试下载
-            response = requests.get(paper['pdf_url'], headers=headers, timeout=60)
-            response.raise_for_status()
+            # 分块下载，受全局带宽限制
+            with requests.get(paper.pdf_url, headers=headers, timeout=60, stream=True) as response:
+                response.raise_for_status()
+                chunks = []
+                for chunk in response.iter_content(64 * 1024):
+                    chunks.append(chunk)
+                    self.rate_limiter.consume(len(chunk))
+            content = b''.join(chunks)
             
             # 检查是否真的是PDF文件
-            if not response.content.startswith(b'%PDF'):
-                self.logger.warning(f"下载的文件不是有效的PDF: {paper['id']}")
+            if not content.startswith(b'%PDF'):
+                self.logger.warning("下载的文件不是有效的PDF: %s", paper.id)
                 return False
+            if not has_pdf_trailer(content[-TRAILER_WINDOW:]):
+                self.logger.warning("下载的PDF不完整（缺少 %%EOF 结尾）: %s", paper.id)
+                return False
+            
+            size = len(content)
+            sha256, created = self.pdf_store.put(content)
+            if created:
+                self.storage_index.record_object(size)
+            if replace and stored:
+                # 新版本标题变了时文件名也变了：旧标题的视图要删掉，否则继续指向旧版本
+                self.unlink_old_views(paper.id, stored, queries, views)
+            self.link_views(sha256, size, views)
+            self.paper_store.set_file(paper.id, sha256, size)
+            if self.shared_files is not None:
+                self.shared_files[(paper.id, paper.version)] = (sha256, size)
+            if self.library_index.scanned:
+                self.library_index.add(paper.id, views[0])
             
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            # 新版本替换后，旧版本的对象没有论文引用时删除
+            if (stored and stored[0] != sha256 and self.pdf_store.has(stored[0])
+                    and not self.object_in_use(stored[0])):
+                self.pdf_store.remove(stored[0])
+                self.storage_index.record_object(stored[1], -1)
             
-            self.logger.info(f"成功下载: {filename} ({len(response.content)} bytes)")
+            self.logger.info("成功下载: %s (%s bytes)", filename, size)
             return True
             
         except Exception as e:
-            self.logger.error(f"下载论文失败 {paper['id']}: {e}")
+            self.logger.error("下载论文失败 %s: %s", paper.id, e)
             return False
     
+    def unlink_old_views(self, paper_id, stored, queries, keep):
+        """
+        删除论文按库中旧元数据（旧标题）生成的视图
+        
+        Args:
+            paper_id: 论文ID
+            stored: 旧版本的 (sha256, 字节数)
+            queries: 论文匹配的查询列表
+            keep: 新版本的视图路径，不删除
+        """
+        old = self.paper_store.get(paper_id)
+        if old is None or not old.title:
+            return
+        for view in self.view_paths(old, queries):
+            if view not in keep and self.pdf_store.unlink_view(view, stored[0]):
+                self.storage_index.record_remove(view, stored[1])
+    
+    def scan_library(self, adopt=False):
+        """
+        并行扫描下载目录，按文件名中的 {id}_ 前缀建立 ID→路径 索引
+        
+        Args:
+            adopt: 是否把磁盘上有、但下载记录里没有的论文记为已下载
+            
+        Returns:
+            扫描结果摘要
+        """
+        start = time.time()
+        indexed = self.library_index.scan()
+        untracked = [paper_id for paper_id in self.library_index if paper_id not in self.downloaded_ids]
+        self.logger.info("下载目录扫描完成: %s 篇论文，%s 篇不在下载记录中，耗时 %.2f 秒",
+                         indexed, len(untracked), time.time() - start)
+        
+        if adopt and untracked:
+            for paper_id in untracked:
+                self.record_event("downloaded", id=paper_id)
+            self.persist_state()
+        
+        return {
+            "indexed": indexed,
+            "untracked": len(untracked),
+            "adopted": len(untracked) if adopt else 0
+        }
+    
+    def add_paper_query(self, paper, query):
+        """已下载的论文又匹配了新的查询时，补上该查询文件夹中的链接"""
+        added = self.paper_store.add_queries(paper.id, [query])
+        if not added:
+            return
+        stored = self.paper_store.get_file(paper.id)
+        if stored and self.pdf_store.has(stored[0]):
+            for q in added:
+                self.create_download_directory(q)
+            self.link_views(stored[0], stored[1], self.view_paths(paper, added))
+    
+    def rebuild_views(self, previous_organize_by_query):
+        """
+        按当前的目录结构重建所有论文的目录视图（只重建链接，不重新下载）
+        
+        Args:
+            previous_organize_by_query: 切换前的目录结构
+            
+        Returns:
+            (处理的论文数, 新建的链接数)
+        """
+        papers = 0
+        linked = 0
+        for paper, sha256, size in self.paper_store.iter_papers():
+            queries = self.paper_store.queries(paper.id) or [paper.query]
+            old_views = self.view_paths(paper, queries, previous_organize_by_query)
+            new_views = self.view_paths(paper, queries)
+            
+            if not sha256 or not self.pdf_store.has(sha256):
+                legacy = next((v for v in old_views + new_views if os.path.isfile(v)), None)
+                if not legacy:
+                    continue
+                sha256, size = self.pdf_store.ingest(legacy)
+                self.paper_store.set_file(paper.id, sha256, size)
+            
+            linked += self.link_views(sha256, size, new_views)
+            for view in old_views:
+                if view not in new_views and self.pdf_store.unlink_view(view, sha256):
+                    self.storage_index.record_remove(view, size)
+            papers += 1
+        
+        self.paper_store.commit()
+        self.storage_index.save()
+        self.logger.info("目录视图已重建: %s 篇论文，新建 %s 个链接", papers, linked)
+        return papers, linked
+    
     def filter_new_papers(self, papers, query):
         """
         筛选新论文（未下载过的，基于特定查询的时间）
@@ -292,47 +641,242 @@ class ArxivMonitor:
         Returns:
             新论文列表
         """
-        downloaded_ids = set(self.config["downloaded_papers"])
+        downloaded_ids = self.downloaded_ids
         new_papers = []
         
+        # 截止时间只解析一次，之后直接与论文的UTC秒数比较
+        cutoff_ts = None
+        reason = f"直接添加论文（查询: {query}，无历史记录）"
+        if self.config.get("first_run", True):
+            # 如果是首次运行，获取最近一段时间的论文
+            cutoff_ts = (datetime.now() - timedelta(days=1000)).timestamp()
+            reason = f"因为首次运行获取到的论文（查询: {query}）"
+        else:
+            # 检查该查询的上次检查时间
+            query_last_check = self.config["query_last_check"].get(query)
+            if query_last_check:
+                try:
+                    cutoff_ts = datetime.fromisoformat(query_last_check).timestamp()
+                    reason = f"因为在查询 '{query}' 的时间之后获取到的论文"
+                except ValueError:
+                    # 如果日期解析失败，就添加这些论文
+                    reason = f"日期解析失败（查询: {query}）"
+        
         for paper in papers:
-            if paper['id'] not in downloaded_ids:
-                # 如果是首次运行，获取最近24小时的论文
-                if self.config.get("first_run", True):
-                    cutoff_time = datetime.now() - timedelta(days=1000)
-                    if paper['published'].replace(tzinfo=None) > cutoff_time:
-                        print(f"因为首次运行获取到的论文（查询: {query}）")
-                        new_papers.append(paper)
-                else:
-                    # 检查该查询的上次检查时间
-                    query_last_check = self.config["query_last_check"].get(query)
-                    if query_last_check:
-                        try:
-                            last_check = datetime.fromisoformat(query_last_check)
-                            if paper['published'].replace(tzinfo=None) > last_check.replace(tzinfo=None):
-                                print(f"因为在查询 '{query}' 的时间之后获取到的论文")
-                                new_papers.append(paper)
-                        except:
-                            # 如果日期解析失败，就添加这篇论文
-                            print(f"日期解析失败（查询: {query}）")
-                            new_papers.append(paper)
-                    else:
-                        # 如果该查询没有检查记录，添加论文
-                        print(f"直接添加论文（查询: {query}，无历史记录）")
-                        new_papers.append(paper)
+            if paper.id not in downloaded_ids and (cutoff_ts is None or paper.published_ts > cutoff_ts):
+                print(reason)
+                new_papers.append(paper)
         
         return new_papers
     
+    def filter_near_duplicates(self, papers):
+        """
+        用MinHash+LSH找出与已下载论文或本批中靠前论文近似重复的候选
+        
+        每篇候选只查询与它共享LSH桶的论文，再用签名估计的相似度确认，
+        查找开销与库的大小基本无关。near_duplicate_action 为 "skip" 时
+        不下载近重复的论文，为 "flag" 时只在结果中标出，为 "off" 时不检测。
+        
+        Args:
+            papers: 候选论文列表
+            
+        Returns:
+            (保留的论文列表, [{"id", "duplicate_of", "similarity"}])
+        """
+        from near_dup import band_buckets, minhash, similarity, unpack
+        
+        action = self.config.get("near_duplicate_action", "flag")
+        if action == "off" or not papers:
+            return papers, []
+        threshold = self.config.get("near_duplicate_threshold", 0.7)
+        
+        kept = []
+        duplicates = []
+        batch_buckets = {}  # 本批已保留候选的 桶键 → [(论文ID, 签名)]
+        for paper in papers:
+            signature = minhash(paper.title, paper.summary)
+            if signature is None:
+                kept.append(paper)
+                continue
+            buckets = band_buckets(signature)
+            candidates = {pid: unpack(sig) for pid, sig in self.paper_store.lsh_candidates(buckets).items()}
+            for bucket in buckets:
+                candidates.update(batch_buckets.get(bucket, ()))
+            candidates.pop(paper.id, None)
+            
+            best_id, best = None, 0.0
+            for other_id, other in candidates.items():
+                score = similarity(signature, other)
+                if score > best:
+                    best_id, best = other_id, score
+            
+            if best >= threshold:
+                duplicates.append({"id": paper.id, "duplicate_of": best_id, "similarity": round(best, 3)})
+                self.logger.info("近重复论文 %s ≈ %s (相似度 %.2f)", paper.id, best_id, best)
+                if action == "skip":
+                    print(f"♻️  跳过近重复论文: {paper.title[:50]}... (≈ {best_id})")
+                    continue
+            kept.append(paper)
+            for bucket in buckets:
+                batch_buckets.setdefault(bucket, []).append((paper.id, signature))
+        
+        return kept, duplicates
+    
+    def index_library_signatures(self):
+        """
+        为还没有MinHash签名的已入库论文补建签名（旧版本下载的论文）
+        
+        Returns:
+            新建签名的论文数
+        """
+        indexed = 0
+        for paper_id, title, summary in self.paper_store.papers_without_signature():
+            self.index_signature(paper_id, title, summary)
+            indexed += 1
+            if indexed % 1000 == 0:
+                self.paper_store.commit()
+        self.paper_store.commit()
+        return indexed
+    
+    def update_vector_index(self, batch_size=1000):
+        """
+        把还没有向量的论文追加到相似论文索引中（按批向量化）
+        
+        只查看写入时间不早于索引水位线的论文：先只读ID，
+        确实不在索引中的再读取并解压摘要。同一秒写入的论文可能在水位线
+        之后才提交，所以水位线那一秒的论文会再核对一次。
+        
+        Returns:
+            (索引, 新增的论文数)
+        """
+        from relevance import paper_text
+        from vector_index import VectorIndex
+        
+        index = VectorIndex(self.config_file + ".vectors")
+        newest = index.stored_mark
+        missing = []
+        for paper_id, stored_ts in self.paper_store.ids_stored_since(index.stored_mark, batch_size):
+            newest = stored_ts
+            if paper_id not in index:
+                missing.append(paper_id)
+        added = 0
+        for start in range(0, len(missing), batch_size):
+            rows = self.paper_store.texts(missing[start:start + batch_size])
+            added += index.add([(paper_id, paper_text(title, summary)) for paper_id, title, summary in rows])
+        if newest != index.stored_mark or added:
+            index.set_mark(newest)
+        if added:
+            self.logger.info("相似论文索引新增 %s 篇，共 %s 篇", added, len(index))
+        return index, added
+    
+    def related_papers(self, paper_id, top_n=10):
+        """
+        在本地文库中查找与某篇论文最相似的论文
+        
+        Args:
+            paper_id: arXiv ID（可以带版本号）
+            top_n: 返回的篇数
+            
+        Returns:
+            [{"id", "title", "score"}]，论文不在库中时返回None
+        """
+        from relevance import paper_text
+        from vector_index import vectorize
+        
+        paper_id = re.sub(r'v\d+$', '', paper_id.strip())
+        index, _ = self.update_vector_index()
+        vector = index.vector(paper_id)
+        if vector is None:
+            paper = self.paper_store.get(paper_id)
+            if paper is None or not paper.title:
+                return None
+            vector = vectorize([paper_text(paper.title, paper.summary)])[0]
+        
+        results = []
+        for other_id, score in index.nearest(vector, top_n, exclude=(paper_id,)):
+            other = self.paper_store.get(other_id)
+            results.append({"id": other_id, "title": other.title if other else "", "score": round(score, 4)})
+        return results
+    
+    def export_metadata(self, out_dir, fmt="auto", full=False, batch_size=10000):
+        """
+        把论文元数据流式导出为分区的 Parquet 或 gzip JSONL
+        
+        增量导出只包含上次导出（导出目录中的水位线）之后写入或更新的论文；
+        每次只在内存中保留 batch_size 行。
+        
+        Args:
+            out_dir: 导出目录
+            fmt: "auto"、"parquet" 或 "jsonl"
+            full: 是否忽略水位线全量导出
+            batch_size: 每批读取的行数
+            
+        Returns:
+            导出结果摘要
+        """
+        from exporter import export_batches, read_watermark, write_watermark
+        
+        self.paper_store.commit()
+        since = None if full else read_watermark(out_dir)
+        # 本秒内还可能有写入，水位线停在上一秒，下次导出会包含它们
+        until = int(time.time())
+        fmt, rows, files = export_batches(self.paper_store.export_batches(since, until, batch_size), out_dir, fmt)
+        write_watermark(out_dir, until - 1, rows)
+        self.logger.info("导出 %s 篇论文元数据到 %s（%s，%s 个文件）", rows, out_dir, fmt, files)
+        return {"format": fmt, "rows": rows, "files": files, "since": since, "watermark": until - 1}
+    
+    def rank_papers(self, papers):
+        """
+        按与兴趣画像的TF-IDF相似度筛选候选论文
+        
+        画像由最近 relevance_profile_size 篇已下载论文的标题和摘要建立；
+        未设置 relevance_top_k / relevance_threshold、未安装 numpy 或
+        已下载论文少于 relevance_min_profile 篇时不筛选。
+        
+        Args:
+            papers: 候选论文列表
+            
+        Returns:
+            (保留的论文列表, 筛掉的论文列表)
+        """
+        from relevance import RelevanceProfile, paper_text, ranking_available, select_relevant
+        
+        top_k = self.config.get("relevance_top_k", 0)
+        threshold = self.config.get("relevance_threshold", 0.0)
+        if not papers or not (top_k or threshold):
+            return papers, []
+        if not ranking_available():
+            self.logger.warning("未安装 numpy，跳过相关性排序（pip install numpy）")
+            return papers, []
+        
+        kept = self.paper_store.kept_texts(self.config.get("relevance_profile_size", 2000))
+        if len(kept) < self.config.get("relevance_min_profile", 20):
+            self.logger.info("已下载论文只有 %s 篇，画像不足，跳过相关性排序", len(kept))
+            return papers, []
+        
+        profile = RelevanceProfile([paper_text(title, summary) for title, summary in kept])
+        scores = profile.score([paper_text(p.title, p.summary) for p in papers])
+        selected = select_relevant(scores, top_k, threshold)
+        chosen = set(selected)
+        
+        skipped = [p for i, p in enumerate(papers) if i not in chosen]
+        self.logger.info("相关性排序: %s 篇候选，保留 %s 篇，最高分 %.3f",
+                         len(papers), len(selected), scores.max())
+        if skipped:
+            print(f"🎯 按相关性保留 {len(selected)} 篇，跳过 {len(skipped)} 篇不太相关的论文")
+        return [papers[i] for i in sorted(selected)], skipped
+    
     def send_notification(self, title, message):
         """发送系统通知"""
         try:
+            from plyer import notification
             notification.notify(
                 title=title,
                 message=message,
                 timeout=10
             )
         except Exception as e:
-            self.logger.error(f"发送通知失败: {e}")
+            self.logger.error("发送通知失败: %s", e)
             # 如果通知失败，至少在控制台显示
             print(f"\n🔔 {title}: {message}")
     
@@ -347,9 +891,9 @@ class ArxivMonitor:
             
             if papers:
                 print(f"✅ arXiv API连接成功！获取到 {len(papers)} 篇论文")
-                print(f"📄 测试论文: {papers[0]['title'][:80]}...")
-                print(f"👥 作者: {', '.join(papers[0]['authors'][:2])}")
-                print(f"📅 发布: {papers[0]['published'].strftime('%Y-%m-%d')}")
+                print(f"📄 测试论文: {papers[0].title[:80]}...")
+                print(f"👥 作者: {', '.join(papers[0].authors[:2])}")
+                print(f"📅 发布: {papers[0].published.strftime('%Y-%m-%d')}")
                 return True
             else:
                 print("❌ arXiv API连接失败")
@@ -361,6 +905,7 @@ class ArxivMonitor:
     
     def show_available_categories(self):
         """显示可用的arXiv分类"""
+        from config import categories
         
         print("\n📚 arXiv 主要分类目录:")
         print("=" * 80)
@@ -372,54 +917,100 @@ class ArxivMonitor:
                 print(f"   {cat_code:<15} {cat_name}")
     
     def check_for_new_papers(self):
-        """检查新论文"""
+        """
+        检查新论文
+        
+        Returns:
+            本轮检查结果摘要（新论文数、已下载论文、失败的查询）
+        """
         self.logger.info("开始检查新论文...")
         self.create_download_directory()
+        self.failed_queries = []
         
         # 如果是首次运行，提示用户
         if self.config.get("first_run", True):
             print("📢 这是首次运行，将下载最近24小时的论文作为演示")
         
         all_new_papers = []
+        # 各查询的检查时间（取搜索开始的时间）；要等该查询的新论文都处理完才写入，
+        # 中途崩溃或停止时水位线不前移，下次从同一位置重新处理
+        searched_at = {}
         
         # 对每个搜索查询进行独立检查
         for query in self.config["search_queries"]:
-            self.logger.info(f"搜索查询: {query}")
+            if self.stop_requested.is_set():
+                break
+            self.logger.info("搜索查询: %s", query)
+            started = datetime.now().isoformat()
             papers = self.search_papers(query, self.config["max_results"])
+            if query in self.failed_queries:
+                # 请求失败，不推进水位线
+                continue
+            searched_at[query] = started
             
             if papers:
-                self.logger.info(f"查询 '{query}' 找到 {len(papers)} 篇论文")
+                self.logger.info("查询 '%s' 找到 %s 篇论文", query, len(papers))
                 new_papers = self.filter_new_papers(papers, query)
                 
+                # 已下载的论文出现在这个查询里，只补一个链接
+                for paper in papers:
+                    if paper.id in self.downloaded_ids:
+                        self.add_paper_query(paper, query)
+                
                 if new_papers:
-                    self.logger.info(f"其中 {len(new_papers)} 篇是新论文")
+                    self.logger.info("其中 %s 篇是新论文", len(new_papers))
                     all_new_papers.extend(new_papers)
-                    
-                    # 更新该查询的检查时间
-                    self.config["query_last_check"][query] = datetime.now().isoformat()
                 else:
                     self.logger.info("没有新论文")
-                    # 即使没有新论文，也更新该查询的检查时间
-                    self.config["query_last_check"][query] = datetime.now().isoformat()
             else:
-                self.logger.warning(f"查询 '{query}' 没有返回结果")
-                # 即使没有返回结果，也更新该查询的检查时间
-                self.config["query_last_check"][query] = datetime.now().isoformat()
+                self.logger.warning("查询 '%s' 没有返回结果", query)
         
-        # 去重（基于ID）
+        # 去重（基于ID），同时记下每篇论文匹配的全部查询
         unique_papers = {}
+        paper_queries = {}
         for paper in all_new_papers:
-            if paper['id'] not in unique_papers:
-                unique_papers[paper['id']] = paper
+            if paper.id not in unique_papers:
+                unique_papers[paper.id] = paper
+                paper_queries[paper.id] = []
+            if paper.query not in paper_queries[paper.id]:
+                paper_queries[paper.id].append(paper.query)
         all_new_papers = list(unique_papers.values())
         
+        # 近重复检测（同一论文的会议/期刊版、换了ID的重投稿等）
+        all_new_papers, near_duplicates = self.filter_near_duplicates(all_new_papers)
+        
+        # 按与兴趣画像的相关性筛掉排名靠后的论文
+        all_new_papers, skipped = self.rank_papers(all_new_papers)
+        
+        # 按查询优先级和发布时间排序；非空闲时段只立即下载前 immediate_downloads 篇，其余延后
+        query_priority = self.config.get("query_priority", {})
+        all_new_papers.sort(key=lambda p: paper_priority(p, paper_queries[p.id], query_priority))
+        limit = self.config.get("immediate_downloads")
+        deferred = 0
+        if limit and len(all_new_papers) > limit and not self.in_offpeak():
+            for paper in all_new_papers[limit:]:
+                self.defer_download(paper, paper_queries[paper.id])
+            deferred = len(all_new_papers) - limit
+            all_new_papers = all_new_papers[:limit]
+            print(f"⏳ 新论文较多，{deferred} 篇延后到空闲时段下载")
+        
         if all_new_papers:
             print(f"\n🎯 找到 {len(all_new_papers)} 篇新论文，开始下载...")
         
+        # 每个查询还有哪些论文没处理完；没有待下载论文的查询直接写入水位线
+        pending = {query: set() for query in searched_at}
+        for paper in all_new_papers:
+            for query in paper_queries[paper.id]:
+                pending[query].add(paper.id)
+        for query in list(pending):
+            if not pending[query]:
+                self.record_event("watermark", query=query, value=searched_at[query])
+                del pending[query]
+        
         # 按查询分组显示下载进度
         papers_by_query = {}
         for paper in all_new_papers:
-            query = paper.get('query', 'unknown')
+            query = paper.query or 'unknown'
             if query not in papers_by_query:
                 papers_by_query[query] = []
             papers_by_query[query].append(paper)
@@ -427,31 +1018,71 @@ class ArxivMonitor:
         # 下载新论文
         successful_downloads = 0
         total_papers = len(all_new_papers)
+        downloaded = []
+        
+        processed = 0
+        dropped = 0
+        checkpoint_every = self.config.get("checkpoint_every", 10)
         
         for query, papers in papers_by_query.items():
+            if self.stop_requested.is_set():
+                break
             folder_name = self.get_folder_name_for_query(query)
             print(f"\n📁 正在下载到文件夹: {folder_name} ({len(papers)} 篇)")
             
             for i, paper in enumerate(papers, 1):
+                if self.stop_requested.is_set():
+                    break
                 global_idx = successful_downloads + i
-                print(f"📥 总进度: {global_idx}/{total_papers} | 当前文件夹: {i}/{len(papers)} - {paper['title'][:50]}...")
+                print(f"📥 总进度: {global_idx}/{total_papers} | 当前文件夹: {i}/{len(papers)} - {paper.title[:50]}...")
                 
-                if self.download_paper(paper):
-                    self.config["downloaded_papers"].append(paper['id'])
+                if self.download_paper(paper, queries=paper_queries[paper.id]):
+                    self.record_download(paper, paper_queries[paper.id])
                     successful_downloads += 1
+                    downloaded.append(paper)
+                elif not self.defer_download(paper, paper_queries[paper.id], failed=True):
+                    # 下载失败的论文放入延后队列退避重试（水位线前移后检查不会再选中它），
+                    # 失败次数到上限后才算失败
+                    dropped += 1
+                
+                # 该论文所属查询的论文都处理完了（下载成功或已入队），写入这些查询的水位线
+                for matched in paper_queries[paper.id]:
+                    waiting = pending.get(matched)
+                    if waiting is not None:
+                        waiting.discard(paper.id)
+                        if not waiting:
+                            self.record_event("watermark", query=matched, value=searched_at[matched])
+                            del pending[matched]
+                
+                processed += 1
+                if processed % checkpoint_every == 0:
+                    self.checkpoint()
         
-        # 标记首次运行已完成
-        if self.config.get("first_run", True):
-            self.config["first_run"] = False
+        self.checkpoint()
+        interrupted = self.stop_requested.is_set()
+        if interrupted:
+            print(f"⏸️  已停止：处理了 {processed}/{total_papers} 篇，未完成的 {len(pending)} 个查询下次继续")
+        elif self.in_offpeak():
+            self.drain_download_queue()
+        if not interrupted and self.config.get("storage_quota_mb"):
+            self.enforce_quota()
+        if successful_downloads and self.config.get("extract_text"):
+            self.start_background_extract()
         
-        # 保持全局检查时间兼容性
-        self.config["last_check"] = datetime.now().isoformat()
-        self.save_config()
+        if not interrupted:
+            # 标记首次运行已完成
+            if self.config.get("first_run", True):
+                self.record_event("set", key="first_run", value=False)
+            
+            # 保持全局检查时间兼容性
+            self.record_event("set", key="last_check", value=datetime.now().isoformat())
+        self.persist_state()
         
         # 发送通知
         if successful_downloads > 0:
             message = f"成功下载了 {successful_downloads} 篇新论文!"
-            self.send_notification("arXiv论文更新", message)
+            self.send_notification(f"arXiv论文更新 - {self.profile_name}" if self.profile_name else "arXiv论文更新",
+                                   message)
             self.logger.info(message)
             
             # 打印论文信息
@@ -460,22 +1091,666 @@ class ArxivMonitor:
             print("="*60)
             
             for query, papers in papers_by_query.items():
-                downloaded_papers = [p for p in papers if p['id'] in self.config["downloaded_papers"]]
+                downloaded_papers = [p for p in papers if p.id in self.downloaded_ids]
                 if downloaded_papers:
                     folder_name = self.get_folder_name_for_query(query)
                     print(f"\n📁 {folder_name} ({len(downloaded_papers)} 篇)")
                     print("-" * 40)
                     
                     for paper in downloaded_papers:
-                        print(f"📄 {paper['title']}")
-                        print(f"🆔 {paper['id']}")
-                        print(f"👥 {', '.join(paper['authors'][:2])}" + 
-                              (f" 等 {len(paper['authors'])} 人" if len(paper['authors']) > 2 else ""))
-                        print(f"📅 {paper['published'].strftime('%Y-%m-%d')}")
+                        print(f"📄 {paper.title}")
+                        print(f"🆔 {paper.id}")
+                        print(f"👥 {', '.join(paper.authors[:2])}" + 
+                              (f" 等 {len(paper.authors)} 人" if len(paper.authors) > 2 else ""))
+                        print(f"📅 {paper.published.strftime('%Y-%m-%d')}")
                         print()
         else:
             self.logger.info("没有找到新论文")
             print("ℹ️  没有找到新论文")
+        
+        return {
+            "new_papers": total_papers + deferred + len(skipped) + (
+                len(near_duplicates) if self.config.get("near_duplicate_action", "flag") == "skip" else 0),
+            "downloaded": [p.to_dict() for p in downloaded],
+            "deferred": deferred,
+            "skipped_irrelevant": [p.id for p in skipped],
+            "near_duplicates": near_duplicates,
+            "retry_queued": processed - successful_downloads - dropped,
+            "failed_downloads": dropped,
+            "failed_queries": list(self.failed_queries),
+            "interrupted": interrupted
+        }
+    
+    def backfill(self, query, max_results=100, page_size=100, now=False):
+        """
+        回填某个查询的历史论文（忽略检查时间，只跳过已下载的论文）
+        
+        回填属于批量下载，不在空闲时段时只把论文放入延后下载队列。
+        
+        Args:
+            query: 搜索查询
+            max_results: 最多回看的论文数
+            page_size: 每次API请求的论文数
+            now: 是否不管时段立即下载
+            
+        Returns:
+            回填结果摘要
+        """
+        self.logger.info("开始回填查询: %s (最多 %s 篇)", query, max_results)
+        self.create_download_directory()
+        self.failed_queries = []
+        
+        downloaded = []
+        candidates = 0
+        failed = 0
+        deferred = 0
+        immediate = now or self.in_offpeak()
+        
+        for start in range(0, max_results, page_size):
+            if start > 0:
+                time.sleep(3)  # arXiv API要求分页请求之间间隔3秒
+            papers = self.search_papers(query, min(page_size, max_results - start), start=start)
+            if not papers:
+                break
+            
+            for paper in papers:
+                if self.stop_requested.is_set():
+                    break
+                if paper.id in self.downloaded_ids:
+                    continue
+                candidates += 1
+                if not immediate:
+                    self.defer_download(paper, [query], kind="backfill")
+                    deferred += 1
+                    continue
+                print(f"📥 回填: {paper.title[:50]}...")
+                if self.download_paper(paper):
+                    self.record_download(paper)
+                    downloaded.append(paper)
+                else:
+                    failed += 1
+            
+            self.checkpoint()
+            if len(papers) < page_size or self.stop_requested.is_set():
+                break
+        
+        self.paper_store.commit()
+        self.persist_state()
+        self.logger.info("回填完成: 下载 %s 篇，延后 %s 篇，失败 %s 篇", len(downloaded), deferred, failed)
+        
+        return {
+            "query": query,
+            "new_papers": candidates,
+            "downloaded": [p.to_dict() for p in downloaded],
+            "deferred": deferred,
+            "failed_downloads": failed,
+            "failed_queries": list(self.failed_queries)
+        }
+    
+    def in_offpeak(self):
+        """当前是否处于允许批量下载的空闲时段（未配置 offpeak_windows 时总是）"""
+        return in_windows(self.config.get("offpeak_windows"))
+    
+    def defer_download(self, paper, queries, kind="new", failed=False):
+        """
+        把论文放入延后下载队列（持久化在论文数据库中，重启后不丢失）
+        
+        Args:
+            failed: 是否因为下载失败而入队。失败的论文按 download_retry_minutes
+                    翻倍退避后重试，累计失败 download_max_attempts 次后移出队列
+            
+        Returns:
+            论文是否留在队列中
+        """
+        priority = max((self.config.get("query_priority", {}).get(q, 0) for q in queries if q), default=0)
+        self.paper_store.enqueue(paper, queries, priority, kind)
+        if not failed:
+            return True
+        attempts = self.paper_store.record_attempt(paper.id, int(time.time()),
+                                                   self.config.get("download_retry_minutes", 30) * 60)
+        if attempts >= self.config.get("download_max_attempts", 5):
+            self.paper_store.dequeue(paper.id)
+            self.logger.warning("论文 %s 已下载失败 %s 次，不再重试", paper.id, attempts)
+            return False
+        return True
+    
+    def drain_download_queue(self, force=False, limit=None):
+        """
+        按优先级下载延后队列中的论文
+        
+        Args:
+            force: 是否不管时段立即下载
+            limit: 本次最多下载的论文数
+            
+        Returns:
+            下载结果摘要
+        """
+        downloaded = []
+        failed = 0
+        if not force and not self.in_offpeak():
+            return {"downloaded": downloaded, "failed_downloads": failed,
+                    "remaining": self.paper_store.queue_size()}
+        
+        queued = self.paper_store.queued(limit, due_ts=int(time.time()))
+        if queued:
+            print(f"\n⏳ 开始下载延后队列中的 {len(queued)} 篇论文...")
+        for paper, queries, kind in queued:
+            # 窗口可能在下载过程中结束
+            if self.stop_requested.is_set() or (not force and not self.in_offpeak()):
+                break
+            if paper.id in self.downloaded_ids:
+                for query in queries:
+                    self.add_paper_query(paper, query)
+                self.paper_store.dequeue(paper.id)
+                continue
+            print(f"📥 {'回填' if kind == 'backfill' else '延后下载'}: {paper.title[:50]}...")
+            if self.download_paper(paper, queries=queries):
+                self.record_download(paper, queries)
+                self.paper_store.dequeue(paper.id)
+                downloaded.append(paper)
+            elif not self.defer_download(paper, queries, kind, failed=True):
+                failed += 1
+            self.paper_store.commit()
+        
+        self.persist_state()
+        return {
+            "downloaded": [p.to_dict() for p in downloaded],
+            "failed_downloads": failed,
+            "remaining": self.paper_store.queue_size()
+        }
+    
+    def reconcile_storage_index(self):
+        """全量扫描下载目录，修复存储统计索引的偏差"""
+        drift = self.storage_index.reconcile()
+        if drift:
+            self.logger.info("存储统计索引已校准，修正了 %s 个文件夹", drift)
+        return drift
+    
+    def storage_used(self):
+        """按配额计算的占用字节数：在库的PDF对象加上压缩归档"""
+        return self.storage_index.totals()[1] + self.storage_index.archive_totals()[1]
+    
+    def eviction_order(self, keep_before, record_reads=True):
+        """
+        按淘汰顺序给出在库的论文
+        
+        默认最久没访问的优先；storage_eviction_policy 为 "relevance" 且装有 numpy 时
+        与兴趣画像最不相关的优先。每篇候选只 stat 自己的对象文件：读取时间
+        在保留期内的（用户打开过）跳过，record_reads 为True时把访问时间记入论文库。
+        
+        Args:
+            keep_before: 访问时间晚于此值（UNIX秒）的论文不淘汰
+            record_reads: 是否记下检测到的读取时间（演练时不写论文库）
+            
+        Yields:
+            (论文ID, sha256, 字节数)
+        """
+        from relevance import RelevanceProfile, paper_text, ranking_available
+        
+        def recently_read(paper_id, sha256, last_access):
+            try:
+                read_ts = int(os.stat(self.pdf_store.object_path(sha256)).st_atime)
+            except OSError:
+                return False
+            if read_ts > last_access and read_ts >= keep_before:
+                if record_reads:
+                    self.paper_store.touch(paper_id, read_ts)
+                return True
+            return False
+        
+        candidates = self.paper_store.eviction_candidates(keep_before)
+        if self.config.get("storage_eviction_policy") == "relevance":
+            kept = self.paper_store.kept_texts(self.config.get("relevance_profile_size", 2000))
+            if not ranking_available():
+                self.logger.warning("未安装 numpy，按最久未访问的顺序淘汰（pip install numpy）")
+            elif len(kept) >= self.config.get("relevance_min_profile", 20):
+                profile = RelevanceProfile([paper_text(title, summary) for title, summary in kept])
+                rows = list(candidates)
+                scores = []
+                for start in range(0, len(rows), 1000):
+                    scores.extend(profile.score([
+                        paper_text(title, zlib.decompress(summary_z).decode('utf-8') if summary_z else None)
+                        for _, _, _, _, title, summary_z in rows[start:start + 1000]
+                    ]))
+                order = sorted(range(len(rows)), key=lambda i: (scores[i], rows[i][3]))
+                candidates = [rows[i] for i in order]
+        
+        for paper_id, sha256, size, last_access, _, _ in candidates:
+            if not recently_read(paper_id, sha256, last_access):
+                yield paper_id, sha256, size
+    
+    def evict_paper(self, paper_id, sha256, size, archive=False):
+        """
+        删除论文在各文件夹中的PDF，元数据和下载链接保留，可以用 restore 恢复
+        
+        对象文件没有其他论文（或其他配置）引用时才删除；archive 为True时
+        先压缩成归档，压缩不划算的直接删除。
+        
+        Returns:
+            (层级 "archived"/"evicted", 释放的字节数)
+        """
+        paper = self.paper_store.get(paper_id)
+        if paper is not None:
+            for view in self.view_paths(paper, self.paper_store.queries(paper_id) or [paper.query]):
+                if self.pdf_store.unlink_view(view, sha256):
+                    self.storage_index.record_remove(view, size)
+        
+        tier = "evicted"
+        freed = 0
+        self.paper_store.set_tier(paper_id, tier)
+        if self.pdf_store.has(sha256) and not self.object_in_use(sha256):
+            if archive:
+                archived = self.pdf_store.archive(sha256)
+                if archived is not None:
+                    tier = "archived"
+                    self.storage_index.record_archive(archived)
+                    freed -= archived
+            self.pdf_store.remove(sha256)
+            self.storage_index.record_object(size, -1)
+            freed += size
+        elif archive and self.pdf_store.has_archive(sha256):
+            tier = "archived"
+        if tier != "evicted":
+            self.paper_store.set_tier(paper_id, tier)
+        return tier, freed
+    
+    def enforce_quota(self, dry_run=False):
+        """
+        占用超过 storage_quota_mb 时淘汰冷论文，直到降到配额的 storage_target_ratio
+        
+        用存储索引里增量维护的字节数判断占用，按论文库记录的大小逐篇淘汰，
+        不遍历下载目录。storage_keep_days 天内下载或读取过的论文不淘汰。
+        storage_cold_action 为 "archive" 时先压缩归档，在库的论文都处理完
+        仍超出时再删除最久的归档。
+        
+        Args:
+            dry_run: 只列出会被淘汰的论文，不写论文库、状态和存储索引
+            
+        Returns:
+            淘汰结果摘要
+        """
+        quota = int(self.config.get("storage_quota_mb", 0) * 1024 * 1024)
+        used = self.storage_used()
+        result = {"quota_bytes": quota, "used_bytes": used, "archived": [], "evicted": [], "freed_bytes": 0,
+                  "dry_run": dry_run}
+        if not quota or used <= quota:
+            return result
+        
+        target = quota * self.config.get("storage_target_ratio", 0.9)
+        keep_before = int(time.time() - self.config.get("storage_keep_days", 7) * 86400)
+        archive = self.config.get("storage_cold_action") == "archive"
+        print(f"🧹 存储占用 {used/1024/1024:.1f} MB，超过配额 {quota/1024/1024:.0f} MB，开始淘汰冷论文...")
+        
+        for i, (paper_id, sha256, size) in enumerate(self.eviction_order(keep_before, not dry_run), 1):
+            if used <= target or self.stop_requested.is_set():
+                break
+            if dry_run:
+                tier, freed = ("archived" if archive else "evicted"), size
+            else:
+                tier, freed = self.evict_paper(paper_id, sha256, size, archive)
+            result[tier].append(paper_id)
+            used -= freed
+            result["freed_bytes"] += freed
+            if i % 100 == 0 and not dry_run:
+                self.checkpoint()
+        
+        if archive and used > target and not dry_run:
+            # 归档本身也超出配额：从最久没访问的归档开始删除
+            for paper_id, sha256, _, _, _, _ in self.paper_store.eviction_candidates(keep_before, "archived"):
+                if used <= target or self.stop_requested.is_set():
+                    break
+                self.paper_store.set_tier(paper_id, "evicted")
+                if not self.paper_store.sha_references(sha256, "archived"):
+                    removed = self.pdf_store.remove_archive(sha256)
+                    if removed:
+                        self.storage_index.record_archive(removed, -1)
+                        used -= removed
+                        result["freed_bytes"] += removed
+                result["evicted"].append(paper_id)
+        
+        if not dry_run:
+            self.checkpoint()
+            self.storage_index.save()
+        result["used_bytes"] = used
+        if used > quota:
+            self.logger.warning("淘汰后存储占用仍超过配额: %.1f MB", used / 1024 / 1024)
+        self.logger.info("存储配额: 归档 %s 篇，淘汰 %s 篇，释放 %.1f MB", len(result["archived"]),
+                         len(result["evicted"]), result["freed_bytes"] / 1024 / 1024)
+        print(f"🧹 归档 {len(result['archived'])} 篇，淘汰 {len(result['evicted'])} 篇，"
+              f"释放 {result['freed_bytes']/1024/1024:.1f} MB")
+        return result
+    
+    def restore_paper(self, paper_id):
+        """
+        恢复被淘汰或归档的论文：有归档就解压，否则按保存的链接重新下载
+        
+        Returns:
+            恢复成功返回True
+        """
+        paper = self.paper_store.get(paper_id)
+        if paper is None or not paper.title:
+            print(f"❌ 论文库中没有 {paper_id}")
+            return False
+        stored = self.paper_store.get_file(paper_id)
+        if stored and not self.pdf_store.has(stored[0]):
+            archived = self.pdf_store.restore(stored[0])
+            if archived is not None:
+                self.storage_index.record_archive(archived, -1)
+                self.storage_index.record_object(stored[1])
+        queries = self.paper_store.queries(paper_id) or [paper.query]
+        if not self.download_paper(paper, queries=queries):
+            return False
+        stored = self.paper_store.get_file(paper_id)
+        self.paper_store.set_file(paper_id, stored[0], stored[1])
+        self.paper_store.commit()
+        self.storage_index.save()
+        return True
+    
+    def check_for_updates(self, batch_size=300):
+        """
+        检查已下载论文是否有新版本，只重新下载版本号变化的论文
+        
+        用 id_list 批量查询，每个请求覆盖 batch_size 篇论文；数据库中
+        还没有版本记录的论文（旧版本程序下载的）只记录当前版本，不重新下载。
+        从未检查过和上次检查最早的论文排在前面，检查中途停止后，下次先
+        检查上次没轮到的论文。
+        
+        Args:
+            batch_size: 每次API请求查询的论文数
+            
+        Returns:
+            版本检查结果摘要
+        """
+        self.logger.info("开始检查论文新版本...")
+        self.failed_queries = []
+        
+        paper_ids = list(self.downloaded_ids)
+        checked = self.paper_store.version_checked(paper_ids)
+        paper_ids.sort(key=lambda paper_id: checked.get(paper_id, 0))
+        known_versions = self.paper_store.versions(paper_ids)
+        updated = []
+        failed = 0
+        
+        for start in range(0, len(paper_ids), batch_size):
+            if self.stop_requested.is_set():
+                break
+            if start > 0:
+                time.sleep(3)  # arXiv API要求请求之间间隔3秒
+            batch = paper_ids[start:start + batch_size]
+            params = {'id_list': ','.join(batch), 'max_results': len(batch)}
+            papers = self.fetch_papers(params, None, f"id_list ({start + 1}-{start + len(batch)})")
+            
+            for paper in papers:
+                known = known_versions.get(paper.id)
+                if known is not None and paper.version > known and self.paper_store.tier(paper.id):
+                    # 已淘汰或归档的论文不重新下载，恢复后的下一次版本检查再更新
+                    continue
+                if known is None or paper.version <= known:
+                    # 首次记录版本，或版本没有变化
+                    self.paper_store.upsert(paper)
+                    continue
+                
+                stored = self.paper_store.get(paper.id)
+                paper.query = stored.query
+                print(f"🔁 新版本 v{known} → v{paper.version}: {paper.title[:50]}...")
+                queries = self.paper_store.queries(paper.id) or [paper.query]
+                if self.download_paper(paper, replace=True, queries=queries):
+                    self.paper_store.upsert(paper)
+                    updated.append(paper)
+                else:
+                    failed += 1
+            
+            self.paper_store.mark_version_checked(batch, int(time.time()))
+            self.paper_store.commit()
+        
+        self.record_event("set", key="last_version_check", value=datetime.now().isoformat())
+        self.persist_state()
+        self.logger.info("版本检查完成: 检查 %s 篇，更新 %s 篇", len(paper_ids), len(updated))
+        
+        return {
+            "checked": len(paper_ids),
+            "updated": [p.to_dict() for p in updated],
+            "failed_downloads": failed,
+            "failed_queries": list(self.failed_queries)
+        }
+    
+    def verify_library(self):
+        """
+        校验对象库中每篇论文PDF的完整性（%%EOF 结尾和 SHA-256）
+        
+        在进程池中并行校验，最久没校验过的先校验，读盘速度受
+        verify_io_mb_per_sec 限制；有问题的论文在数据库中标记为损坏，
+        由 repair_damaged() 重新下载。
+        
+        Returns:
+            校验结果摘要
+        """
+        from pdf_verify import verify_files
+        
+        self.logger.info("开始校验PDF完整性...")
+        tasks = (
+            (paper_id, self.pdf_store.object_path(sha256), sha256, size)
+            for paper_id, sha256, size in self.paper_store.files_to_verify()
+        )
+        budget = self.config.get("verify_io_mb_per_sec")
+        damaged = []
+        
+        def on_result(paper_id, problem):
+            self.paper_store.mark_verified(paper_id, int(time.time()), problem)
+            if problem:
+                damaged.append({"id": paper_id, "problem": problem})
+                self.logger.warning("PDF损坏 %s: %s", paper_id, problem)
+        
+        checked, _, read_bytes = verify_files(
+            tasks,
+            workers=self.config.get("verify_workers") or None,
+            io_bytes_per_sec=budget * 1024 * 1024 if budget else None,
+            on_result=on_result,
+            stop=self.stop_requested
+        )
+        self.paper_store.commit()
+        if self.stop_requested.is_set():
+            self.logger.info("完整性校验已中断: 校验了 %s 篇，其余下次继续", checked)
+        else:
+            self.logger.info("完整性校验完成: 校验 %s 篇，损坏 %s 篇", checked, len(damaged))
+        
+        return {
+            "checked": checked,
+            "bytes_read": read_bytes,
+            "damaged": damaged
+        }
+    
+    def repair_damaged(self):
+        """
+        重新下载被标记为损坏的论文PDF
+        
+        Returns:
+            修复结果摘要
+        """
+        from pdf_verify import verify_file
+        
+        repaired = []
+        failed = []
+        for paper_id, problem in self.paper_store.damaged():
+            paper = self.paper_store.get(paper_id)
+            stored = self.paper_store.get_file(paper_id)
+            if paper is None or stored is None:
+                self.paper_store.mark_verified(paper_id, int(time.time()))
+                continue
+            
+            sha256, size = stored
+            # 同一对象可能被多篇论文引用，先前的修复已经换好了文件
+            if verify_file((paper_id, self.pdf_store.object_path(sha256), sha256, size))[1] is None:
+                self.paper_store.mark_verified(paper_id, int(time.time()))
+                continue
+            
+            print(f"🩹 重新下载损坏的PDF ({problem}): {paper.title[:50]}...")
+            if self.pdf_store.has(sha256):
+                self.pdf_store.remove(sha256)
+                self.storage_index.record_object(size, -1)
+            queries = self.paper_store.queries(paper_id) or [paper.query]
+            if self.download_paper(paper, replace=True, queries=queries):
+                self.paper_store.mark_verified(paper_id, int(time.time()))
+                repaired.append(paper_id)
+            else:
+                failed.append(paper_id)
+        
+        self.paper_store.commit()
+        self.persist_state()
+        return {"repaired": repaired, "failed": failed}
+    
+    def start_background_verify(self):
+        """在后台线程中校验PDF完整性（上一轮还没结束时跳过）"""
+        if self.verify_thread is not None and self.verify_thread.is_alive():
+            return
+        self.verify_thread = threading.Thread(target=self.verify_library, name="pdf-verify", daemon=True)
+        self.verify_thread.start()
+    
+    def repair_after_verify(self):
+        """后台校验结束后，在主线程中重新下载损坏的论文"""
+        if self.verify_thread is not None and self.verify_thread.is_alive():
+            return
+        if self.paper_store.damaged():
+            self.repair_damaged()
+    
+    def extract_library(self):
+        """
+        提取还没有文本的PDF的全文，压缩后存入论文数据库
+        
+        按对象哈希增量处理：已经提取过（包括提取失败）的PDF不会再处理，
+        中途退出后再次运行会从剩下的文件继续。
+        
+        Returns:
+            提取结果摘要
+        """
+        from text_extract import extraction_available, extract_texts
+        
+        if not extraction_available():
+            self.logger.warning("未安装 pypdf，跳过文本提取（pip install pypdf）")
+            return {"available": False, "extracted": 0, "failed": 0}
+        
+        self.logger.info("开始提取PDF文本...")
+        tasks = (
+            (sha256, self.pdf_store.object_path(sha256))
+            for sha256 in self.paper_store.files_without_text()
+            if self.pdf_store.has(sha256)
+        )
+        
+        def on_result(sha256, text_z, error):
+            self.paper_store.set_text(sha256, text_z, error)
+            if error:
+                self.logger.warning("提取文本失败 %s: %s", sha256[:12], error)
+        
+        processed, failed = extract_texts(tasks, self.config.get("extract_workers") or None, on_result,
+                                          self.stop_requested)
+        self.paper_store.commit()
+        if self.stop_requested.is_set():
+            self.logger.info("文本提取已中断: 处理了 %s 个PDF，其余下次继续", processed)
+        else:
+            self.logger.info("文本提取完成: 处理 %s 个PDF，失败 %s 个", processed, failed)
+        
+        return {"available": True, "extracted": processed - failed, "failed": failed}
+    
+    def start_background_extract(self):
+        """在后台线程中提取新PDF的文本，不阻塞下载（上一轮还没结束时跳过）"""
+        if self.extract_thread is not None and self.extract_thread.is_alive():
+            return
+        self.extract_thread = threading.Thread(target=self.extract_library, name="text-extract", daemon=True)
+        self.extract_thread.start()
+    
+    def get_statistics(self, reconcile=False):
+        """
+        收集统计信息
+        
+        文件夹统计来自增量维护的存储索引；索引缺失、超过
+        storage_reconcile_hours 未校准或显式要求时才全量扫描一次。
+        
+        Args:
+            reconcile: 是否强制全量扫描校准索引
+            
+        Returns:
+            统计信息字典（配置概况、各查询检查时间、各文件夹文件数与大小）
+        """
+        download_path = self.config['download_path']
+        
+        if os.path.exists(download_path) and (
+                reconcile or self.storage_index.needs_reconcile(self.config.get("storage_reconcile_hours"))):
+            self.reconcile_storage_index()
+        
+        folders = {
+            ('根目录' if key == StorageIndex.ROOT_KEY else key): dict(entry)
+            for key, entry in sorted(self.storage_index.folders.items())
+        }
+        total_files, total_size = self.storage_index.totals()
+        archive_files, archive_size = self.storage_index.archive_totals()
+        tiers = self.paper_store.tier_counts()
+        texts, text_failures = self.paper_store.text_counts()
+        
+        return {
+            "search_queries": len(self.config['search_queries']),
+            "downloaded_papers": len(self.downloaded_ids),
+            "stored_papers": self.paper_store.count(),
+            "download_path": download_path,
+            "check_interval_hours": self.config['check_interval_hours'],
+            "first_run": self.config.get('first_run', True),
+            "organize_by_query": self.config.get('organize_by_query', True),
+            "query_last_check": {q: self.config["query_last_check"].get(q) for q in self.config['search_queries']},
+            "last_check": self.config['last_check'],
+            "folders": folders,
+            "total_files": total_files,
+            "total_bytes": total_size,
+            "archived_papers": tiers["archived"],
+            "archive_bytes": archive_size,
+            "evicted_papers": tiers["evicted"],
+            "extracted_texts": texts,
+            "text_failures": text_failures,
+            "quota_bytes": int(self.config.get("storage_quota_mb", 0) * 1024 * 1024)
+        }
+    
+    def show_statistics(self, reconcile=False):
+        """显示统计信息"""
+        stats = self.get_statistics(reconcile)
+        
+        print(f"\n📊 统计信息:")
+        print(f"   • 搜索主题数量: {stats['search_queries']}")
+        print(f"   • 已下载论文数: {stats['downloaded_papers']}（论文库中 {stats['stored_papers']} 篇）")
+        print(f"   • 下载路径: {stats['download_path']}")
+        print(f"   • 检查间隔: {stats['check_interval_hours']} 小时")
+        print(f"   • 首次运行: {'是' if stats['first_run'] else '否'}")
+        print(f"   • 文件夹组织: {'启用' if stats['organize_by_query'] else '禁用'}")
+        
+        # 显示各查询的检查时间
+        print(f"\n📅 各查询检查时间:")
+        for query, last_check in stats['query_last_check'].items():
+            if last_check:
+                try:
+                    last_check = datetime.fromisoformat(last_check).strftime('%Y-%m-%d %H:%M')
+                except:
+                    last_check = "时间格式错误"
+            else:
+                last_check = "从未检查"
+            print(f"   • {query}: {last_check}")
+        
+        if stats['last_check']:
+            print(f"\n   • 全局上次检查: {stats['last_check'][:19]}")
+        else:
+            print(f"\n   • 全局上次检查: 从未检查")
+        
+        # 显示各文件夹统计
+        if os.path.exists(stats['download_path']):
+            print(f"\n📁 文件夹统计:")
+            for folder_name, folder in stats['folders'].items():
+                print(f"   📂 {folder_name}: {folder['files']} 个文件, {folder['bytes']/1024/1024:.1f} MB")
+            
+            print(f"\n   🎯 总计: {stats['total_files']} 个PDF文件, {stats['total_bytes']/1024/1024:.1f} MB")
+            if stats['archived_papers'] or stats['evicted_papers']:
+                print(f"   🧊 已归档 {stats['archived_papers']} 篇 ({stats['archive_bytes']/1024/1024:.1f} MB), "
+                      f"已淘汰 {stats['evicted_papers']} 篇（可用 restore 恢复）")
+            if stats['quota_bytes']:
+                used = stats['total_bytes'] + stats['archive_bytes']
+                print(f"   💾 配额: {used/1024/1024:.1f} / {stats['quota_bytes']/1024/1024:.0f} MB")
+            if stats['extracted_texts'] or stats['text_failures']:
+                print(f"   📝 全文: 已提取 {stats['extracted_texts']} 个PDF，失败 {stats['text_failures']} 个")
     
     def toggle_organize_by_query(self):
         """切换是否按查询组织文件夹"""
@@ -485,10 +1760,14 @@ class ArxivMonitor:
         
         status = "启用" if self.config["organize_by_query"] else "禁用"
         print(f"✅ 已{status}按搜索词组织文件夹功能")
+        
+        # 已有论文按新结构重建链接
+        papers, linked = self.rebuild_views(current)
+        print(f"🔗 已按新结构重建 {papers} 篇论文的目录视图（新建 {linked} 个链接）")
     
     def reset_downloaded_papers(self):
         """重置下载记录"""
-        self.config["downloaded_papers"] = []
+        self.downloaded_ids.clear()
         self.config["last_check"] = None
         self.config["query_last_check"] = {}  # 重置所有查询的检查时间
         self.config["first_run"] = True
@@ -496,52 +1775,110 @@ class ArxivMonitor:
         print("✅ 已重置下载记录，下次检查时将重新下载论文")
     
     def add_search_query(self, query):
-        """添加搜索查询"""
+        """添加搜索查询，返回是否确实新增"""
         if query not in self.config["search_queries"]:
-            self.config["search_queries"].append(query)
-            self.save_config()
-            self.logger.info(f"添加搜索查询: {query}")
+            self.record_event("query_add", query=query)
+            self.logger.info("添加搜索查询: %s", query)
+            return True
+        return False
     
     def remove_search_query(self, query):
         """移除搜索查询"""
         if query in self.config["search_queries"]:
-            self.config["search_queries"].remove(query)
             # 同时删除该查询的检查时间记录
-            if query in self.config["query_last_check"]:
-                del self.config["query_last_check"][query]
-            self.save_config()
-            self.logger.info(f"移除搜索查询: {query}")
+            self.record_event("query_remove", query=query)
+            self.logger.info("移除搜索查询: %s", query)
+            return True
+        return False
     
-    def start_monitoring(self):
-        """开始监控"""
+    def start_api(self, port=None):
+        """
+        启动论文库的只读HTTP接口
+        
+        Args:
+            port: 监听端口，None时使用配置中的 api_port（为0时不启动）
+            
+        Returns:
+            PaperApi 实例，未启动时返回None
+        """
+        from http_api import PaperApi
+        
+        port = self.config.get("api_port", 0) if port is None else port
+        if not port:
+            return None
+        try:
+            api = PaperApi(self.paper_store, self.config.get("api_host", "127.0.0.1"), port,
+                           folder_for=self.get_folder_name_for_query)
+        except OSError as e:
+            self.logger.error("HTTP接口启动失败: %s", e)
+            print(f"⚠️  HTTP接口启动失败: {e}")
+            return None
+        api.start()
+        host, port = api.address
+        self.logger.info("HTTP接口已启动: http://%s:%s/", host, port)
+        print(f"🌐 HTTP接口: http://{host}:{port}/papers")
+        return api
+    
+    def start_monitoring(self, api_port=None):
+        """
+        开始监控（Ctrl+C / SIGTERM 时完成当前下载、保存进度后退出）
+        
+        Args:
+            api_port: HTTP接口端口，None时使用配置中的 api_port
+        """
+        import signal
+        import schedule
+        
         self.logger.info("开始arXiv论文监控...")
         print("🚀 启动arXiv论文监控器...")
         
+        api = self.start_api(api_port)
+        self.stop_requested.clear()
+        previous_handlers = {sig: signal.signal(sig, self.request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            self.run_monitoring(schedule)
+        except KeyboardInterrupt:
+            # 第二次 Ctrl+C：放弃当前下载，已写入的进度仍然有效
+            self.checkpoint()
+        finally:
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+            schedule.clear()
+            self.stop_background()
+            self.stop_requested.clear()
+            if api is not None:
+                api.stop()
+        self.logger.info("监控已停止")
+        print("\n🛑 监控已停止")
+    
+    def run_monitoring(self, schedule):
+        """监控主循环，直到收到停止请求"""
         # 立即执行一次检查
         self.check_for_new_papers()
         
         # 设置定期检查
         schedule.every(self.config["check_interval_hours"]).hours.do(self.check_for_new_papers)
+        if self.config.get("version_check_interval_hours"):
+            schedule.every(self.config["version_check_interval_hours"]).hours.do(self.check_for_updates)
+        if self.config.get("verify_interval_hours"):
+            schedule.every(self.config["verify_interval_hours"]).hours.do(self.start_background_verify)
+            schedule.every(1).hours.do(self.repair_after_verify)
+        if self.config.get("offpeak_windows"):
+            schedule.every(15).minutes.do(self.drain_download_queue)
         
         print(f"⏰ 监控已启动，每 {self.config['check_interval_hours']} 小时检查一次")
         print("💡 按 Ctrl+C 停止监控")
         
-        try:
-            while True:
-                schedule.run_pending()
-                time.sleep(60)  # 每分钟检查一次是否有待执行的任务
-        except KeyboardInterrupt:
-            self.logger.info("监控已停止")
-            print("\n🛑 监控已停止")
+        while not self.stop_requested.is_set():
+            schedule.run_pending()
+            self.stop_requested.wait(60)  # 每分钟检查一次是否有待执行的任务
 
-def main():
-    """主函数"""
+def interactive_menu(monitor):
+    """交互式菜单"""
     print("="*60)
     print("📚 arXiv论文监控器 v2.1 - 智能文件夹管理版")
     print("="*60)
     
-    monitor = ArxivMonitor()
-    
     while True:
         print("\n🎯 请选择操作:")
         print("1. 🚀 开始监控")
@@ -555,9 +1892,11 @@ def main():
         print("9. 🔄 重置下载记录")
         print("A. 📚 查看arXiv分类目录")
         print("B. 📁 切换文件夹组织方式")
+        print("C. 🔁 检查论文新版本")
+        print("D. 🩺 校验PDF完整性并修复")
         print("0. 🚪 退出")
         
-        choice = input("\n请输入选择 (0-9, A-B): ").strip().upper()
+        choice = input("\n请输入选择 (0-9, A-D): ").strip().upper()
         
         if choice == '1':
             monitor.start_monitoring()
@@ -622,11 +1961,8 @@ def main():
             try:
                 index = int(input("\n请输入要删除的主题编号: ")) - 1
                 if 0 <= index < len(monitor.config["search_queries"]):
-                    removed_query = monitor.config["search_queries"].pop(index)
-                    # 删除对应的检查时间记录
-                    if removed_query in monitor.config["query_last_check"]:
-                        del monitor.config["query_last_check"][removed_query]
-                    monitor.save_config()
+                    removed_query = monitor.config["search_queries"][index]
+                    monitor.remove_search_query(removed_query)
                     print(f"✅ 已删除搜索主题: {removed_query}")
                 else:
                     print("❌ 无效的编号")
@@ -647,46 +1983,7 @@ def main():
                 print("❌ 请输入有效的数字")
         
         elif choice == '7':
-            print(f"\n📊 统计信息:")
-            print(f"   • 搜索主题数量: {len(monitor.config['search_queries'])}")
-            print(f"   • 已下载论文数: {len(monitor.config['downloaded_papers'])}")
-            print(f"   • 下载路径: {monitor.config['download_path']}")
-            print(f"   • 检查间隔: {monitor.config['check_interval_hours']} 小时")
-            print(f"   • 首次运行: {'是' if monitor.config.get('first_run', True) else '否'}")
-            print(f"   • 文件夹组织: {'启用' if monitor.config.get('organize_by_query', True) else '禁用'}")
-            
-            # 显示各查询的检查时间
-            print(f"\n📅 各查询检查时间:")
-            for query in monitor.config['search_queries']:
-                last_check = monitor.config["query_last_check"].get(query, "从未检查")
-                if last_check != "从未检查":
-                    try:
-                        last_check = datetime.fromisoformat(last_check).strftime('%Y-%m-%d %H:%M')
-                    except:
-                        last_check = "时间格式错误"
-                print(f"   • {query}: {last_check}")
-            
-            if monitor.config['last_check']:
-                print(f"\n   • 全局上次检查: {monitor.config['last_check'][:19]}")
-            else:
-                print(f"\n   • 全局上次检查: 从未检查")
-            
-            # 显示各文件夹统计
-            if os.path.exists(monitor.config['download_path']):
-                print(f"\n📁 文件夹统计:")
-                total_size = 0
-                total_files = 0
-                
-                for root, dirs, files in os.walk(monitor.config['download_path']):
-                    pdf_files = [f for f in files if f.endswith('.pdf')]
-                    if pdf_files:
-                        folder_size = sum(os.path.getsize(os.path.join(root, f)) for f in pdf_files)
-                        folder_name = os.path.basename(root) if root != monitor.config['download_path'] else '根目录'
-                        print(f"   📂 {folder_name}: {len(pdf_files)} 个文件, {folder_size/1024/1024:.1f} MB")
-                        total_size += folder_size
-                        total_files += len(pdf_files)
-                
-                print(f"\n   🎯 总计: {total_files} 个PDF文件, {total_size/1024/1024:.1f} MB")
+            monitor.show_statistics()
         
         elif choice == '8':
             monitor.test_arxiv_connection()
@@ -714,6 +2011,17 @@ def main():
             else:
                 print("❌ 操作已取消")
         
+        elif choice == 'C':
+            result = monitor.check_for_updates()
+            print(f"✅ 已检查 {result['checked']} 篇论文，重新下载了 {len(result['updated'])} 篇新版本")
+        
+        elif choice == 'D':
+            result = monitor.verify_library()
+            print(f"✅ 已校验 {result['checked']} 篇论文，发现 {len(result['damaged'])} 篇损坏")
+            if result['damaged']:
+                repaired = monitor.repair_damaged()
+                print(f"🩹 已重新下载 {len(repaired['repaired'])} 篇，失败 {len(repaired['failed'])} 篇")
+        
         elif choice == '0':
             print("👋 再见!")
             break
@@ -721,5 +2029,426 @@ def main():
         else:
             print("❌ 无效的选择，请重新输入")
 
+def build_parser():
+    """构建命令行参数解析器"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog="arxiv-monitor",
+        description="arXiv论文监控器（不带子命令时进入交互式菜单）"
+    )
+    parser.add_argument("--config", default="arxiv_config.json", help="配置文件路径")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    check = subparsers.add_parser("check", help="检查一次新论文并下载")
+    check.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    monitor_cmd = subparsers.add_parser("monitor", help="开始定时监控")
+    monitor_cmd.add_argument("--api-port", type=int, help="同时在此端口提供只读HTTP接口（覆盖配置中的 api_port）")
+    
+    worker = subparsers.add_parser("worker", help="作为工作进程按租约认领并检查一部分查询（可多进程/多主机）")
+    worker.add_argument("worker_id", nargs="?", help="工作进程ID（各进程必须不同）")
+    worker.add_argument("--batch", type=int, default=20, help="每轮最多认领的查询数")
+    worker.add_argument("--lease-seconds", type=int, default=900, help="租约时长（秒）")
+    worker.add_argument("--once", action="store_true", help="只检查一轮后退出")
+    worker.add_argument("--status", action="store_true", help="查看各查询的租约和水位线")
+    worker.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    daemon = subparsers.add_parser("daemon", help="在一个进程里托管多个配置，合并相同查询并共用PDF对象库")
+    daemon.add_argument("profiles", nargs="+", help="各用户的配置文件")
+    daemon.add_argument("--store", default="./shared_objects", help="共享的PDF对象库目录")
+    daemon.add_argument("--once", action="store_true", help="只检查一轮后退出")
+    daemon.add_argument("--json", action="store_true", help="与 --once 一起使用，以JSON格式输出结果")
+    
+    backfill = subparsers.add_parser("backfill", help="回填某个查询的历史论文")
+    backfill.add_argument("query", help="搜索查询")
+    backfill.add_argument("--max-results", type=int, default=100, help="最多回看的论文数")
+    backfill.add_argument("--now", action="store_true", help="不管空闲时段立即下载")
+    backfill.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    update = subparsers.add_parser("update", help="检查已下载论文的新版本并重新下载")
+    update.add_argument("--batch-size", type=int, default=300, help="每次API请求查询的论文数")
+    update.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    scan = subparsers.add_parser("scan", help="扫描下载目录，按文件名中的论文ID建立索引")
+    scan.add_argument("--adopt", action="store_true", help="把磁盘上已有但不在下载记录里的论文记为已下载")
+    scan.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    queue = subparsers.add_parser("queue", help="查看或下载延后下载队列")
+    queue.add_argument("--run", action="store_true", help="在空闲时段内下载队列中的论文")
+    queue.add_argument("--force", action="store_true", help="与 --run 一起使用，不管时段立即下载")
+    queue.add_argument("--limit", type=int, help="最多下载的论文数")
+    queue.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    export = subparsers.add_parser("export", help="导出论文元数据（Parquet 或 gzip JSONL）")
+    export.add_argument("out_dir", help="导出目录")
+    export.add_argument("--format", choices=["auto", "parquet", "jsonl"], default="auto",
+                        help="导出格式，auto 在安装了 pyarrow 时用 Parquet")
+    export.add_argument("--full", action="store_true", help="忽略上次导出的水位线，全量导出")
+    export.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    related = subparsers.add_parser("related", help="在本地文库中查找相似论文（需要 numpy）")
+    related.add_argument("paper_id", help="arXiv ID")
+    related.add_argument("-n", "--top", type=int, default=10, help="返回的篇数")
+    related.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    dedup = subparsers.add_parser("dedup", help="为已下载的论文建立近重复检测索引")
+    dedup.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    extract = subparsers.add_parser("extract", help="提取已下载PDF的全文（需要 pypdf）")
+    extract.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    verify = subparsers.add_parser("verify", help="校验已下载PDF的完整性")
+    verify.add_argument("--repair", action="store_true", help="重新下载损坏的PDF")
+    verify.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    quota = subparsers.add_parser("quota", help="按 storage_quota_mb 淘汰或归档冷论文")
+    quota.add_argument("--dry-run", action="store_true", help="只列出会被淘汰的论文")
+    quota.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    restore = subparsers.add_parser("restore", help="恢复被淘汰或归档的论文（解压归档或重新下载）")
+    restore.add_argument("paper_ids", nargs="+", help="arXiv ID")
+    restore.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    stats = subparsers.add_parser("stats", help="查看统计信息")
+    stats.add_argument("--reconcile", action="store_true", help="先全量扫描下载目录校准存储统计")
+    stats.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    queries = subparsers.add_parser("queries", help="管理搜索主题")
+    queries_sub = queries.add_subparsers(dest="queries_command", required=True)
+    queries_list = queries_sub.add_parser("list", help="列出搜索主题")
+    queries_list.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    for name, help_text in (("add", "添加搜索主题"), ("remove", "删除搜索主题")):
+        sub = queries_sub.add_parser(name, help=help_text)
+        sub.add_argument("query", help="搜索查询")
+        sub.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    
+    return parser
+
+def emit_json(data):
+    """向标准输出写出JSON结果"""
+    sys.stdout.write(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+
+def run_command(monitor, args):
+    """
+    执行命令行子命令
+    
+    Args:
+        monitor: ArxivMonitor实例
+        args: 解析后的命令行参数
+        
+    Returns:
+        进程退出码
+    """
+    import contextlib
+    
+    as_json = getattr(args, "json", False)
+    # JSON模式下把进度输出转到stderr，保证stdout只有JSON
+    progress_out = contextlib.redirect_stdout(sys.stderr) if as_json else contextlib.nullcontext()
+    
+    if args.command == "check":
+        with progress_out:
+            result = monitor.check_for_new_papers()
+        if as_json:
+            emit_json(result)
+        return EXIT_ERROR if result["failed_queries"] or result["failed_downloads"] else EXIT_OK
+    
+    if args.command == "monitor":
+        monitor.start_monitoring(api_port=args.api_port)
+        return EXIT_OK
+    
+    if args.command == "backfill":
+        if args.max_results <= 0:
+            print("❌ --max-results 必须大于0", file=sys.stderr)
+            return EXIT_USAGE
+        with progress_out:
+            result = monitor.backfill(args.query, args.max_results, now=args.now)
+        if as_json:
+            emit_json(result)
+        else:
+            print(f"✅ 回填完成: 下载 {len(result['downloaded'])} 篇，延后 {result['deferred']} 篇，"
+                  f"失败 {result['failed_downloads']} 篇")
+        return EXIT_ERROR if result["failed_queries"] or result["failed_downloads"] else EXIT_OK
+    
+    if args.command == "update":
+        if args.batch_size <= 0:
+            print("❌ --batch-size 必须大于0", file=sys.stderr)
+            return EXIT_USAGE
+        with progress_out:
+            result = monitor.check_for_updates(args.batch_size)
+        if as_json:
+            emit_json(result)
+        else:
+            print(f"✅ 已检查 {result['checked']} 篇论文，重新下载了 {len(result['updated'])} 篇新版本")
+        return EXIT_ERROR if result["failed_queries"] or result["failed_downloads"] else EXIT_OK
+    
+    if args.command == "scan":
+        with progress_out:
+            result = monitor.scan_library(args.adopt)
+        if as_json:
+            emit_json(result)
+        else:
+            print(f"✅ 已索引 {result['indexed']} 篇论文，其中 {result['untracked']} 篇不在下载记录中"
+                  + (f"，已记为已下载" if result['adopted'] else ""))
+        return EXIT_OK
+    
+    if args.command == "queue":
+        if args.limit is not None and args.limit <= 0:
+            print("❌ --limit 必须大于0", file=sys.stderr)
+            return EXIT_USAGE
+        if args.run:
+            with progress_out:
+                result = monitor.drain_download_queue(args.force, args.limit)
+        else:
+            result = {
+                "remaining": monitor.paper_store.queue_size(),
+                "queued": [dict(p.to_dict(), queries=queries, kind=kind)
+                           for p, queries, kind in monitor.paper_store.queued(args.limit)]
+            }
+        if as_json:
+            emit_json(result)
+        elif args.run:
+            print(f"✅ 下载 {len(result['downloaded'])} 篇，失败 {result['failed_downloads']} 篇，"
+                  f"队列中还有 {result['remaining']} 篇")
+        else:
+            for item in result["queued"]:
+                print(f"{item['id']}\t{item['kind']}\t{item['title'][:60]}")
+            print(f"📋 队列中共 {result['remaining']} 篇")
+        return EXIT_ERROR if args.run and result["failed_downloads"] else EXIT_OK
+    
+    if args.command == "export":
+        from exporter import parquet_available
+        
+        if args.format == "parquet" and not parquet_available():
+            print("❌ 未安装 pyarrow，无法导出 Parquet（pip install pyarrow）", file=sys.stderr)
+            return EXIT_ERROR
+        with progress_out:
+            result = monitor.export_metadata(args.out_dir, args.format, args.full)
+        if as_json:
+            emit_json(result)
+        else:
+            print(f"✅ 已导出 {result['rows']} 篇论文（{result['format']}，{result['files']} 个文件）到 {args.out_dir}")
+        return EXIT_OK
+    
+    if args.command == "related":
+        from relevance import ranking_available
+        
+        if args.top <= 0:
+            print("❌ --top 必须大于0", file=sys.stderr)
+            return EXIT_USAGE
+        if not ranking_available():
+            print("❌ 未安装 numpy，无法查找相似论文（pip install numpy）", file=sys.stderr)
+            return EXIT_ERROR
+        with progress_out:
+            results = monitor.related_papers(args.paper_id, args.top)
+        if results is None:
+            print(f"❌ 本地文库中没有论文 {args.paper_id}", file=sys.stderr)
+            return EXIT_ERROR
+        if as_json:
+            emit_json({"id": args.paper_id, "related": results})
+        else:
+            for item in results:
+                print(f"{item['score']:.3f}\t{item['id']}\t{item['title'][:70]}")
+        return EXIT_OK
+    
+    if args.command == "dedup":
+        with progress_out:
+            indexed = monitor.index_library_signatures()
+        if as_json:
+            emit_json({"indexed": indexed})
+        else:
+            print(f"✅ 已为 {indexed} 篇论文建立近重复检测签名")
+        return EXIT_OK
+    
+    if args.command == "extract":
+        with progress_out:
+            result = monitor.extract_library()
+        if as_json:
+            emit_json(result)
+        elif not result["available"]:
+            print("❌ 未安装 pypdf，无法提取文本（pip install pypdf）", file=sys.stderr)
+        else:
+            print(f"✅ 已提取 {result['extracted']} 个PDF的文本，失败 {result['failed']} 个")
+        return EXIT_OK if result["available"] else EXIT_ERROR
+    
+    if args.command == "verify":
+        with progress_out:
+            result = monitor.verify_library()
+            if args.repair:
+                result.update(monitor.repair_damaged())
+        if as_json:
+            emit_json(result)
+        else:
+            print(f"✅ 已校验 {result['checked']} 篇论文，发现 {len(result['damaged'])} 篇损坏"
+                  + (f"，重新下载 {len(result['repaired'])} 篇" if args.repair else ""))
+        unresolved = result["failed"] if args.repair else result["damaged"]
+        return EXIT_ERROR if unresolved else EXIT_OK
+    
+    if args.command == "quota":
+        if not monitor.config.get("storage_quota_mb"):
+            print("❌ 未设置 storage_quota_mb", file=sys.stderr)
+            return EXIT_USAGE
+        with progress_out:
+            result = monitor.enforce_quota(dry_run=args.dry_run)
+        if as_json:
+            emit_json(result)
+        else:
+            print(f"💾 存储占用 {result['used_bytes']/1024/1024:.1f} MB / 配额 {result['quota_bytes']/1024/1024:.0f} MB")
+            if args.dry_run:
+                for paper_id in result["archived"] + result["evicted"]:
+                    print(paper_id)
+        return EXIT_OK
+    
+    if args.command == "restore":
+        with progress_out:
+            restored = [paper_id for paper_id in args.paper_ids if monitor.restore_paper(paper_id)]
+        failed = [paper_id for paper_id in args.paper_ids if paper_id not in restored]
+        if as_json:
+            emit_json({"restored": restored, "failed": failed})
+        else:
+            print(f"✅ 恢复了 {len(restored)} 篇论文" + (f"，失败: {', '.join(failed)}" if failed else ""))
+        return EXIT_ERROR if failed else EXIT_OK
+    
+    if args.command == "stats":
+        if as_json:
+            emit_json(monitor.get_statistics(args.reconcile))
+        else:
+            monitor.show_statistics(args.reconcile)
+        return EXIT_OK
+    
+    if args.command == "queries":
+        changed = True
+        if args.queries_command == "add":
+            changed = monitor.add_search_query(args.query)
+        elif args.queries_command == "remove":
+            changed = monitor.remove_search_query(args.query)
+        
+        if as_json:
+            emit_json({
+                "changed": changed,
+                "search_queries": monitor.config["search_queries"]
+            })
+        elif args.queries_command == "list":
+            for query in monitor.config["search_queries"]:
+                print(f"{query}\t{monitor.get_folder_name_for_query(query)}")
+        elif changed:
+            print(f"✅ 已{'添加' if args.queries_command == 'add' else '删除'}搜索主题: {args.query}")
+        else:
+            print(f"ℹ️  搜索主题未变化: {args.query}")
+        return EXIT_OK if changed else EXIT_ERROR
+    
+    return EXIT_USAGE
+
+def run_profiles(args):
+    """
+    在一个进程里托管多个配置（daemon 子命令）
+    
+    Returns:
+        进程退出码
+    """
+    from profile_host import ProfileHost
+    
+    try:
+        host = ProfileHost(ArxivMonitor, args.profiles, args.store)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    try:
+        if not args.once:
+            host.start()
+            return EXIT_OK
+        if args.json:
+            import contextlib
+            with contextlib.redirect_stdout(sys.stderr):
+                results = host.run_cycle()
+            emit_json(results)
+        else:
+            results = host.run_cycle()
+        failed = any(r["failed_queries"] or r["failed_downloads"] for r in results.values())
+        return EXIT_ERROR if failed else EXIT_OK
+    finally:
+        host.close()
+
+def run_worker(args):
+    """
+    按租约分片处理查询的工作进程（worker 子命令）
+    
+    Returns:
+        进程退出码
+    """
+    from lease_store import LeaseStore
+    from query_worker import QueryWorker
+    
+    if args.status:
+        leases = LeaseStore(args.config + ".leases.db")
+        status = leases.status()
+        leases.close()
+        if args.json:
+            emit_json(status)
+        else:
+            for item in status:
+                owner = f"{item['owner']} ({item['expires_in']}s)" if item['owner'] else "空闲"
+                print(f"{item['query']}\t{owner}\t{item['watermark'] or '从未检查'}")
+        return EXIT_OK
+    if not args.worker_id:
+        print("❌ 请指定工作进程ID", file=sys.stderr)
+        return EXIT_USAGE
+    if args.batch <= 0 or args.lease_seconds <= 0:
+        print("❌ --batch 和 --lease-seconds 必须大于0", file=sys.stderr)
+        return EXIT_USAGE
+    
+    try:
+        worker = QueryWorker(ArxivMonitor, args.config, args.worker_id, args.batch, args.lease_seconds)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    try:
+        if not args.once:
+            worker.start()
+            return EXIT_OK
+        if args.json:
+            import contextlib
+            with contextlib.redirect_stdout(sys.stderr):
+                result = worker.run_cycle()
+            emit_json(result)
+        else:
+            result = worker.run_cycle()
+            if result is None:
+                print("ℹ️  没有到期需要检查的查询")
+            else:
+                print(f"✅ 检查了 {len(result['claimed'])} 个查询，下载 {len(result['downloaded'])} 篇")
+        if result is None:
+            return EXIT_OK
+        return EXIT_ERROR if result["failed_queries"] or result["failed_downloads"] else EXIT_OK
+    finally:
+        worker.close()
+
+def main(argv=None):
+    """主函数"""
+    args = build_parser().parse_args(argv)
+    if args.command == "daemon":
+        return run_profiles(args)
+    if args.command == "worker":
+        return run_worker(args)
+    try:
+        monitor = ArxivMonitor(config_file=args.config)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return EXIT_ERROR
+    
+    try:
+        if args.command is None:
+            interactive_menu(monitor)
+            return EXIT_OK
+        return run_command(monitor, args)
+    finally:
+        monitor.close()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # PyInstaller 打包的exe里，校验/文本提取进程池以spawn启动的子进程
+    # 会重新执行这个exe，freeze_support 让它们直接进入工作循环
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,74 @@
+import re
+import zlib
+import random
+import hashlib
+from array import array
+
+# MinHash参数：64个哈希函数分成16个band、每个band 4行，
+# 相似度约0.5以上的论文对有较大概率至少落进同一个桶
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # 固定种子：签名要跨进程、跨版本可比较
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+LATEX_RE = re.compile(r"\$[^$]*\$|\\[a-zA-Z]+")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(title, summary=None):
+    """标题和摘要转成小写词列表，去掉LaTeX公式和标点"""
+    text = LATEX_RE.sub(" ", f"{title} {summary or ''}").lower()
+    return WORD_RE.findall(text)
+
+
+def shingles(words, size=2):
+    """相邻 size 个词组成的片段集合（词数不够时直接用单词）"""
+    if len(words) < size:
+        return set(words)
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(title, summary=None):
+    """
+    计算标题+摘要的MinHash签名
+
+    Returns:
+        NUM_PERM 个整数的元组，文本为空时返回None
+    """
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles(normalize(title, summary))]
+    if not hashes:
+        return None
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+
+def band_buckets(signature):
+    """
+    签名按band切分后各段的桶键（可以直接存进SQLite的有符号64位整数）
+
+    Returns:
+        [(band序号, 桶键)]
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = array('Q', signature[band * ROWS:(band + 1) * ROWS]).tobytes()
+        key = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little', signed=True)
+        buckets.append((band, key))
+    return buckets
+
+
+def similarity(a, b):
+    """由两个签名估计Jaccard相似度"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def pack(signature):
+    """签名序列化为字节"""
+    return array('Q', signature).tobytes()
+
+
+def unpack(data):
+    """从字节恢复签名"""
+    return tuple(array('Q', data))
@@ -0,0 +1,82 @@
+import sys
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+
+@dataclass(slots=True)
+class Paper:
+    """
+    一篇arXiv论文的紧凑记录
+
+    使用 __slots__ 避免每条记录一个 __dict__；分类字符串经过 intern 在所有
+    论文之间共享；发布时间保存为UTC秒数；摘要以zlib压缩保存，访问
+    summary 时才解压，回填大量论文时也可以完全不保留摘要。
+    """
+
+    id: str
+    title: str
+    authors: tuple
+    published_ts: int
+    pdf_url: str
+    categories: tuple
+    query: str = None
+    summary_z: bytes = None
+    version: int = 1
+    updated_ts: int = 0
+
+    @classmethod
+    def create(cls, paper_id, title, authors, published, pdf_url, categories, query=None, summary=None,
+               version=1, updated=None):
+        """
+        从解析出的字段构造论文记录
+
+        Args:
+            published: 带时区的发布时间
+            summary: 摘要文本，为None时不保留摘要
+            version: arXiv版本号
+            updated: 带时区的最新版本时间，缺省为发布时间
+        """
+        return cls(
+            id=paper_id,
+            title=title,
+            authors=tuple(authors),
+            published_ts=int(published.timestamp()),
+            pdf_url=pdf_url,
+            categories=tuple(sys.intern(c) for c in categories),
+            query=sys.intern(query) if query else query,
+            summary_z=zlib.compress(summary.encode('utf-8')) if summary else None,
+            version=version,
+            updated_ts=int((updated or published).timestamp())
+        )
+
+    @property
+    def published(self):
+        """发布时间（UTC，带时区）"""
+        return datetime.fromtimestamp(self.published_ts, tz=timezone.utc)
+
+    @property
+    def file_id(self):
+        """可用作文件名前缀的ID（旧式ID中的 '/' 换成 '_'）"""
+        return self.id.replace('/', '_')
+
+    @property
+    def summary(self):
+        """摘要文本（按需解压），未保留时为空字符串"""
+        if self.summary_z is None:
+            return ""
+        return zlib.decompress(self.summary_z).decode('utf-8')
+
+    def to_dict(self):
+        """转为可JSON序列化的摘要"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "authors": list(self.authors),
+            "published": self.published.isoformat(),
+            "categories": list(self.categories),
+            "query": self.query,
+            "pdf_url": self.pdf_url,
+            "version": self.version,
+            "updated": datetime.fromtimestamp(self.updated_ts, tz=timezone.utc).isoformat()
+        }
@@ -0,0 +1,817 @@
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+from paper import Paper
+
+
+class PaperStore:
+    """
+    论文元数据库（SQLite）
+
+    保存每篇已下载论文的完整元数据以及最新已知的版本号和更新时间，
+    供版本跟踪等需要按论文查询的功能使用。写入在调用 commit() 时才落盘，
+    由调用方决定提交的批量大小。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS papers (
+            id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_ts INTEGER NOT NULL DEFAULT 0,
+            published_ts INTEGER NOT NULL DEFAULT 0,
+            title TEXT NOT NULL DEFAULT '',
+            authors TEXT NOT NULL DEFAULT '[]',
+            categories TEXT NOT NULL DEFAULT '',
+            query TEXT,
+            pdf_url TEXT NOT NULL DEFAULT '',
+            summary_z BLOB,
+            version_checked_ts INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS paper_queries (
+            id TEXT NOT NULL,
+            query TEXT NOT NULL,
+            PRIMARY KEY (id, query)
+        );
+        CREATE TABLE IF NOT EXISTS download_queue (
+            id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 1,
+            updated_ts INTEGER NOT NULL DEFAULT 0,
+            published_ts INTEGER NOT NULL DEFAULT 0,
+            title TEXT NOT NULL DEFAULT '',
+            authors TEXT NOT NULL DEFAULT '[]',
+            categories TEXT NOT NULL DEFAULT '',
+            query TEXT,
+            pdf_url TEXT NOT NULL DEFAULT '',
+            summary_z BLOB,
+            queries TEXT NOT NULL DEFAULT '[]',
+            priority INTEGER NOT NULL DEFAULT 0,
+            kind TEXT NOT NULL DEFAULT 'new',
+            enqueued_ts INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            retry_ts INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS texts (
+            sha256 TEXT PRIMARY KEY,
+            text_z BLOB,
+            error TEXT,
+            extracted_ts INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS signatures (
+            id TEXT PRIMARY KEY,
+            sig BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lsh_buckets (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            id TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS lsh_buckets_key ON lsh_buckets (band, bucket);
+    """
+
+    # 后续版本新增的列：(列名, 定义)
+    COLUMNS = [
+        ("sha256", "TEXT"),
+        ("size", "INTEGER"),
+        ("verified_ts", "INTEGER"),
+        ("damaged", "TEXT"),
+        ("stored_ts", "INTEGER"),
+        ("accessed_ts", "INTEGER"),
+        ("tier", "TEXT"),
+    ]
+    QUEUE_COLUMNS = [
+        ("attempts", "INTEGER NOT NULL DEFAULT 0"),
+        ("retry_ts", "INTEGER NOT NULL DEFAULT 0"),
+    ]
+
+    def __init__(self, db_file):
+        """
+        Args:
+            db_file: 数据库文件路径
+        """
+        self.db_file = db_file
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self.migrate()
+        self.conn.commit()
+
+    def migrate(self):
+        """为旧数据库补上新增的列"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(papers)")}
+        for column, definition in self.COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE papers ADD COLUMN {column} {definition}")
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(download_queue)")}
+        for column, definition in self.QUEUE_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE download_queue ADD COLUMN {column} {definition}")
+        # 按写入时间和查询分页列出论文（HTTP API）
+        self.conn.execute("CREATE INDEX IF NOT EXISTS papers_stored ON papers (stored_ts, id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS paper_queries_query ON paper_queries (query, id)")
+        # 淘汰时逐篇检查对象是否还被引用
+        self.conn.execute("CREATE INDEX IF NOT EXISTS papers_sha256 ON papers (sha256)")
+        # 有 stored_ts 列之前写入的论文视为最早写入
+        self.conn.execute("UPDATE papers SET stored_ts = 0 WHERE stored_ts IS NULL AND title != ''")
+
+    def upsert(self, paper):
+        """
+        写入或更新一篇论文的元数据（保留已有的查询归属）
+
+        元数据或版本确实变化时才更新写入时间 stored_ts，增量导出和
+        HTTP接口的 since 查询依赖它；版本检查时原样写回不算变化。
+
+        Args:
+            paper: Paper 实例
+        """
+        with self.lock:
+            self.conn.execute(
+                """
+                INSERT INTO papers (id, version, updated_ts, published_ts, title, authors,
+                                    categories, query, pdf_url, summary_z, stored_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    version = excluded.version,
+                    updated_ts = excluded.updated_ts,
+                    published_ts = excluded.published_ts,
+                    title = excluded.title,
+                    authors = excluded.authors,
+                    categories = excluded.categories,
+                    query = COALESCE(papers.query, excluded.query),
+                    pdf_url = excluded.pdf_url,
+                    summary_z = COALESCE(excluded.summary_z, papers.summary_z),
+                    stored_ts = CASE WHEN papers.stored_ts IS NULL
+                                       OR papers.version IS NOT excluded.version
+                                       OR papers.updated_ts IS NOT excluded.updated_ts
+                                       OR papers.title IS NOT excluded.title
+                                       OR papers.authors IS NOT excluded.authors
+                                       OR papers.categories IS NOT excluded.categories
+                                       OR papers.pdf_url IS NOT excluded.pdf_url
+                                  THEN excluded.stored_ts ELSE papers.stored_ts END
+                """,
+                (paper.id, paper.version, paper.updated_ts, paper.published_ts, paper.title,
+                 json.dumps(list(paper.authors), ensure_ascii=False), " ".join(paper.categories),
+                 paper.query, paper.pdf_url, paper.summary_z, int(time.time()))
+            )
+
+    def row_to_paper(self, row):
+        """把数据库行转为 Paper"""
+        paper_id, version, updated_ts, published_ts, title, authors, categories, query, pdf_url, summary_z = row
+        return Paper(paper_id, title, tuple(json.loads(authors)), published_ts, pdf_url,
+                     tuple(categories.split()), query, summary_z, version, updated_ts)
+
+    def get(self, paper_id):
+        """
+        按ID读取论文
+
+        Returns:
+            Paper 实例，不存在时返回None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, version, updated_ts, published_ts, title, authors, categories, "
+                "query, pdf_url, summary_z FROM papers WHERE id = ?", (paper_id,)
+            ).fetchone()
+        return self.row_to_paper(row) if row else None
+
+    def versions(self, paper_ids):
+        """
+        批量读取已知版本号
+
+        Returns:
+            {论文ID: 版本号}，库中没有的ID不出现在结果里
+        """
+        result = {}
+        paper_ids = list(paper_ids)
+        with self.lock:
+            for start in range(0, len(paper_ids), 500):
+                batch = paper_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                result.update(self.conn.execute(
+                    f"SELECT id, version FROM papers WHERE id IN ({placeholders})", batch
+                ).fetchall())
+        return result
+
+    def version_checked(self, paper_ids):
+        """
+        批量读取上次版本检查的时间
+
+        Returns:
+            {论文ID: UNIX秒}，库中没有或从未检查过的ID不出现在结果里
+        """
+        result = {}
+        paper_ids = list(paper_ids)
+        with self.lock:
+            for start in range(0, len(paper_ids), 500):
+                batch = paper_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                result.update(self.conn.execute(
+                    f"SELECT id, version_checked_ts FROM papers "
+                    f"WHERE id IN ({placeholders}) AND version_checked_ts IS NOT NULL", batch
+                ).fetchall())
+        return result
+
+    def add_queries(self, paper_id, queries):
+        """
+        记录论文匹配的查询
+
+        Returns:
+            此前没有记录过的查询列表
+        """
+        added = []
+        with self.lock:
+            for query in queries:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO paper_queries (id, query) VALUES (?, ?)", (paper_id, query)
+                )
+                if cursor.rowcount:
+                    added.append(query)
+            if added:
+                self.conn.execute("UPDATE papers SET stored_ts = ? WHERE id = ?", (int(time.time()), paper_id))
+        return added
+
+    def queries(self, paper_id):
+        """论文匹配过的全部查询"""
+        with self.lock:
+            rows = self.conn.execute("SELECT query FROM paper_queries WHERE id = ?", (paper_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def set_file(self, paper_id, sha256, size):
+        """
+        记录论文PDF在对象库中的哈希和字节数（论文元数据可以稍后再写入）
+
+        论文回到在库状态（清除淘汰/归档标记），访问时间记为现在。
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO papers (id, sha256, size, accessed_ts) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET sha256 = excluded.sha256, size = excluded.size, "
+                "accessed_ts = excluded.accessed_ts, tier = NULL",
+                (paper_id, sha256, size, int(time.time()))
+            )
+
+    def get_file(self, paper_id):
+        """
+        Returns:
+            (sha256, 字节数)，没有记录时返回None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sha256, size FROM papers WHERE id = ? AND sha256 IS NOT NULL", (paper_id,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def sha_references(self, sha256, tier=None):
+        """
+        引用该对象的论文数
+
+        Args:
+            tier: 只统计该层级的论文，缺省统计在库的论文（已淘汰或归档的论文不再需要对象文件）
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM papers WHERE sha256 = ? AND tier IS ?", (sha256, tier)
+            ).fetchone()[0]
+
+    def iter_papers(self, batch_size=1000):
+        """
+        分批遍历库中所有论文
+
+        Yields:
+            (Paper, sha256, 字节数)
+        """
+        last_id = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, version, updated_ts, published_ts, title, authors, categories, "
+                    "query, pdf_url, summary_z, sha256, size FROM papers WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self.row_to_paper(row[:10]), row[10], row[11]
+            last_id = rows[-1][0]
+
+    def export_batches(self, since_ts=None, until_ts=None, batch_size=10000):
+        """
+        按ID顺序分批读出要导出的论文元数据（只在内存中保留一批）
+
+        Args:
+            since_ts: 只导出写入时间晚于此值的论文，None表示全部
+            until_ts: 只导出写入时间早于此值的论文，None表示不限
+
+        Yields:
+            一批 dict，字段为 id、title、authors、categories、published_ts、
+            updated_ts、version、query、queries
+        """
+        last_id = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, title, authors, categories, published_ts, updated_ts, version, query "
+                    "FROM papers WHERE id > ? AND title != '' "
+                    "AND COALESCE(stored_ts, 0) > ? AND COALESCE(stored_ts, 0) < ? "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, -1 if since_ts is None else since_ts,
+                     (1 << 62) if until_ts is None else until_ts, batch_size)
+                ).fetchall()
+                if not rows:
+                    return
+                queries = self.query_map(row[0] for row in rows)
+            yield [
+                {
+                    "id": paper_id,
+                    "title": title,
+                    "authors": json.loads(authors),
+                    "categories": categories.split(),
+                    "published_ts": published_ts,
+                    "updated_ts": updated_ts,
+                    "version": version,
+                    "query": query,
+                    "queries": queries.get(paper_id) or ([query] if query else []),
+                }
+                for paper_id, title, authors, categories, published_ts, updated_ts, version, query in rows
+            ]
+            last_id = rows[-1][0]
+
+    def query_map(self, paper_ids):
+        """
+        批量读取论文匹配过的查询
+
+        Returns:
+            {论文ID: [查询]}，查询按字母排序；没有记录的ID不出现在结果里
+        """
+        queries = {}
+        paper_ids = list(paper_ids)
+        with self.lock:
+            for start in range(0, len(paper_ids), 500):
+                chunk = paper_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for paper_id, query in self.conn.execute(
+                        f"SELECT id, query FROM paper_queries WHERE id IN ({placeholders}) ORDER BY id, query",
+                        chunk):
+                    queries.setdefault(paper_id, []).append(query)
+        return queries
+
+    def papers_since(self, since_ts=0, after=None, query=None, limit=100):
+        """
+        按写入时间顺序列出论文（键集分页）
+
+        Args:
+            since_ts: 只列出写入时间不早于此值（UNIX秒）的论文
+            after: 上一页最后一篇的 (写入时间, 论文ID)，None表示第一页
+            query: 只列出匹配该查询的论文，None表示全部
+            limit: 每页篇数
+
+        Returns:
+            [(Paper, 写入时间)]
+        """
+        after_ts, after_id = after if after else (since_ts, "")
+        sql = ("SELECT id, version, updated_ts, published_ts, title, authors, categories, query, pdf_url, "
+               "summary_z, stored_ts FROM papers WHERE title != '' AND stored_ts >= ? "
+               "AND (stored_ts > ? OR (stored_ts = ? AND id > ?))")
+        params = [since_ts, after_ts, after_ts, after_id]
+        if query is not None:
+            sql += " AND id IN (SELECT id FROM paper_queries WHERE query = ?)"
+            params.append(query)
+        sql += " ORDER BY stored_ts, id LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(self.row_to_paper(row[:10]), row[10]) for row in rows]
+
+    def search(self, terms, after=None, limit=100):
+        """
+        按关键词搜索标题和作者（每个词都要出现，不区分ASCII大小写），最新发布的在前
+
+        Args:
+            terms: 关键词列表
+            after: 上一页最后一篇的 (发布时间, 论文ID)，None表示第一页
+            limit: 每页篇数
+
+        Returns:
+            [Paper]
+        """
+        sql = ("SELECT id, version, updated_ts, published_ts, title, authors, categories, query, pdf_url, "
+               "summary_z FROM papers WHERE title != ''")
+        params = []
+        for term in terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql += " AND (title LIKE ? ESCAPE '\\' OR authors LIKE ? ESCAPE '\\')"
+            params += [pattern, pattern]
+        if after:
+            sql += " AND (published_ts < ? OR (published_ts = ? AND id < ?))"
+            params += [after[0], after[0], after[1]]
+        sql += " ORDER BY published_ts DESC, id DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self.row_to_paper(row) for row in rows]
+
+    def query_counts(self):
+        """
+        Returns:
+            {查询: 匹配的论文数}
+        """
+        with self.lock:
+            return dict(self.conn.execute("SELECT query, COUNT(*) FROM paper_queries GROUP BY query"))
+
+    def revision(self):
+        """
+        库内容的版本号，有变化时一定改变（用作HTTP缓存的版本号）
+
+        total_changes 只统计本连接的修改；同一配置文件下其他进程（一次性
+        check、queue --run 等）提交的修改由 PRAGMA data_version 反映，两者
+        拼在一起。工作进程写的是各自的 <配置>.workers/<id>.json.db，不在这个库里。
+
+        Returns:
+            "<data_version>.<total_changes>"
+        """
+        with self.lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            return f"{data_version}.{self.conn.total_changes}"
+
+    def eviction_candidates(self, before_ts, tier=None, batch_size=1000):
+        """
+        分批遍历可以淘汰的论文，最久没访问的优先
+
+        访问时间取 accessed_ts（下载、恢复或检测到读取的时间），
+        没有时取写入时间。
+
+        Args:
+            before_ts: 只列出访问时间早于此值的论文
+            tier: None 遍历在库的论文，"archived" 遍历已归档的论文
+
+        Yields:
+            (论文ID, sha256, 字节数, 访问时间, 标题, 压缩的摘要)
+        """
+        tier_clause = "tier IS NULL" if tier is None else "tier = ?"
+        last = (-1, "")
+        while True:
+            params = ([] if tier is None else [tier]) + [before_ts, last[0], last[0], last[1], batch_size]
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, sha256, size, COALESCE(accessed_ts, stored_ts, 0) AS last_access, title, summary_z "
+                    f"FROM papers WHERE sha256 IS NOT NULL AND {tier_clause} AND last_access < ? "
+                    "AND (last_access > ? OR (last_access = ? AND id > ?)) "
+                    "ORDER BY last_access, id LIMIT ?",
+                    params
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = (rows[-1][3], rows[-1][0])
+
+    def set_tier(self, paper_id, tier):
+        """标记论文的存储层级：None 在库，"archived" 已压缩归档，"evicted" 已删除PDF"""
+        with self.lock:
+            self.conn.execute("UPDATE papers SET tier = ? WHERE id = ?", (tier, paper_id))
+
+    def tier(self, paper_id):
+        """论文的存储层级，在库或不在库中时返回None"""
+        with self.lock:
+            row = self.conn.execute("SELECT tier FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, paper_id, accessed_ts):
+        """记录论文PDF最近一次被读取的时间"""
+        with self.lock:
+            self.conn.execute("UPDATE papers SET accessed_ts = ? WHERE id = ?", (accessed_ts, paper_id))
+
+    def tier_counts(self):
+        """
+        Returns:
+            {"archived": 篇数, "evicted": 篇数}
+        """
+        with self.lock:
+            counts = dict(self.conn.execute(
+                "SELECT tier, COUNT(*) FROM papers WHERE tier IS NOT NULL GROUP BY tier"
+            ))
+        return {"archived": counts.get("archived", 0), "evicted": counts.get("evicted", 0)}
+
+    def files_to_verify(self, batch_size=1000, run_start=None):
+        """
+        分批遍历有PDF记录的论文，最久没校验过的优先
+
+        遍历过程中 mark_verified 会改写 verified_ts，所以按 (校验时间, ID)
+        键集分页，并且只取本轮开始之前校验过的论文：本轮刚校验的行
+        不会被重复取到，也不会让后面的行错位漏掉。
+
+        Args:
+            run_start: 本轮校验的开始时间（UNIX秒），缺省为现在
+
+        Yields:
+            (论文ID, sha256, 字节数)
+        """
+        run_start = int(time.time()) if run_start is None else run_start
+        last_ts, last_id = -1, ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, sha256, size, COALESCE(verified_ts, 0) AS checked FROM papers "
+                    "WHERE sha256 IS NOT NULL AND tier IS NULL AND checked < ? "
+                    "AND (checked > ? OR (checked = ? AND id > ?)) "
+                    "ORDER BY checked, id LIMIT ?",
+                    (run_start, last_ts, last_ts, last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for paper_id, sha256, size, _ in rows:
+                yield paper_id, sha256, size
+            last_id, last_ts = rows[-1][0], rows[-1][3]
+
+    def mark_verified(self, paper_id, verified_ts, problem=None):
+        """记录一篇论文的校验结果，problem 不为空时把论文标记为损坏"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE papers SET verified_ts = ?, damaged = ? WHERE id = ?",
+                (verified_ts, problem, paper_id)
+            )
+
+    def damaged(self):
+        """
+        Returns:
+            [(论文ID, 损坏原因)]
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, damaged FROM papers WHERE damaged IS NOT NULL AND tier IS NULL ORDER BY id"
+            ).fetchall()
+
+    def enqueue(self, paper, queries, priority=0, kind="new"):
+        """
+        把论文放入延后下载队列（已在队列中时合并查询、保留较高的优先级）
+
+        Args:
+            paper: Paper 实例
+            queries: 论文匹配的查询列表
+            priority: 查询优先级，越大越先下载
+            kind: 来源（"new" 定期检查，"backfill" 回填）
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT queries, priority FROM download_queue WHERE id = ?",
+                                    (paper.id,)).fetchone()
+            if row:
+                merged = json.loads(row[0])
+                merged += [q for q in queries if q not in merged]
+                self.conn.execute("UPDATE download_queue SET queries = ?, priority = ? WHERE id = ?",
+                                  (json.dumps(merged, ensure_ascii=False), max(priority, row[1]), paper.id))
+                return
+            self.conn.execute(
+                """
+                INSERT INTO download_queue (id, version, updated_ts, published_ts, title, authors,
+                                            categories, query, pdf_url, summary_z, queries,
+                                            priority, kind, enqueued_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (paper.id, paper.version, paper.updated_ts, paper.published_ts, paper.title,
+                 json.dumps(list(paper.authors), ensure_ascii=False), " ".join(paper.categories),
+                 paper.query, paper.pdf_url, paper.summary_z, json.dumps(list(queries), ensure_ascii=False),
+                 priority, kind, int(time.time()))
+            )
+
+    def queued(self, limit=None, due_ts=None):
+        """
+        按优先级（高优先）和发布时间（新的优先）读取延后下载队列
+
+        Args:
+            limit: 最多读取的篇数
+            due_ts: 只读取重试时间不晚于此值（UNIX秒）的论文，None表示全部
+
+        Returns:
+            [(Paper, 查询列表, 来源)]
+        """
+        sql = ("SELECT id, version, updated_ts, published_ts, title, authors, categories, "
+               "query, pdf_url, summary_z, queries, kind FROM download_queue")
+        params = []
+        if due_ts is not None:
+            sql += " WHERE retry_ts <= ?"
+            params.append(due_ts)
+        sql += " ORDER BY priority DESC, published_ts DESC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(self.row_to_paper(row[:10]), json.loads(row[10]), row[11]) for row in rows]
+
+    def record_attempt(self, paper_id, now, backoff_seconds):
+        """
+        记录队列中的论文又下载失败了一次，下次重试的间隔按失败次数翻倍
+
+        Args:
+            now: 当前时间（UNIX秒）
+            backoff_seconds: 第一次失败后的重试间隔（秒）
+
+        Returns:
+            累计失败次数
+        """
+        with self.lock:
+            self.conn.execute(
+                "UPDATE download_queue SET retry_ts = ? + ? * (1 << MIN(attempts, 16)), attempts = attempts + 1 "
+                "WHERE id = ?",
+                (now, backoff_seconds, paper_id)
+            )
+            row = self.conn.execute("SELECT attempts FROM download_queue WHERE id = ?", (paper_id,)).fetchone()
+        return row[0] if row else 0
+
+    def dequeue(self, paper_id):
+        """从延后下载队列中移除论文"""
+        with self.lock:
+            self.conn.execute("DELETE FROM download_queue WHERE id = ?", (paper_id,))
+
+    def queue_size(self):
+        """延后下载队列中的论文数"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM download_queue").fetchone()[0]
+
+    def kept_texts(self, limit):
+        """
+        最近发布的已下载论文的标题和摘要（用于建立兴趣画像）
+
+        Returns:
+            [(标题, 摘要或None)]
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT title, summary_z FROM papers WHERE sha256 IS NOT NULL AND title != '' "
+                "ORDER BY published_ts DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(title, zlib.decompress(summary_z).decode('utf-8') if summary_z else None)
+                for title, summary_z in rows]
+
+    def add_signature(self, paper_id, signature, buckets):
+        """
+        把论文的MinHash签名加入LSH索引（已有签名时不重复加入）
+
+        Args:
+            signature: 序列化后的签名
+            buckets: [(band序号, 桶键)]
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO signatures (id, sig) VALUES (?, ?)", (paper_id, signature)
+            )
+            if cursor.rowcount:
+                self.conn.executemany(
+                    "INSERT INTO lsh_buckets (band, bucket, id) VALUES (?, ?, ?)",
+                    [(band, bucket, paper_id) for band, bucket in buckets]
+                )
+
+    def lsh_candidates(self, buckets):
+        """
+        与给定桶键至少共享一个桶的论文（按索引查找，不随库大小线性增长）
+
+        Returns:
+            {论文ID: 序列化后的签名}
+        """
+        candidates = {}
+        with self.lock:
+            for band, bucket in buckets:
+                candidates.update(self.conn.execute(
+                    "SELECT s.id, s.sig FROM lsh_buckets b JOIN signatures s ON s.id = b.id "
+                    "WHERE b.band = ? AND b.bucket = ?", (band, bucket)
+                ).fetchall())
+        return candidates
+
+    def papers_without_signature(self, batch_size=1000):
+        """
+        分批遍历还没有MinHash签名的论文
+
+        Yields:
+            (论文ID, 标题, 摘要或None)
+        """
+        last_id = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT p.id, p.title, p.summary_z FROM papers p LEFT JOIN signatures s ON s.id = p.id "
+                    "WHERE p.id > ? AND s.id IS NULL AND p.title != '' ORDER BY p.id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for paper_id, title, summary_z in rows:
+                yield paper_id, title, zlib.decompress(summary_z).decode('utf-8') if summary_z else None
+            last_id = rows[-1][0]
+
+    def ids_stored_since(self, since_ts=0, batch_size=1000):
+        """
+        按写入时间顺序分批遍历论文ID（只走 papers_stored 索引，不读摘要）
+
+        Args:
+            since_ts: 只遍历写入时间不早于此值（UNIX秒）的论文
+
+        Yields:
+            (论文ID, 写入时间)
+        """
+        last_ts, last_id = since_ts, ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, stored_ts FROM papers WHERE stored_ts >= ? "
+                    "AND (stored_ts > ? OR (stored_ts = ? AND id > ?)) ORDER BY stored_ts, id LIMIT ?",
+                    (since_ts, last_ts, last_ts, last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id, last_ts = rows[-1]
+
+    def texts(self, paper_ids):
+        """
+        批量读取有标题的论文的标题和摘要
+
+        Returns:
+            [(论文ID, 标题, 摘要或None)]，没有标题的ID不出现在结果里
+        """
+        texts = []
+        paper_ids = list(paper_ids)
+        with self.lock:
+            for start in range(0, len(paper_ids), 500):
+                chunk = paper_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                texts.extend(self.conn.execute(
+                    f"SELECT id, title, summary_z FROM papers WHERE id IN ({placeholders}) AND title != ''",
+                    chunk).fetchall())
+        return [(paper_id, title, zlib.decompress(summary_z).decode('utf-8') if summary_z else None)
+                for paper_id, title, summary_z in texts]
+
+    def files_without_text(self, batch_size=1000):
+        """
+        分批遍历还没有提取过文本的PDF对象（按哈希去重，提取失败的也算处理过）
+
+        Yields:
+            sha256
+        """
+        last_sha = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT DISTINCT p.sha256 FROM papers p LEFT JOIN texts t ON t.sha256 = p.sha256 "
+                    "WHERE p.sha256 > ? AND t.sha256 IS NULL AND p.tier IS NULL ORDER BY p.sha256 LIMIT ?",
+                    (last_sha, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for (sha256,) in rows:
+                yield sha256
+            last_sha = rows[-1][0]
+
+    def set_text(self, sha256, text_z, error=None):
+        """保存一个PDF对象的压缩文本（或提取失败的原因）"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO texts (sha256, text_z, error, extracted_ts) VALUES (?, ?, ?, ?)",
+                (sha256, text_z, error, int(time.time()))
+            )
+
+    def get_text(self, paper_id):
+        """
+        Returns:
+            论文PDF的全文，还没有提取或提取失败时返回None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT t.text_z FROM papers p JOIN texts t ON t.sha256 = p.sha256 WHERE p.id = ?",
+                (paper_id,)
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def text_counts(self):
+        """
+        Returns:
+            (已提取文本的对象数, 提取失败的对象数)
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(text_z), COUNT(error) FROM texts"
+            ).fetchone()
+
+    def mark_version_checked(self, paper_ids, checked_ts):
+        """记录一批论文的版本检查时间"""
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE papers SET version_checked_ts = ? WHERE id = ?",
+                [(checked_ts, paper_id) for paper_id in paper_ids]
+            )
+
+    def count(self):
+        """库中的论文数"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def commit(self):
+        """提交未落盘的写入"""
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        """提交并关闭数据库"""
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,230 @@
+import os
+import lzma
+import shutil
+import hashlib
+
+
+def open_noatime(path):
+    """
+    以只读二进制方式打开文件，尽量不更新访问时间
+
+    后台校验、文本提取和归档读取对象时不能让文件看起来被用户打开过，
+    否则按访问时间淘汰会失效。O_NOATIME 只在 Linux 上、且是文件属主时可用，
+    否则退回普通打开。
+    """
+    flag = getattr(os, "O_NOATIME", 0)
+    if flag:
+        try:
+            return os.fdopen(os.open(path, os.O_RDONLY | flag), 'rb')
+        except PermissionError:
+            pass
+    return open(path, 'rb')
+
+
+class PdfStore:
+    """
+    按内容寻址（SHA-256）的PDF对象库
+
+    每份PDF只在 .objects 目录下保存一次，按查询分文件夹或平铺的目录视图
+    都是指向对象文件的硬链接（文件系统不支持时退回符号链接，再不行才复制），
+    同一篇论文出现在多个查询文件夹里不额外占用空间，切换目录结构只需重建链接。
+    长期不用的对象可以压缩成同目录下的 .pdf.xz 归档，需要时再解压回来。
+    """
+
+    OBJECTS_DIR = ".objects"
+    ARCHIVE_SUFFIX = ".pdf.xz"
+
+    def __init__(self, download_path, objects_path=None):
+        """
+        Args:
+            download_path: 下载根目录
+            objects_path: 对象库目录，缺省为下载根目录下的 .objects（多个配置可以共用一个对象库）
+        """
+        self.download_path = download_path
+        self.objects_path = objects_path or os.path.join(download_path, self.OBJECTS_DIR)
+
+    def object_path(self, sha256):
+        """对象文件路径"""
+        return os.path.join(self.objects_path, sha256[:2], f"{sha256}.pdf")
+
+    def has(self, sha256):
+        """对象是否存在"""
+        return bool(sha256) and os.path.exists(self.object_path(sha256))
+
+    def put(self, data):
+        """
+        写入PDF内容
+
+        Args:
+            data: PDF字节内容
+
+        Returns:
+            (sha256, 是否为新写入的对象)
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.object_path(sha256)
+        if os.path.exists(path):
+            return sha256, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.part"  # 多个进程可能同时写同一个对象
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return sha256, True
+
+    def ingest(self, filepath):
+        """
+        把已有的普通PDF文件移入对象库，原位置换成指向对象的链接
+
+        Returns:
+            (sha256, 文件字节数)
+        """
+        digest = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+        size = os.path.getsize(filepath)
+        path = self.object_path(sha256)
+        if os.path.exists(path):
+            os.remove(filepath)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(filepath, path)
+        self.link(sha256, filepath)
+        return sha256, size
+
+    def is_view_of(self, view_path, sha256):
+        """view_path 是否是指向该对象的链接"""
+        if not os.path.lexists(view_path):
+            return False
+        try:
+            return os.path.samefile(view_path, self.object_path(sha256))
+        except OSError:
+            return False
+
+    def link(self, sha256, view_path):
+        """
+        在 view_path 创建指向对象的视图文件（已存在的同名文件会被替换）
+
+        Returns:
+            是否新建了视图（已经指向同一对象时返回False）
+        """
+        if self.is_view_of(view_path, sha256):
+            return False
+        os.makedirs(os.path.dirname(view_path) or ".", exist_ok=True)
+        target = self.object_path(sha256)
+        tmp_path = f"{view_path}.{os.getpid()}.link"
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(target, tmp_path)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(target, os.path.dirname(os.path.abspath(view_path))), tmp_path)
+            except OSError:
+                shutil.copy2(target, tmp_path)
+        os.replace(tmp_path, view_path)
+        return True
+
+    def unlink_view(self, view_path, sha256):
+        """
+        删除指向该对象的视图文件（不是该对象的视图时不动）
+
+        Returns:
+            是否删除了文件
+        """
+        if not self.is_view_of(view_path, sha256):
+            return False
+        os.remove(view_path)
+        return True
+
+    def remove(self, sha256):
+        """删除对象文件"""
+        path = self.object_path(sha256)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def archive_path(self, sha256):
+        """压缩归档文件路径"""
+        return os.path.join(self.objects_path, sha256[:2], f"{sha256}{self.ARCHIVE_SUFFIX}")
+
+    def has_archive(self, sha256):
+        """压缩归档是否存在"""
+        return bool(sha256) and os.path.exists(self.archive_path(sha256))
+
+    def archive(self, sha256, min_saving=0.1):
+        """
+        把对象流式压缩成 xz 归档（不删除对象，由调用方决定）
+
+        大多数PDF内部已经压缩过，节省不到 min_saving 比例时放弃归档。
+
+        Returns:
+            归档的字节数，没有归档时返回None
+        """
+        path = self.object_path(sha256)
+        archive_path = self.archive_path(sha256)
+        if os.path.exists(archive_path):
+            return os.path.getsize(archive_path)
+        size = os.path.getsize(path)
+        tmp_path = f"{archive_path}.{os.getpid()}.part"
+        compressor = lzma.LZMACompressor(preset=6)
+        with open_noatime(path) as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                dst.write(compressor.compress(chunk))
+            dst.write(compressor.flush())
+            archived = dst.tell()
+            worthwhile = archived <= size * (1 - min_saving)
+            if worthwhile:
+                dst.flush()
+                os.fsync(dst.fileno())
+        if not worthwhile:
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, archive_path)
+        return archived
+
+    def restore(self, sha256):
+        """
+        把归档解压回对象并删除归档（内容哈希不符时保留归档，不写对象）
+
+        Returns:
+            删除的归档字节数，没有归档或哈希不符时返回None
+        """
+        archive_path = self.archive_path(sha256)
+        if not os.path.exists(archive_path):
+            return None
+        archived = os.path.getsize(archive_path)
+        path = self.object_path(sha256)
+        tmp_path = f"{path}.{os.getpid()}.part"
+        digest = hashlib.sha256()
+        decompressor = lzma.LZMADecompressor()
+        with open(archive_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                data = decompressor.decompress(chunk)
+                digest.update(data)
+                dst.write(data)
+            dst.flush()
+            os.fsync(dst.fileno())
+        if digest.hexdigest() != sha256:
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, path)
+        os.remove(archive_path)
+        return archived
+
+    def remove_archive(self, sha256):
+        """
+        删除压缩归档
+
+        Returns:
+            删除的字节数，没有归档时返回0
+        """
+        archive_path = self.archive_path(sha256)
+        if not os.path.exists(archive_path):
+            return 0
+        size = os.path.getsize(archive_path)
+        os.remove(archive_path)
+        return size
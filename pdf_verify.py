@@ -0,0 +1,88 @@
+import os
+import time
+import hashlib
+
+from pdf_store import open_noatime
+from process_pool import map_unordered
+
+# %%EOF 标记允许出现在文件末尾这么多字节之内（后面可能跟着换行或填充）
+TRAILER_WINDOW = 1024
+
+
+def has_pdf_trailer(tail):
+    """文件末尾的字节里是否有 %%EOF 标记"""
+    return b'%%EOF' in tail[-TRAILER_WINDOW:]
+
+
+def verify_file(task):
+    """
+    校验一个PDF文件（在子进程中执行，参数和返回值都要能pickle）
+
+    Args:
+        task: (论文ID, 文件路径, 期望的sha256, 期望的字节数)
+
+    Returns:
+        (论文ID, 问题描述或None, 读取的字节数)
+    """
+    paper_id, path, expected_sha, expected_size = task
+    try:
+        size = os.path.getsize(path)
+        if expected_size is not None and size != expected_size:
+            return paper_id, f"大小不符: {size} != {expected_size}", 0
+        digest = hashlib.sha256()
+        head = b''
+        tail = b''
+        with open_noatime(path) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                if not head:
+                    head = chunk[:8]
+                digest.update(chunk)
+                tail = (tail + chunk)[-TRAILER_WINDOW:]
+        if not head.startswith(b'%PDF'):
+            return paper_id, "缺少 %PDF 文件头", size
+        if not has_pdf_trailer(tail):
+            return paper_id, "缺少 %%EOF 结尾（文件可能被截断）", size
+        if expected_sha and digest.hexdigest() != expected_sha:
+            return paper_id, "SHA-256 不匹配", size
+        return paper_id, None, size
+    except OSError as e:
+        return paper_id, f"无法读取: {e}", 0
+
+
+def verify_files(tasks, workers=None, io_bytes_per_sec=None, on_result=None, stop=None):
+    """
+    在进程池中并行校验一批PDF，按I/O预算限速
+
+    任务逐个提交，已提交的字节数超过 已用时间×预算 时暂停提交，
+    让后台校验不会占满磁盘带宽。
+
+    Args:
+        tasks: 可迭代的 (论文ID, 文件路径, sha256, 字节数)
+        workers: 进程数，缺省为CPU数
+        io_bytes_per_sec: 每秒最多读取的字节数，None表示不限速
+        on_result: 每得到一个结果时调用 on_result(论文ID, 问题描述或None)
+        stop: threading.Event，置位后尽快结束（没校验的下次继续）
+
+    Returns:
+        (校验的文件数, 发现问题的文件数, 读取的字节数)
+    """
+    checked = damaged = total_bytes = 0
+    submitted_bytes = 0
+    start = time.monotonic()
+
+    def throttle(task):
+        nonlocal submitted_bytes
+        if io_bytes_per_sec:
+            ahead = submitted_bytes / io_bytes_per_sec - (time.monotonic() - start)
+            if ahead > 0:
+                stop.wait(ahead) if stop is not None else time.sleep(ahead)
+        submitted_bytes += task[3] or 0
+
+    for paper_id, problem, read in map_unordered(verify_file, tasks, workers, throttle, stop):
+        checked += 1
+        total_bytes += read
+        if problem:
+            damaged += 1
+        if on_result:
+            on_result(paper_id, problem)
+    return checked, damaged, total_bytes
@@ -0,0 +1,46 @@
+import os
+
+# multiprocessing / concurrent.futures 只在真正启动进程池时导入，
+# 下载路径上用到 pdf_verify 的 has_pdf_trailer 时不必付这份导入开销
+
+
+def map_unordered(func, tasks, workers=None, before_submit=None, stop=None):
+    """
+    在进程池中并行执行 func(task)，按完成顺序逐个产出结果
+
+    同时在途的任务数限制在进程数的两倍，任务可以是惰性生成器，
+    超大的文库也不会一次性占满内存。子进程用spawn启动：校验和文本提取
+    常在后台线程里运行，fork带锁的多线程进程不安全。
+
+    Args:
+        func: 在子进程中执行的模块级函数（参数和返回值都要能pickle）
+        tasks: 可迭代的任务参数
+        workers: 进程数，缺省为CPU数
+        before_submit: 每提交一个任务前调用 before_submit(task)，可在其中等待以限速
+        stop: threading.Event，置位后不再提交新任务，取消还没开始的任务，
+              只等正在执行的任务（每个进程最多一个）完成
+
+    Yields:
+        func 的返回值
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    workers = workers or os.cpu_count() or 1
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for task in tasks:
+            if stop is not None and stop.is_set():
+                break
+            if before_submit:
+                before_submit(task)
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(func, task))
+        if stop is not None and stop.is_set():
+            pending = {future for future in pending if not future.cancel()}
+        done, _ = wait(pending)
+        for future in done:
+            yield future.result()
@@ -0,0 +1,150 @@
+import os
+import time
+import dataclasses
+
+
+class FetchCache:
+    """
+    同一轮检查内的搜索结果缓存
+
+    多个配置订阅同一个查询时只请求一次arXiv：按最大的 max_results 抓取，
+    各配置取结果的前 max_results 条（API按提交时间倒序返回，前缀就是最新的论文）。
+    """
+
+    def __init__(self, ttl_seconds=600):
+        """
+        Args:
+            ttl_seconds: 结果的有效期（秒），超过后按未缓存处理
+        """
+        self.ttl_seconds = ttl_seconds
+        self.entries = {}
+
+    def put(self, query, max_results, papers):
+        """缓存一个查询的结果"""
+        self.entries[query] = (time.monotonic(), max_results, papers)
+
+    def get(self, query, max_results, start=0):
+        """
+        Returns:
+            缓存的论文列表（每次返回新的 Paper 副本），没有可用的缓存时返回None
+        """
+        entry = self.entries.get(query)
+        if entry is None or start != 0:
+            return None
+        fetched_at, cached_max, papers = entry
+        if time.monotonic() - fetched_at > self.ttl_seconds:
+            del self.entries[query]
+            return None
+        if cached_max < max_results and len(papers) >= cached_max:
+            return None  # 缓存的结果不够长
+        return [dataclasses.replace(p) for p in papers[:max_results]]
+
+    def clear(self):
+        self.entries.clear()
+
+
+class ProfileHost:
+    """
+    在一个进程里托管多个配置（每位用户一个配置文件）
+
+    各配置保留自己的下载记录、文件夹和通知；相同的查询每轮只抓取一次，
+    PDF对象库由所有配置共用，同一篇论文（同一版本）只下载一次，
+    其余配置直接链接到自己的文件夹。
+    """
+
+    # 托管进程可能与单配置的 monitor/check 同时运行，日志分开写
+    LOG_FILE = "arxiv_monitor.daemon.log"
+
+    def __init__(self, monitor_class, config_files, objects_path):
+        """
+        Args:
+            monitor_class: ArxivMonitor（由 main 传入：以脚本运行时 main 是 __main__，
+                           在这里导入会把整个 main.py 再加载一遍）
+            config_files: 配置文件路径列表
+            objects_path: 共享的PDF对象库目录
+        """
+        self.fetch_cache = FetchCache()
+        self.shared_files = {}  # (论文ID, 版本号) → (sha256, 字节数)
+        self.profiles = []
+        for config_file in config_files:
+            monitor = monitor_class(config_file, fetch_cache=self.fetch_cache, objects_path=objects_path,
+                                    shared_files=self.shared_files, log_file=self.LOG_FILE)
+            monitor.profile_name = os.path.splitext(os.path.basename(config_file))[0]
+            monitor.object_in_use = self.object_in_use
+            self.profiles.append(monitor)
+
+        for monitor in self.profiles:
+            for paper, sha256, size in monitor.paper_store.iter_papers():
+                if sha256:
+                    self.shared_files[(paper.id, paper.version)] = (sha256, size)
+
+    def object_in_use(self, sha256):
+        """是否还有任何配置引用该对象（共享对象库里的对象不能只看一个配置）"""
+        return any(monitor.paper_store.sha_references(sha256) for monitor in self.profiles)
+
+    def unique_queries(self):
+        """
+        Returns:
+            {查询: 所有订阅该查询的配置中最大的 max_results}
+        """
+        queries = {}
+        for monitor in self.profiles:
+            for query in monitor.config["search_queries"]:
+                queries[query] = max(queries.get(query, 0), monitor.config["max_results"])
+        return queries
+
+    def prefetch(self):
+        """
+        每个不同的查询只请求一次arXiv，结果放入缓存
+
+        Returns:
+            请求失败的查询列表
+        """
+        self.fetch_cache.clear()
+        fetcher = self.profiles[0]
+        fetcher.failed_queries = []
+        for i, (query, max_results) in enumerate(self.unique_queries().items()):
+            if i > 0:
+                time.sleep(3)  # arXiv API要求请求之间间隔3秒
+            papers = fetcher.search_papers_direct_api(query, max_results)
+            if query not in fetcher.failed_queries:
+                self.fetch_cache.put(query, max_results, papers)
+        return list(fetcher.failed_queries)
+
+    def run_cycle(self):
+        """
+        执行一轮检查：先合并抓取所有查询，再依次为每个配置筛选、下载、通知
+
+        Returns:
+            {配置名: 检查结果}
+        """
+        requested = sum(len(m.config["search_queries"]) for m in self.profiles)
+        unique = len(self.unique_queries())
+        print(f"🌐 {len(self.profiles)} 个配置共 {requested} 个查询，合并为 {unique} 次请求")
+        self.prefetch()
+
+        results = {}
+        for monitor in self.profiles:
+            print(f"\n👤 配置: {monitor.profile_name}")
+            results[monitor.profile_name] = monitor.check_for_new_papers()
+        return results
+
+    def start(self):
+        """按各配置中最短的检查间隔定时运行"""
+        import schedule
+
+        hours = min(m.config["check_interval_hours"] for m in self.profiles)
+        self.run_cycle()
+        schedule.every(hours).hours.do(self.run_cycle)
+        print(f"⏰ 多配置监控已启动，每 {hours} 小时检查一次")
+        print("💡 按 Ctrl+C 停止监控")
+        try:
+            while True:
+                schedule.run_pending()
+                time.sleep(60)
+        except KeyboardInterrupt:
+            print("\n🛑 监控已停止")
+
+    def close(self):
+        for monitor in self.profiles:
+            monitor.close()
@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import threading
+
+from lease_store import LeaseStore
+from state_journal import StateJournal
+
+# 工作进程自己维护的状态键，其余设置每轮从主配置同步
+STATE_KEYS = ("search_queries", "query_last_check", "last_check", "first_run")
+
+
+def read_shared_config(config_file):
+    """
+    只读地加载主配置（快照加日志），不写任何文件
+
+    Raises:
+        RuntimeError: 主配置不存在或已损坏
+    """
+    journal = StateJournal(config_file)
+    config = journal.read_snapshot()
+    if config is None:
+        raise RuntimeError(f"主配置 {config_file} 不存在，请先用它运行一次")
+    journal.replay(config, set())
+    return config
+
+
+class QueryWorker:
+    """
+    按租约分片处理查询的工作进程
+
+    多个进程（可以在共享同一文件系统的不同主机上）指向同一个主配置，
+    通过 <配置>.leases.db 认领到期的查询各自检查。每个进程在
+    <配置>.workers/<ID>.json 下保存自己的下载记录和论文库，PDF仍然
+    下载到主配置的下载目录；任一进程下载过的论文，其他进程直接链接。
+    共用下载目录的存储统计索引由主配置在查看统计时全量校准，工作进程不写。
+    """
+
+    def __init__(self, monitor_class, config_file, worker_id, batch=20, lease_seconds=900):
+        """
+        Args:
+            monitor_class: 监控器类（main.ArxivMonitor，由 run_worker 传入）
+            config_file: 主配置文件
+            worker_id: 工作进程标识（各进程必须不同）
+            batch: 每轮最多认领的查询数
+            lease_seconds: 租约时长，进程卡死超过这么久后查询会被其他进程接管
+        """
+        self.config_file = config_file
+        self.worker_id = worker_id
+        self.batch = batch
+        self.lease_seconds = lease_seconds
+        self.leases = LeaseStore(config_file + ".leases.db")
+
+        shared = read_shared_config(config_file)
+        state_dir = config_file + ".workers"
+        os.makedirs(state_dir, exist_ok=True)
+        state_file = os.path.join(state_dir, f"{worker_id}.json")
+        if not os.path.exists(state_file):
+            settings = {k: v for k, v in shared.items() if k not in STATE_KEYS}
+            settings.update(search_queries=[], query_last_check={}, last_check=None, first_run=False)
+            StateJournal(state_file).write_snapshot(json.dumps(settings, indent=2, ensure_ascii=False))
+
+        self.monitor = monitor_class(state_file, shared_files=self.leases, shared_storage=True,
+                                     log_file=f"arxiv_monitor.{worker_id}.log")
+        self.monitor.profile_name = worker_id
+        # 下载目录里的对象可能被其他进程的文件夹引用，本进程不删除对象
+        self.monitor.object_in_use = lambda sha256: True
+
+    def sync_settings(self):
+        """
+        从主配置同步设置和查询列表
+
+        Returns:
+            主配置
+        """
+        shared = read_shared_config(self.config_file)
+        for key, value in shared.items():
+            if key not in STATE_KEYS:
+                self.monitor.config[key] = value
+        self.leases.sync_queries(shared["search_queries"])
+        return shared
+
+    def heartbeat(self, stop):
+        """检查进行期间定期续约"""
+        while not stop.wait(self.lease_seconds / 3):
+            self.leases.renew(self.worker_id, self.lease_seconds)
+
+    def run_cycle(self):
+        """
+        认领一批到期的查询并检查
+
+        Returns:
+            检查结果摘要，没有认领到查询时返回None
+        """
+        shared = self.sync_settings()
+        claimed = self.leases.claim(self.worker_id, self.batch, self.lease_seconds,
+                                    shared["check_interval_hours"])
+        if not claimed:
+            return None
+
+        monitor = self.monitor
+        monitor.config["search_queries"] = [query for query, _ in claimed]
+        monitor.config["first_run"] = False
+        for query, watermark in claimed:
+            if watermark:
+                monitor.config["query_last_check"][query] = watermark
+            else:
+                monitor.config["query_last_check"].pop(query, None)
+        print(f"🔑 {self.worker_id} 认领了 {len(claimed)} 个查询")
+
+        stop = threading.Event()
+        beat = threading.Thread(target=self.heartbeat, args=(stop,), daemon=True)
+        beat.start()
+        try:
+            result = monitor.check_for_new_papers()
+        finally:
+            stop.set()
+            beat.join()
+
+        lost = []
+        for query, _ in claimed:
+            watermark = monitor.config["query_last_check"].get(query)
+            if query in result["failed_queries"] or not watermark:
+                continue
+            if self.leases.advance_watermark(query, self.worker_id, watermark) == "lost":
+                lost.append(query)
+        if lost:
+            monitor.logger.warning("租约已被其他进程接管，未更新水位线: %s", ', '.join(lost))
+        self.leases.release(self.worker_id)
+
+        result["claimed"] = [query for query, _ in claimed]
+        result["lost_leases"] = lost
+        return result
+
+    def start(self, idle_seconds=60):
+        """持续认领并检查，没有到期查询时等待 idle_seconds 秒"""
+        print(f"👷 工作进程 {self.worker_id} 已启动，按 Ctrl+C 停止")
+        try:
+            while True:
+                if self.run_cycle() is None:
+                    time.sleep(idle_seconds)
+        except KeyboardInterrupt:
+            print("\n🛑 工作进程已停止")
+
+    def close(self):
+        self.leases.release(self.worker_id)
+        self.monitor.close()
+        self.leases.close()
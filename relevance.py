@@ -0,0 +1,121 @@
+import re
+import math
+from collections import Counter
+
+# numpy 是可选依赖，只在启用相关性排序时按需导入
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9\-]+")
+STOPWORDS = frozenset("""
+    a an and are as at be by can for from has have in into is it its of on or our over
+    such that the their these this to under using via was we which while with without
+    based paper propose proposed show results method methods approach new also both than
+""".split())
+
+
+def ranking_available():
+    """是否安装了相关性排序所需的 numpy（可选依赖）"""
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
+
+
+def tokenize(text):
+    """把标题/摘要切成小写词，去掉停用词和过短的词"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 2 and t not in STOPWORDS]
+
+
+def paper_text(title, summary):
+    """参与打分的文本：标题权重加倍，再加上摘要"""
+    return f"{title} {title} {summary or ''}"
+
+
+class RelevanceProfile:
+    """
+    基于TF-IDF的兴趣画像
+
+    用已保留论文的标题和摘要建立词表和画像向量（各篇TF-IDF向量的平均），
+    一批候选论文组成一个 候选数×词表大小 的矩阵，一次矩阵乘法算出
+    全部候选与画像的余弦相似度。词表只取画像中权重最高的 max_terms 个词，
+    矩阵可以保持稠密且很小；词表外的词对点积没有贡献，但仍计入候选
+    向量的范数（画像里没出现过的词按最大IDF计），得分就是完整的余弦相似度。
+    """
+
+    def __init__(self, texts, max_terms=5000):
+        """
+        Args:
+            texts: 已保留论文的文本列表
+            max_terms: 词表大小上限
+        """
+        import numpy as np
+
+        docs = [Counter(tokenize(text)) for text in texts]
+        self.size = len(docs)
+        df = Counter()
+        for doc in docs:
+            df.update(doc.keys())
+
+        # 平滑IDF：出现在所有文档中的词权重也不为0
+        idf = {term: math.log((1 + self.size) / (1 + count)) + 1 for term, count in df.items()}
+        self.term_idf = idf
+        self.default_idf = math.log(1 + self.size) + 1  # 画像中没出现过的词
+        weights = Counter()
+        for doc in docs:
+            total = sum(doc.values()) or 1
+            for term, count in doc.items():
+                weights[term] += count / total * idf[term]
+
+        terms = [term for term, _ in weights.most_common(max_terms)]
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        profile = np.array([weights[term] for term in terms], dtype=np.float32)
+        norm = np.linalg.norm(profile)
+        self.vector = profile / norm if norm else profile
+
+    def score(self, texts):
+        """
+        计算一批候选文本与画像的余弦相似度
+
+        Returns:
+            numpy数组，与 texts 一一对应，取值在 [0, 1]
+        """
+        import numpy as np
+
+        matrix = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        norms = np.ones(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            total = sum(counts.values())
+            if not total:
+                continue
+            squared = 0.0
+            for term, count in counts.items():
+                weight = count / total * self.term_idf.get(term, self.default_idf)
+                squared += weight * weight
+                col = self.vocab.get(term)
+                if col is not None:
+                    matrix[row, col] = weight
+            norms[row] = math.sqrt(squared)
+        return (matrix @ self.vector) / norms
+
+
+def select_relevant(scores, top_k=0, threshold=0.0):
+    """
+    选出要下载的候选
+
+    Args:
+        scores: 相关性得分数组
+        top_k: 最多保留的篇数，0表示不限
+        threshold: 最低得分，0表示不限
+
+    Returns:
+        保留的下标列表（得分从高到低）
+    """
+    import numpy as np
+
+    order = np.argsort(-scores, kind="stable")
+    if threshold:
+        order = order[scores[order] >= threshold]
+    if top_k:
+        order = order[:top_k]
+    return order.tolist()
@@ -0,0 +1,217 @@
+import os
+import json
+import threading
+
+
+def apply_event(config, event, downloaded_ids):
+    """
+    把一条状态事件应用到配置字典上（所有事件都是幂等的，可重复回放）
+
+    Args:
+        config: 配置字典
+        event: 事件字典，op 字段决定类型
+        downloaded_ids: 已下载论文ID集合（不在配置快照里）
+    """
+    op = event.get("op")
+    if op == "downloaded":
+        downloaded_ids.add(event["id"])
+    elif op == "watermark":
+        config.setdefault("query_last_check", {})[event["query"]] = event["value"]
+    elif op == "set":
+        config[event["key"]] = event["value"]
+    elif op == "query_add":
+        if event["query"] not in config["search_queries"]:
+            config["search_queries"].append(event["query"])
+    elif op == "query_remove":
+        if event["query"] in config["search_queries"]:
+            config["search_queries"].remove(event["query"])
+        config.get("query_last_check", {}).pop(event["query"], None)
+
+
+class StateJournal:
+    """
+    配置状态的追加日志
+
+    每次状态变化（下载记录、查询检查时间、增删查询）追加一行JSON并fsync，
+    写入开销与配置大小无关；启动时在快照上回放日志，日志积累到一定数量后
+    在后台线程里把完整状态原子地写成新快照并截断日志。
+    """
+
+    def __init__(self, snapshot_file, compact_every=500):
+        """
+        Args:
+            snapshot_file: 快照文件路径（即配置文件）
+            compact_every: 日志累计多少条事件后触发后台压缩
+        """
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file + ".journal"
+        self.compacting_file = snapshot_file + ".journal.compacting"
+        self.backup_file = snapshot_file + ".bak"
+        self.compact_every = compact_every
+        self.pending_events = 0
+        self.lock = threading.Lock()
+        self.handle = None
+        self.compact_thread = None
+
+    def read_snapshot(self):
+        """
+        读取快照，主快照损坏时退回到上一次的备份快照
+
+        Returns:
+            配置字典；快照不存在时返回None
+        """
+        if not os.path.exists(self.snapshot_file):
+            # 快照替换过程中崩溃时主快照可能暂时不存在
+            if not os.path.exists(self.backup_file):
+                return None
+            with open(self.backup_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            if not os.path.exists(self.backup_file):
+                raise RuntimeError(f"配置文件 {self.snapshot_file} 已损坏且没有可用备份: {e}") from e
+            with open(self.backup_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+    def replay(self, config, downloaded_ids):
+        """
+        在快照上按顺序回放未压缩的日志（包括中断的压缩留下的日志）
+
+        Args:
+            config: 从快照加载并补全默认值后的配置字典
+            downloaded_ids: 已下载论文ID集合
+
+        Returns:
+            回放的事件数
+        """
+        count = 0
+        for path in (self.compacting_file, self.journal_file):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # 崩溃时写了一半的最后一行，直接丢弃
+                        continue
+                    apply_event(config, event, downloaded_ids)
+                    count += 1
+        self.pending_events = count
+        return count
+
+    def append(self, event):
+        """
+        追加一条事件并刷到磁盘
+
+        Args:
+            event: 事件字典
+        """
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            if self.handle is None:
+                self.handle = open(self.journal_file, 'a', encoding='utf-8')
+                if self.ends_with_torn_line():
+                    # 不要把新事件接在崩溃留下的半行后面
+                    line = "\n" + line
+            self.handle.write(line)
+            self.handle.flush()
+            os.fsync(self.handle.fileno())
+            self.pending_events += 1
+
+    def ends_with_torn_line(self):
+        """日志文件是否以不完整的一行结尾"""
+        with open(self.journal_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def should_compact(self):
+        """日志累计的事件数是否达到压缩阈值"""
+        return self.pending_events >= self.compact_every and not self.compacting()
+
+    def compacting(self):
+        """是否有后台压缩正在进行"""
+        return self.compact_thread is not None and self.compact_thread.is_alive()
+
+    def compact(self, config, background=False):
+        """
+        把当前完整状态写成新快照并截断日志
+
+        序列化和日志轮转在锁内完成，保证快照与日志切分点一致；
+        写文件和fsync可以放到后台线程。
+
+        Args:
+            config: 当前配置字典
+            background: 是否在后台线程里写快照
+        """
+        self.wait()
+        with self.lock:
+            data = json.dumps(config, indent=2, ensure_ascii=False)
+            self.rotate_journal()
+            self.pending_events = 0
+
+        if background:
+            self.compact_thread = threading.Thread(target=self.write_snapshot, args=(data,), daemon=True)
+            self.compact_thread.start()
+        else:
+            self.write_snapshot(data)
+
+    def rotate_journal(self):
+        """把当前日志移到压缩中文件（调用方持有锁）"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        if not os.path.exists(self.journal_file):
+            return
+        if os.path.exists(self.compacting_file):
+            # 上一次压缩没有完成，把新日志接到后面
+            with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                    open(self.compacting_file, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.remove(self.journal_file)
+        else:
+            os.replace(self.journal_file, self.compacting_file)
+
+    def write_snapshot(self, data):
+        """
+        原子地替换快照文件，成功后删除已被快照包含的日志
+
+        Args:
+            data: 序列化好的配置JSON文本
+        """
+        folder = os.path.dirname(os.path.abspath(self.snapshot_file))
+        tmp_file = self.snapshot_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(self.snapshot_file):
+            os.replace(self.snapshot_file, self.backup_file)
+        os.replace(tmp_file, self.snapshot_file)
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        if os.path.exists(self.compacting_file):
+            os.remove(self.compacting_file)
+
+    def wait(self):
+        """等待后台压缩完成"""
+        if self.compact_thread is not None:
+            self.compact_thread.join()
+            self.compact_thread = None
+
+    def close(self):
+        """等待后台压缩并关闭日志文件"""
+        self.wait()
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+from datetime import datetime, timedelta
+
+
+class StorageIndex:
+    """
+    下载目录的增量存储统计索引
+
+    按文件夹记录PDF文件数和字节数，下载或删除文件时增量更新，
+    统计视图只需遍历文件夹条目而不用扫描整个目录树。
+    文件夹里的PDF多为指向对象库的链接，实际占用的空间单独按对象库统计。
+    对象库中压缩归档的冷数据（.pdf.xz）单独统计。
+    外部改动造成的偏差由 reconcile() 全量扫描修复。
+
+    多个工作进程共用同一个下载目录时各自的增量会互相覆盖，工作进程
+    以只读方式打开索引：不写索引文件，只留下 .storage_index.stale 标记，
+    下次查看统计时全量校准。
+    """
+
+    INDEX_FILENAME = ".storage_index.json"
+    STALE_FILENAME = ".storage_index.stale"
+    ROOT_KEY = "."
+    ARCHIVE_SUFFIX = ".pdf.xz"
+
+    def __init__(self, download_path, objects_path=None, read_only=False):
+        """
+        Args:
+            download_path: 下载根目录
+            objects_path: 对象库目录，缺省为下载根目录下的 .objects；可以在下载目录之外（多个配置共用）
+            read_only: 不写索引文件（下载目录由多个进程共用）
+        """
+        self.download_path = download_path
+        self.objects_path = objects_path or os.path.join(download_path, ".objects")
+        self.read_only = read_only
+        self.index_file = os.path.join(download_path, self.INDEX_FILENAME)
+        self.stale_file = os.path.join(download_path, self.STALE_FILENAME)
+        self.folders = {}
+        self.unique = {"files": 0, "bytes": 0}
+        self.archive = {"files": 0, "bytes": 0}
+        self.reconciled_at = None
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """从磁盘加载索引，文件不存在或损坏时保持为空"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.folders = data.get("folders", {})
+            self.unique = data.get("unique", self.unique)
+            self.archive = data.get("archive", self.archive)
+            # 旧版索引没有实际占用统计，需要重新校准
+            self.reconciled_at = data.get("reconciled_at") if "unique" in data else None
+        except (OSError, ValueError):
+            self.folders = {}
+            self.reconciled_at = None
+
+    def save(self):
+        """把索引原子地写回磁盘（仅在有变化时）；只读时改为标记索引需要校准"""
+        if not self.dirty:
+            return
+        os.makedirs(self.download_path, exist_ok=True)
+        if self.read_only:
+            with open(self.stale_file, 'a'):
+                pass
+            os.utime(self.stale_file)
+            self.dirty = False
+            return
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"folders": self.folders, "unique": self.unique, "archive": self.archive,
+                       "reconciled_at": self.reconciled_at}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+        self.dirty = False
+
+    def folder_key(self, filepath):
+        """文件所在文件夹相对于下载根目录的键"""
+        folder = os.path.relpath(os.path.dirname(os.path.abspath(filepath)), os.path.abspath(self.download_path))
+        return self.ROOT_KEY if folder in ("", os.curdir) else folder.replace(os.sep, "/")
+
+    def record_object(self, size, delta=1):
+        """
+        记录对象库中新增（delta=1）或删除（delta=-1）的PDF对象
+
+        Args:
+            size: 对象字节数
+        """
+        self.unique["files"] = max(0, self.unique["files"] + delta)
+        self.unique["bytes"] = max(0, self.unique["bytes"] + delta * size)
+        self.dirty = True
+
+    def record_archive(self, size, delta=1):
+        """
+        记录新增（delta=1）或删除（delta=-1）的压缩归档
+
+        Args:
+            size: 归档文件字节数
+        """
+        self.archive["files"] = max(0, self.archive["files"] + delta)
+        self.archive["bytes"] = max(0, self.archive["bytes"] + delta * size)
+        self.dirty = True
+
+    def record_add(self, filepath, size):
+        """
+        记录文件夹中新增的PDF文件（视图链接）
+
+        Args:
+            filepath: 文件路径
+            size: 文件字节数
+        """
+        entry = self.folders.setdefault(self.folder_key(filepath), {"files": 0, "bytes": 0})
+        entry["files"] += 1
+        entry["bytes"] += size
+        self.dirty = True
+
+    def record_remove(self, filepath, size):
+        """
+        记录文件夹中被删除的PDF文件（视图链接）
+
+        Args:
+            filepath: 文件路径
+            size: 文件字节数
+        """
+        key = self.folder_key(filepath)
+        entry = self.folders.get(key)
+        if entry is None:
+            return
+        entry["files"] = max(0, entry["files"] - 1)
+        entry["bytes"] = max(0, entry["bytes"] - size)
+        if entry["files"] == 0:
+            del self.folders[key]
+        self.dirty = True
+
+    def needs_reconcile(self, max_age_hours):
+        """索引从未校准过、有其他进程改动过下载目录，或上次校准已超过 max_age_hours 小时"""
+        if self.reconciled_at is None or os.path.exists(self.stale_file):
+            return True
+        if not max_age_hours:
+            return False
+        try:
+            last = datetime.fromisoformat(self.reconciled_at)
+        except ValueError:
+            return True
+        return datetime.now() - last > timedelta(hours=max_age_hours)
+
+    def reconcile(self):
+        """
+        全量扫描下载目录和对象库，修复索引与磁盘之间的偏差
+
+        对象库在下载目录之外（共用对象库）时也单独扫描，否则实际占用只剩
+        独立文件，配额永远不会触发淘汰。
+
+        Returns:
+            发生偏差的文件夹数
+        """
+        started = time.time()
+        folders = {}
+        unique = {"files": 0, "bytes": 0}
+        archive = {"files": 0, "bytes": 0}
+        download_path = os.path.abspath(self.download_path)
+        objects_path = os.path.abspath(self.objects_path)
+        stack = [download_path]
+        if not objects_path.startswith(download_path + os.sep):
+            stack.append(objects_path)
+        while stack:
+            path = stack.pop()
+            in_objects = path == objects_path or path.startswith(objects_path + os.sep)
+            files = 0
+            total = 0
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif in_objects and entry.name.endswith(self.ARCHIVE_SUFFIX):
+                            archive["files"] += 1
+                            archive["bytes"] += entry.stat().st_size
+                        elif entry.name.endswith('.pdf'):
+                            stat = entry.stat()
+                            if in_objects or (not entry.is_symlink() and stat.st_nlink == 1):
+                                # 对象文件，或者没有链接到对象库的独立文件
+                                unique["files"] += 1
+                                unique["bytes"] += stat.st_size
+                            files += 1
+                            total += stat.st_size
+            except OSError:
+                continue
+            if files and not in_objects:
+                folders[self.folder_key(os.path.join(path, "_"))] = {"files": files, "bytes": total}
+
+        drift = sum(1 for key in set(folders) | set(self.folders)
+                    if folders.get(key) != self.folders.get(key))
+        self.folders = folders
+        self.unique = unique
+        self.archive = archive
+        self.reconciled_at = datetime.now().isoformat()
+        self.dirty = True
+        self.save()
+        if not self.read_only:
+            # 扫描开始后才留下的标记说明又有改动，保留到下次校准
+            try:
+                if os.path.getmtime(self.stale_file) < started:
+                    os.remove(self.stale_file)
+            except OSError:
+                pass
+        return drift
+
+    def totals(self):
+        """返回实际占用的 (PDF文件数, 字节数)，链接到同一对象的视图只算一次"""
+        return self.unique["files"], self.unique["bytes"]
+
+    def archive_totals(self):
+        """返回压缩归档的 (文件数, 字节数)"""
+        return self.archive["files"], self.archive["bytes"]
@@ -0,0 +1,91 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# 仓库是平铺的顶层模块，测试直接从仓库根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_pdf(text):
+    """内容可区分的最小合法PDF字节"""
+    return b"%PDF-1.4\n" + text.encode('utf-8') + b"\n%%EOF\n"
+
+
+def make_paper(paper_id, title="A Study of Things", version=1, query="cat:cs.LG", summary="about things"):
+    from paper import Paper
+
+    published = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    return Paper.create(paper_id, title, ["Ada Lovelace"], published, f"http://arxiv.org/pdf/{paper_id}v{version}",
+                        ["cs.LG"], query, summary, version=version)
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for start in range(0, len(self.content), size):
+            yield self.content[start:start + size]
+
+
+@pytest.fixture
+def pdf_server(monkeypatch):
+    """
+    替换 requests.get：按URL返回 pdf_server 字典里登记的内容
+
+    Returns:
+        {URL: PDF字节}，测试往里登记要"下载"的文件
+    """
+    import requests
+
+    files = {}
+
+    def fake_get(url, **kwargs):
+        if url not in files:
+            raise requests.HTTPError(f"404 {url}")
+        return FakeResponse(files[url])
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    return files
+
+
+@pytest.fixture
+def make_monitor(tmp_path, monkeypatch):
+    """
+    在临时目录里创建 ArxivMonitor（下载目录为 tmp_path/papers），用完自动关闭
+
+    Returns:
+        make_monitor(name="arxiv_config.json", **配置项) → ArxivMonitor
+    """
+    from main import ArxivMonitor
+
+    monkeypatch.chdir(tmp_path)
+    monitors = []
+
+    def make(name="arxiv_config.json", **settings):
+        config_file = str(tmp_path / name)
+        monitor = ArxivMonitor(config_file)
+        if settings or monitor.config["download_path"] != str(tmp_path / "papers"):
+            # 下载目录决定了存储索引等的位置，改完配置后重新打开
+            monitor.config["download_path"] = str(tmp_path / "papers")
+            monitor.config.update(settings)
+            monitor.save_config()
+            monitor.close()
+            monitor = ArxivMonitor(config_file)
+        monitors.append(monitor)
+        return monitor
+
+    yield make
+    for monitor in monitors:
+        monitor.close()
@@ -0,0 +1,57 @@
+from conftest import make_paper, make_pdf
+
+
+def test_failed_download_backs_off_and_is_dropped_after_max_attempts(make_monitor, pdf_server, monkeypatch):
+    monitor = make_monitor(download_max_attempts=3, download_retry_minutes=1)
+    paper = make_paper("2507.00002")
+    now = [1_000_000]
+    monkeypatch.setattr("time.time", lambda: now[0])
+
+    assert monitor.defer_download(paper, [paper.query], failed=True)
+    # 还没到重试时间，排空队列时跳过它
+    assert monitor.drain_download_queue(force=True)["remaining"] == 1
+    assert monitor.paper_store.queued(due_ts=now[0]) == []
+
+    # 第二次失败后间隔翻倍
+    now[0] += 60
+    result = monitor.drain_download_queue(force=True)
+    assert (result["failed_downloads"], result["remaining"]) == (0, 1)
+    now[0] += 60
+    assert monitor.paper_store.queued(due_ts=now[0]) == []
+
+    # 第三次失败达到上限，移出队列并计为失败
+    now[0] += 60
+    result = monitor.drain_download_queue(force=True)
+    assert (result["failed_downloads"], result["remaining"]) == (1, 0)
+
+
+def test_queued_download_succeeds_once_server_recovers(make_monitor, pdf_server):
+    monitor = make_monitor(download_retry_minutes=0)
+    paper = make_paper("2507.00003")
+    assert monitor.defer_download(paper, [paper.query], failed=True)
+
+    pdf_server[paper.pdf_url] = make_pdf("recovered")
+    result = monitor.drain_download_queue(force=True)
+    assert [p["id"] for p in result["downloaded"]] == [paper.id]
+    assert result["remaining"] == 0
+
+
+def test_download_row_is_committed_before_event_is_journaled(make_monitor, pdf_server, monkeypatch):
+    monitor = make_monitor()
+    paper = make_paper("2507.00004")
+    pdf_server[paper.pdf_url] = make_pdf("body")
+    assert monitor.download_paper(paper)
+
+    seen = []
+
+    def record_event(kind, **fields):
+        # 下载事件落盘的那一刻，另一个连接已能读到论文行
+        from paper_store import PaperStore
+
+        other = PaperStore(monitor.config_file + ".db")
+        seen.append((kind, other.get(paper.id) is not None))
+        other.close()
+
+    monkeypatch.setattr(monitor, "record_event", record_event)
+    monitor.record_download(paper, [paper.query])
+    assert seen == [("downloaded", True)]
@@ -0,0 +1,43 @@
+import glob
+import gzip
+import json
+
+from conftest import make_paper
+
+
+def exported_ids(out_dir):
+    ids = []
+    for path in sorted(glob.glob(f"{out_dir}/published_month=*/part-*.jsonl.gz")):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            ids.extend(json.loads(line)["id"] for line in f)
+    return ids
+
+
+def test_incremental_export_only_writes_papers_stored_since_watermark(make_monitor, monkeypatch, tmp_path):
+    monitor = make_monitor()
+    out_dir = str(tmp_path / "export")
+    now = [1_750_000_000]
+    monkeypatch.setattr("time.time", lambda: now[0])
+
+    monitor.paper_store.upsert(make_paper("2507.00001"))
+    monitor.paper_store.upsert(make_paper("2507.00002"))
+    now[0] += 10
+    first = monitor.export_metadata(out_dir, fmt="jsonl")
+    assert (first["rows"], first["since"], first["watermark"]) == (2, None, now[0] - 1)
+
+    # 没有变化的论文重新写入不改写入时间；新论文和新版本进入下一次导出
+    now[0] += 10
+    monitor.paper_store.upsert(make_paper("2507.00001"))
+    monitor.paper_store.upsert(make_paper("2507.00002", version=2))
+    monitor.paper_store.upsert(make_paper("2507.00003"))
+    # 与导出同一秒写入的论文留给下一次
+    now[0] += 10
+    monitor.paper_store.upsert(make_paper("2507.00004"))
+    second = monitor.export_metadata(out_dir, fmt="jsonl")
+    assert (second["rows"], second["since"]) == (2, first["watermark"])
+    assert sorted(exported_ids(out_dir)) == ["2507.00001", "2507.00002", "2507.00002", "2507.00003"]
+
+    now[0] += 10
+    third = monitor.export_metadata(out_dir, fmt="jsonl")
+    assert third["rows"] == 1
+    assert monitor.export_metadata(out_dir, fmt="jsonl", full=True)["rows"] == 4
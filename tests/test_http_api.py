@@ -0,0 +1,62 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from conftest import make_paper
+from http_api import PaperApi
+from paper_store import PaperStore
+
+
+@pytest.fixture
+def api(tmp_path):
+    store = PaperStore(str(tmp_path / "arxiv_config.json.db"))
+    store.upsert(make_paper("2507.00001"))
+    store.commit()
+    server = PaperApi(store, port=0)
+    server.start()
+    yield server
+    server.stop()
+    store.close()
+
+
+def get(api, path, etag=None):
+    """Returns: (状态码, ETag, 响应JSON或None)"""
+    host, port = api.address
+    request = urllib.request.Request(f"http://{host}:{port}{path}")
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers["ETag"], json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        return e.code, e.headers["ETag"], json.loads(body) if body else None
+
+
+def test_unchanged_library_answers_304(api):
+    status, etag, body = get(api, "/papers/2507.00001")
+    assert (status, body["id"]) == (200, "2507.00001")
+    assert get(api, "/papers/2507.00001", etag) == (304, etag, None)
+    assert get(api, "/queries", etag)[0] == 304
+
+
+def test_commit_from_another_connection_changes_etag(api, tmp_path):
+    _, etag, _ = get(api, "/papers/2507.00001")
+    # 同一配置下的一次性 check 在另一个进程里写入
+    other = PaperStore(str(tmp_path / "arxiv_config.json.db"))
+    other.upsert(make_paper("2507.00002"))
+    other.commit()
+    other.close()
+
+    status, new_etag, body = get(api, "/papers/2507.00002", etag)
+    assert (status, body["id"]) == (200, "2507.00002")
+    assert new_etag != etag
+
+
+def test_errors_carry_no_etag(api):
+    status, etag, body = get(api, "/papers/2507.09999")
+    assert (status, etag) == (404, None)
+    assert "error" in body
+    assert get(api, "/papers?since=99999999999999999999")[0] == 400
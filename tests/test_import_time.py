@@ -0,0 +1,43 @@
+import os
+import re
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cron/systemd 触发的一次性 `check` 每次都要付 `import main` 的代价。
+# 7703d70 时约 22ms；预算留出机器差异的余量，可用环境变量覆盖
+BUDGET_MS = float(os.environ.get("ARXIV_IMPORT_BUDGET_MS", 80))
+
+# 只在对应子命令里用到的模块，不应该被 `import main` 顺带导入
+LAZY_MODULES = (
+    "requests", "schedule", "plyer", "xml.etree.ElementTree", "numpy", "pyarrow", "pypdf",
+    "multiprocessing", "concurrent.futures.process", "config", "http_api",
+    "pdf_verify", "text_extract", "near_dup", "relevance", "vector_index", "exporter",
+)
+
+
+def run_python(*args):
+    # 允许写字节码缓存，否则每次都要重新编译 main.py，量到的是编译时间
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_time_ms():
+    """`python -X importtime -c "import main"` 报告的 main 累计导入耗时（毫秒）"""
+    stderr = run_python("-X", "importtime", "-c", "import main").stderr
+    match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| main$", stderr, re.M)
+    assert match, stderr
+    return int(match.group(1)) / 1000
+
+
+def test_import_main_within_budget():
+    run_python("-c", "import main")  # 预热字节码缓存和文件系统缓存
+    best = min(import_time_ms() for _ in range(3))
+    assert best <= BUDGET_MS, f"import main 耗时 {best:.1f}ms，超出预算 {BUDGET_MS:.0f}ms"
+
+
+def test_import_main_defers_optional_modules():
+    code = f"import sys, main; print('\\n'.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    loaded = run_python("-c", code).stdout.split()
+    assert loaded == [], f"import main 时提前导入了: {', '.join(loaded)}"
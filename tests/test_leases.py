@@ -0,0 +1,43 @@
+from lease_store import LeaseStore
+
+
+def test_advance_watermark_tells_lost_lease_from_unchanged_watermark(tmp_path):
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.sync_queries(["cat:cs.LG"])
+    assert leases.claim("a", 5, 60, 24) == [("cat:cs.LG", None)]
+
+    assert leases.advance_watermark("cat:cs.LG", "a", "2025-07-02T00:00:00") == "advanced"
+    # 这一轮没有推进水位线，租约仍然有效
+    assert leases.advance_watermark("cat:cs.LG", "a", "2025-07-02T00:00:00") == "unchanged"
+    assert leases.advance_watermark("cat:cs.LG", "a", "2025-07-01T00:00:00") == "unchanged"
+    # 不是持有者
+    assert leases.advance_watermark("cat:cs.LG", "b", "2025-07-03T00:00:00") == "lost"
+    assert leases.status()[0]["watermark"] == "2025-07-02T00:00:00"
+    leases.close()
+
+
+def test_expired_lease_is_taken_over(tmp_path, monkeypatch):
+    now = [1_750_000_000.0]
+    monkeypatch.setattr("time.time", lambda: now[0])
+    leases = LeaseStore(str(tmp_path / "leases.db"))
+    leases.sync_queries(["cat:cs.LG", "cat:cs.CV"])
+
+    assert sorted(q for q, _ in leases.claim("a", 5, 60, 24)) == ["cat:cs.CV", "cat:cs.LG"]
+    # 租约有效期内其他进程认领不到
+    assert leases.claim("b", 5, 60, 24) == []
+    now[0] += 30
+    assert leases.renew("a", 60) == 2
+
+    # a 卡死，续约后的租约过期，b 接管
+    now[0] += 61
+    assert sorted(q for q, _ in leases.claim("b", 5, 60, 24)) == ["cat:cs.CV", "cat:cs.LG"]
+    assert leases.renew("a", 60) == 0
+    assert leases.advance_watermark("cat:cs.LG", "a", "2025-07-02T00:00:00") == "lost"
+    assert leases.advance_watermark("cat:cs.LG", "b", "2025-07-02T00:00:00") == "advanced"
+    assert {s["query"]: s["owner"] for s in leases.status()} == {"cat:cs.CV": "b", "cat:cs.LG": "b"}
+
+    leases.release("b")
+    assert [s["owner"] for s in leases.status()] == [None, None]
+    # 水位线已在检查间隔内，释放后也不会被再次认领
+    assert [q for q, _ in leases.claim("a", 5, 60, 24 * 365 * 100)] == ["cat:cs.CV"]
+    leases.close()
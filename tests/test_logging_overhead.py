@@ -0,0 +1,52 @@
+import time
+import logging
+import logging.handlers
+
+import logging_setup
+
+CALLS = 1000
+FLUSH_DELAY = 0.0005  # 模拟慢盘：每次flush 0.5ms
+
+
+def slow_flush(handler):
+    time.sleep(FLUSH_DELAY)
+    logging.StreamHandler.flush(handler)
+
+
+def per_call_seconds(logger):
+    """下载路径上那行日志在调用方线程里的平均耗时（秒）"""
+    start = time.perf_counter()
+    for i in range(CALLS):
+        logger.info("下载完成: %s -> %s", f"2507.{i:05d}", "papers/cs.LG/A Study of Things.pdf")
+    return (time.perf_counter() - start) / CALLS
+
+
+def test_queue_logging_does_not_block_caller_on_slow_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(logging.handlers.RotatingFileHandler, "flush", slow_flush)
+
+    # 对照：同步写文件，调用方每条都要等flush
+    direct = logging.getLogger("bench.direct")
+    direct.propagate = False
+    direct.setLevel(logging.INFO)
+    handler = logging.handlers.RotatingFileHandler(str(tmp_path / "direct.log"), maxBytes=10 * 1024 * 1024,
+                                                   backupCount=5, encoding='utf-8')
+    direct.addHandler(handler)
+    try:
+        sync_cost = per_call_seconds(direct)
+    finally:
+        direct.removeHandler(handler)
+        handler.close()
+
+    # 本进程里之前的测试可能已经配置过日志，重新配置到临时目录
+    logging_setup.stop_logging()
+    logging_setup.setup_logging(str(tmp_path / "queued.log"))
+    try:
+        queued_cost = per_call_seconds(logging.getLogger("bench.queued"))
+    finally:
+        logging_setup.stop_logging()
+
+    assert sync_cost >= FLUSH_DELAY
+    assert queued_cost < sync_cost / 5, \
+        f"队列 {queued_cost * 1e6:.1f} us/条，同步 {sync_cost * 1e6:.1f} us/条"
+    with open(tmp_path / "queued.log", encoding='utf-8') as f:
+        assert sum(1 for _ in f) == CALLS
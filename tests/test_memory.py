@@ -0,0 +1,65 @@
+import random
+import tracemalloc
+from datetime import datetime, timezone
+
+from id_set import CompactIdSet
+from paper import Paper
+
+ENTRIES = 5000
+WORDS = ("model learning neural network training data graph attention transformer language image "
+         "representation optimization benchmark inference robust efficient sparse diffusion policy "
+         "reinforcement generalization evaluation dataset adversarial latent embedding retrieval").split()
+
+
+def parsed_entries(count):
+    """模拟 arXiv API 解析出的字段：每条都是新字符串，摘要约 1.3KB"""
+    rng = random.Random(0)
+    for i in range(count):
+        yield {
+            "id": f"2507.{i:05d}",
+            "title": " ".join(rng.choices(WORDS, k=10)).title(),
+            "authors": [f"Author {rng.randrange(10000)}" for _ in range(5)],
+            "published": datetime(2025, 7, 1, rng.randrange(24), tzinfo=timezone.utc),
+            "summary": " ".join(rng.choices(WORDS, k=150)),
+            "pdf_url": f"http://arxiv.org/pdf/2507.{i:05d}v1",
+            "categories": ["cs." + "LG CV CL AI".split()[i % 4], "stat.ML"],
+            "query": "".join(["cat:", "cs.LG"]),
+        }
+
+
+def retained_bytes(build):
+    """build() 返回的对象保留下来的堆内存字节数"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def test_paper_records_use_less_memory_than_dicts():
+    # 回填几万篇时，每篇一个dict（带时区的datetime、列表、完整摘要）占主要内存
+    as_dicts = retained_bytes(lambda: list(parsed_entries(ENTRIES)))
+    as_papers = retained_bytes(lambda: [
+        Paper.create(e["id"], e["title"], e["authors"], e["published"], e["pdf_url"], e["categories"],
+                     e["query"], e["summary"])
+        for e in parsed_entries(ENTRIES)
+    ])
+    assert as_papers < as_dicts * 0.6, f"Paper {as_papers / ENTRIES:.0f} B/篇，dict {as_dicts / ENTRIES:.0f} B/篇"
+
+
+def test_compact_id_set_uses_less_memory_than_str_set(tmp_path):
+    ids = [f"{2000 + i // 20000:04d}.{i % 20000:05d}" for i in range(100000)]
+    as_set = retained_bytes(lambda: set(ids))
+
+    def build():
+        id_set = CompactIdSet(str(tmp_path / "ids"))
+        id_set.update(ids)
+        id_set.flush()
+        return id_set
+
+    as_compact = retained_bytes(build)
+    assert as_compact < as_set * 0.1, f"CompactIdSet {as_compact} B，set {as_set} B"
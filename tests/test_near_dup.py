@@ -0,0 +1,38 @@
+from conftest import make_paper
+
+SUMMARY = ("We propose a sparse attention transformer for long document retrieval that scales linearly "
+           "with sequence length and matches dense attention on standard benchmarks while using far less "
+           "memory during training and inference.")
+
+
+def test_near_duplicates_of_library_and_batch_are_flagged(make_monitor):
+    monitor = make_monitor(near_duplicate_action="flag")
+    original = make_paper("2507.00001", "Sparse Attention Transformers for Long Documents", summary=SUMMARY)
+    monitor.record_download(original)
+
+    resubmitted = make_paper("2507.00002", "Sparse Attention Transformers for Long Documents.",
+                             summary=SUMMARY.replace("far less", "much less"))
+    unrelated = make_paper("2507.00003", "Graph Neural Networks for Molecules",
+                           summary="Message passing networks predict molecular properties from atom graphs.")
+    same_batch = make_paper("2507.00004", "Graph Neural Networks for Molecules",
+                            summary="Message passing networks predict molecular properties from atom graphs")
+
+    kept, duplicates = monitor.filter_near_duplicates([resubmitted, unrelated, same_batch])
+    # flag 只标出，不跳过
+    assert kept == [resubmitted, unrelated, same_batch]
+    assert [(d["id"], d["duplicate_of"]) for d in duplicates] == [("2507.00002", "2507.00001"),
+                                                                  ("2507.00004", "2507.00003")]
+    assert all(d["similarity"] >= 0.7 for d in duplicates)
+
+
+def test_skip_drops_near_duplicates(make_monitor):
+    monitor = make_monitor(near_duplicate_action="skip")
+    original = make_paper("2507.00001", "Sparse Attention Transformers for Long Documents", summary=SUMMARY)
+    monitor.record_download(original)
+
+    resubmitted = make_paper("2507.00002", "Sparse Attention Transformers for Long Documents", summary=SUMMARY)
+    unrelated = make_paper("2507.00003", "Graph Neural Networks for Molecules",
+                           summary="Message passing networks predict molecular properties from atom graphs.")
+    kept, duplicates = monitor.filter_near_duplicates([resubmitted, unrelated])
+    assert kept == [unrelated]
+    assert [d["id"] for d in duplicates] == ["2507.00002"]
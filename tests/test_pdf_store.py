@@ -0,0 +1,47 @@
+import os
+
+from conftest import make_paper, make_pdf
+
+
+def test_identical_pdfs_share_one_object(make_monitor, pdf_server):
+    monitor = make_monitor()
+    first = make_paper("2507.00001", "First Copy", query="cat:cs.LG")
+    second = make_paper("2507.00002", "Second Copy", query="cat:cs.CV")
+    data = make_pdf("same bytes")
+    pdf_server[first.pdf_url] = data
+    pdf_server[second.pdf_url] = data
+
+    assert monitor.download_paper(first, queries=["cat:cs.LG", "cat:cs.AI"])
+    monitor.record_download(first, ["cat:cs.LG", "cat:cs.AI"])
+    assert monitor.download_paper(second)
+    monitor.record_download(second)
+
+    sha = monitor.paper_store.get_file(first.id)[0]
+    assert monitor.paper_store.get_file(second.id)[0] == sha
+    views = monitor.view_paths(first, ["cat:cs.LG", "cat:cs.AI"]) + monitor.view_paths(second, ["cat:cs.CV"])
+    assert all(monitor.pdf_store.is_view_of(view, sha) for view in views)
+    # 三个视图，一个对象
+    assert sum(entry["files"] for entry in monitor.storage_index.folders.values()) == 3
+    assert monitor.storage_index.totals() == (1, len(data))
+
+
+def test_rebuild_views_moves_links_without_downloading(make_monitor, pdf_server):
+    monitor = make_monitor()
+    paper = make_paper("2507.00003")
+    pdf_server[paper.pdf_url] = make_pdf("body")
+    assert monitor.download_paper(paper, queries=["cat:cs.LG", "cat:cs.AI"])
+    monitor.record_download(paper, ["cat:cs.LG", "cat:cs.AI"])
+    old_views = monitor.view_paths(paper, ["cat:cs.LG", "cat:cs.AI"])
+    sha = monitor.paper_store.get_file(paper.id)[0]
+
+    pdf_server.clear()
+    monitor.config["organize_by_query"] = False
+    assert monitor.rebuild_views(True) == (1, 1)
+
+    [root_view] = monitor.view_paths(paper, ["cat:cs.LG", "cat:cs.AI"])
+    assert os.path.dirname(root_view) == monitor.config["download_path"]
+    assert monitor.pdf_store.is_view_of(root_view, sha)
+    assert not any(os.path.exists(view) for view in old_views)
+    indexed = dict(monitor.storage_index.folders)
+    assert monitor.storage_index.reconcile() == 0
+    assert monitor.storage_index.folders == indexed == {".": {"files": 1, "bytes": len(make_pdf("body"))}}
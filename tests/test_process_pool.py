@@ -0,0 +1,20 @@
+import time
+import threading
+
+from process_pool import map_unordered
+
+
+def test_results_cover_every_task():
+    assert sorted(map_unordered(abs, (-i for i in range(50)), workers=2)) == list(range(50))
+
+
+def test_stop_cancels_queued_tasks():
+    stop = threading.Event()
+    started = time.monotonic()
+    results = []
+    for result in map_unordered(time.sleep, [0.2] * 200, workers=2, stop=stop):
+        results.append(result)
+        stop.set()
+    # 200个任务全跑完要20秒；停止后只等已经交给进程的那几个
+    assert len(results) < 10
+    assert time.monotonic() - started < 5
@@ -0,0 +1,43 @@
+import os
+
+from conftest import make_paper, make_pdf
+
+
+def tree_state(root):
+    """目录树中每个文件（日志除外）的 (路径, 大小, 修改时间)"""
+    state = set()
+    for folder, _, files in os.walk(root):
+        for name in files:
+            if name.endswith(".log"):
+                continue
+            stat = os.stat(os.path.join(folder, name))
+            state.add((os.path.relpath(os.path.join(folder, name), root), stat.st_size, stat.st_mtime_ns))
+    return state
+
+
+def test_quota_dry_run_is_read_only(make_monitor, pdf_server, tmp_path):
+    # 保留期为负：刚下载的论文也可以淘汰
+    monitor = make_monitor(storage_quota_mb=0.0003, storage_target_ratio=0.5, storage_keep_days=-1)
+    for paper_id in ("2507.00001", "2507.00002", "2507.00003"):
+        paper = make_paper(paper_id, f"Paper {paper_id}")
+        pdf_server[paper.pdf_url] = make_pdf(paper_id + "x" * 100)
+        assert monitor.download_paper(paper)
+        monitor.record_download(paper)
+    monitor.checkpoint()
+    monitor.storage_index.save()
+    used = monitor.storage_used()
+    assert used > 0.0003 * 1024 * 1024
+
+    before = (tree_state(str(tmp_path)), monitor.paper_store.revision())
+    plan = monitor.enforce_quota(dry_run=True)
+    # 降到配额的一半需要淘汰三篇中的两篇
+    assert plan["dry_run"] and len(plan["evicted"]) == 2
+    assert (tree_state(str(tmp_path)), monitor.paper_store.revision()) == before
+    assert not monitor.storage_index.dirty
+    assert monitor.storage_used() == used
+
+    # 真正执行时淘汰的正是演练列出的论文
+    result = monitor.enforce_quota()
+    assert result["evicted"] == plan["evicted"]
+    assert all(monitor.paper_store.tier(paper_id) == "evicted" for paper_id in result["evicted"])
+    assert monitor.storage_used() < used
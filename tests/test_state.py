@@ -0,0 +1,107 @@
+import json
+
+from id_set import CompactIdSet, decode_id, encode_id
+from state_journal import StateJournal
+
+IDS = ["2507.12345", "1412.3456", "0704.0001", "hep-th/9901001", "math.GT/0309136", "cond-mat/0001001v2"]
+
+
+def base_config():
+    return {"search_queries": ["cat:cs.LG"], "query_last_check": {}}
+
+
+def test_journal_replays_events_on_top_of_snapshot(tmp_path):
+    snapshot = str(tmp_path / "arxiv_config.json")
+    journal = StateJournal(snapshot)
+    journal.compact(base_config())
+    journal.append({"op": "downloaded", "id": "2507.00001"})
+    journal.append({"op": "watermark", "query": "cat:cs.LG", "value": "2025-07-01T00:00:00"})
+    journal.append({"op": "query_add", "query": "cat:cs.CV"})
+    journal.append({"op": "query_remove", "query": "cat:cs.LG"})
+    journal.close()
+    # 崩溃时写了一半的最后一行
+    with open(snapshot + ".journal", 'a', encoding='utf-8') as f:
+        f.write('{"op": "downloaded", "id": "2507.0')
+
+    journal = StateJournal(snapshot)
+    config, ids = journal.read_snapshot(), set()
+    assert journal.replay(config, ids) == 4
+    assert ids == {"2507.00001"}
+    assert config["search_queries"] == ["cat:cs.CV"]
+    assert config["query_last_check"] == {}
+
+    # 新事件不会接在半行后面
+    journal.append({"op": "set", "key": "first_run", "value": False})
+    journal.close()
+    config, ids = journal.read_snapshot(), set()
+    assert journal.replay(config, ids) == 5
+    assert config["first_run"] is False
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    snapshot = str(tmp_path / "arxiv_config.json")
+    journal = StateJournal(snapshot, compact_every=2)
+    config, ids = base_config(), set()
+    journal.compact(config)
+    for event in ({"op": "watermark", "query": "cat:cs.LG", "value": "2025-07-01T00:00:00"},
+                  {"op": "query_add", "query": "cat:cs.CV"}):
+        journal.append(event)
+        journal.replay(config, ids)
+    assert journal.should_compact()
+
+    journal.compact(config, background=True)
+    journal.wait()
+    assert not (tmp_path / "arxiv_config.json.journal").exists()
+    assert not (tmp_path / "arxiv_config.json.journal.compacting").exists()
+    with open(snapshot, encoding='utf-8') as f:
+        assert json.load(f) == config
+    # 上一个快照留作备份
+    with open(snapshot + ".bak", encoding='utf-8') as f:
+        assert json.load(f) == base_config()
+
+    fresh = StateJournal(snapshot)
+    assert fresh.replay(fresh.read_snapshot(), set()) == 0
+
+
+def test_interrupted_compaction_is_replayed(tmp_path):
+    snapshot = str(tmp_path / "arxiv_config.json")
+    journal = StateJournal(snapshot)
+    journal.compact(base_config())
+    journal.append({"op": "downloaded", "id": "2507.00001"})
+    with journal.lock:
+        # 日志已轮转，但新快照还没写完就崩溃
+        journal.rotate_journal()
+    journal.append({"op": "downloaded", "id": "2507.00002"})
+    journal.close()
+
+    ids = set()
+    StateJournal(snapshot).replay(journal.read_snapshot(), ids)
+    assert ids == {"2507.00001", "2507.00002"}
+
+
+def test_id_encoding_round_trips_new_and_legacy_ids():
+    # 版本号和旧式ID的学科子类不参与编码
+    expected = ["2507.12345", "1412.3456", "0704.0001", "hep-th/9901001", "math/0309136", "cond-mat/0001001"]
+    assert [decode_id(encode_id(paper_id)) for paper_id in IDS] == expected
+    # 2015年前后序号位数不同
+    assert encode_id("1412.34567") is None
+    assert encode_id("2507.1234") is None
+
+
+def test_compact_id_set_persists_across_reopen(tmp_path):
+    path = str(tmp_path / "ids")
+    ids = CompactIdSet(path)
+    ids.update(IDS[:3])
+    ids.flush()
+    ids.add(IDS[3])
+    ids.add("not-an-arxiv-id")
+    ids.flush()
+    ids.close()
+
+    reopened = CompactIdSet(path)
+    for paper_id in IDS[:4] + ["not-an-arxiv-id", "2507.12345v3"]:
+        assert paper_id in reopened, paper_id
+    assert "2507.12346" not in reopened
+    assert set(reopened) == set(IDS[:4]) | {"not-an-arxiv-id"}
+    assert len(reopened) == 5
+    reopened.close()
@@ -0,0 +1,23 @@
+import os
+
+from conftest import make_pdf
+from pdf_store import PdfStore
+from storage_index import StorageIndex
+
+
+def test_reconcile_counts_external_object_store(tmp_path):
+    download_path = str(tmp_path / "papers")
+    objects_path = str(tmp_path / "shared" / "objects")
+    store = PdfStore(download_path, objects_path)
+    data = make_pdf("shared object")
+    sha, created = store.put(data)
+    assert created
+    store.link(sha, os.path.join(download_path, "cs.LG", "A Study of Things.pdf"))
+    store.link(sha, os.path.join(download_path, "cs.CV", "A Study of Things.pdf"))
+
+    index = StorageIndex(download_path, store.objects_path)
+    index.reconcile()
+    # 两个视图链接到共用对象库里的同一个对象，只算一份
+    assert index.totals() == (1, len(data))
+    assert index.folders == {"cs.LG": {"files": 1, "bytes": len(data)},
+                             "cs.CV": {"files": 1, "bytes": len(data)}}
@@ -0,0 +1,48 @@
+import os
+
+from conftest import make_paper, make_pdf
+
+
+def test_update_with_new_title_replaces_old_views(make_monitor, pdf_server):
+    monitor = make_monitor()
+    old = make_paper("2507.00001", "Old Title", version=1)
+    pdf_server[old.pdf_url] = make_pdf("version one")
+    assert monitor.download_paper(old)
+    monitor.paper_store.upsert(old)
+    old_views = monitor.view_paths(old, [old.query])
+
+    new = make_paper("2507.00001", "Completely New Title", version=2)
+    pdf_server[new.pdf_url] = make_pdf("version two")
+    assert monitor.download_paper(new, replace=True, queries=[new.query])
+    monitor.paper_store.upsert(new)
+
+    new_views = monitor.view_paths(new, [new.query])
+    assert new_views != old_views
+    for view in old_views:
+        assert not os.path.exists(view)
+    for view in new_views:
+        with open(view, 'rb') as f:
+            assert f.read() == make_pdf("version two")
+
+    # 旧对象没有其他引用，已从对象库删除；增量统计与全量扫描一致
+    indexed = (dict(monitor.storage_index.folders), monitor.storage_index.totals())
+    assert monitor.storage_index.reconcile() == 0
+    assert (monitor.storage_index.folders, monitor.storage_index.totals()) == indexed
+    assert monitor.storage_index.totals() == (1, len(make_pdf("version two")))
+
+
+def test_version_check_starts_with_least_recently_checked(make_monitor, monkeypatch):
+    monitor = make_monitor()
+    ids = ["2507.00001", "2507.00002", "2507.00003"]
+    for paper_id in ids:
+        monitor.paper_store.upsert(make_paper(paper_id))
+    monitor.downloaded_ids.update(ids)
+    monitor.paper_store.mark_version_checked(["2507.00001"], 200)
+    monitor.paper_store.mark_version_checked(["2507.00003"], 100)
+
+    requested = []
+    monkeypatch.setattr(monitor, "fetch_papers", lambda params, *args: requested.append(params["id_list"]) or [])
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    monitor.check_for_updates(batch_size=1)
+    # 从未检查过的在前，其余按上次检查时间
+    assert requested == ["2507.00002", "2507.00003", "2507.00001"]
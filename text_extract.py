@@ -0,0 +1,57 @@
+import zlib
+
+from pdf_store import open_noatime
+from process_pool import map_unordered
+
+
+def extraction_available():
+    """是否安装了提取文本所需的 pypdf（可选依赖）"""
+    try:
+        import pypdf
+    except ImportError:
+        return False
+    return True
+
+
+def extract_text(task):
+    """
+    提取一个PDF的全文并压缩（在子进程中执行，参数和返回值都要能pickle）
+
+    Args:
+        task: (sha256, 文件路径)
+
+    Returns:
+        (sha256, zlib压缩的UTF-8文本或None, 错误描述或None)
+    """
+    sha256, path = task
+    try:
+        from pypdf import PdfReader
+        with open_noatime(path) as f:
+            reader = PdfReader(f)
+            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        return sha256, zlib.compress(text.encode('utf-8')), None
+    except Exception as e:
+        return sha256, None, f"{type(e).__name__}: {e}"
+
+
+def extract_texts(tasks, workers=None, on_result=None, stop=None):
+    """
+    在进程池中并行提取一批PDF的文本（任务可以是惰性生成器）
+
+    Args:
+        tasks: 可迭代的 (sha256, 文件路径)
+        workers: 进程数，缺省为CPU数
+        on_result: 每得到一个结果时调用 on_result(sha256, 压缩文本或None, 错误描述或None)
+        stop: threading.Event，置位后尽快结束（没处理的下次继续）
+
+    Returns:
+        (处理的文件数, 失败的文件数)
+    """
+    done_count = failed = 0
+    for sha256, text_z, error in map_unordered(extract_text, tasks, workers, stop=stop):
+        done_count += 1
+        if error:
+            failed += 1
+        if on_result:
+            on_result(sha256, text_z, error)
+    return done_count, failed
@@ -0,0 +1,233 @@
+import os
+import math
+import zlib
+from collections import Counter
+
+from relevance import tokenize
+
+# numpy 是可选依赖，只在建立或查询向量索引时按需导入
+
+DIM = 256
+
+_slots = {}
+
+
+def token_slot(token):
+    """词的特征哈希位置和符号（crc32 跨进程稳定，不受 PYTHONHASHSEED 影响）"""
+    slot = _slots.get(token)
+    if slot is None:
+        h = zlib.crc32(token.encode('utf-8'))
+        slot = _slots[token] = (h % DIM, 1.0 if h & 0x80000000 else -1.0)
+    return slot
+
+
+def vectorize(texts):
+    """
+    把一批文本转成L2归一化的特征哈希向量
+
+    词频取 1+log(tf)，带符号地累加到 DIM 维；整批用一次 np.add.at 填充。
+
+    Returns:
+        形状为 (len(texts), DIM) 的 float32 数组
+    """
+    import numpy as np
+
+    rows, cols, values = [], [], []
+    for row, text in enumerate(texts):
+        for token, count in Counter(tokenize(text)).items():
+            col, sign = token_slot(token)
+            rows.append(row)
+            cols.append(col)
+            values.append(sign * (1 + math.log(count)))
+    matrix = np.zeros((len(texts), DIM), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)),
+              np.array(values, dtype=np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def quantize(matrix):
+    """
+    按行缩放到 int8（每行最大绝对值映射为127）
+
+    只用于求余弦相似度，缩放系数不需要保存：查询时按量化后的行范数重新归一化。
+    """
+    import numpy as np
+
+    peaks = np.abs(matrix).max(axis=1, keepdims=True)
+    peaks[peaks == 0] = 1
+    return np.round(matrix / peaks * 127).astype(np.int8)
+
+
+class VectorIndex:
+    """
+    论文向量的磁盘索引（内存映射）
+
+    向量文件是 16 字节文件头加上按行追加的 int8 量化向量（每篇 DIM 字节），
+    论文ID按同样的顺序逐行写在 .ids 旁路文件里。新论文只追加，
+    不重写已有数据；查询时通过 numpy.memmap 分块读取，不把整个矩阵载入内存。
+    .mark 旁路文件记录已处理到的论文写入时间，增量更新只需查看这之后写入的论文。
+    （int8 转 float32 比 float16 快一个数量级，查询耗时主要就在这一步。）
+    """
+
+    MAGIC = b"ARXVEC1\0"
+    HEADER_SIZE = 16
+    CHUNK_ROWS = 8192
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 向量文件路径（ID列表保存在 path + ".ids"）
+        """
+        self.path = path
+        self.ids_path = path + ".ids"
+        self.mark_path = path + ".mark"
+        self.row_bytes = DIM
+        self.ids = []
+        self.positions = {}
+        self.stored_mark = 0
+        self.load()
+
+    def load(self):
+        """读取ID列表；两个文件长度不一致（上次写到一半）时以较短的为准"""
+        ids = []
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, 'r', encoding='utf-8') as f:
+                ids = [line.rstrip('\n') for line in f if line.endswith('\n')]
+        rows = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                header = f.read(self.HEADER_SIZE)
+            if header[:8] == self.MAGIC and int.from_bytes(header[8:12], 'little') == DIM:
+                rows = (os.path.getsize(self.path) - self.HEADER_SIZE) // self.row_bytes
+            else:
+                ids = []  # 文件损坏或维度变化，重建
+        self.ids = ids[:rows]
+        self.positions = {paper_id: i for i, paper_id in enumerate(self.ids)}
+
+        # 水位线写入时的行数与现在不一致（之后的追加中断或索引重建）就从头核对
+        self.stored_mark = 0
+        try:
+            with open(self.mark_path, 'r', encoding='utf-8') as f:
+                mark, mark_rows = (int(field) for field in f.read().split())
+        except (OSError, ValueError):
+            return
+        if mark_rows == len(self.ids):
+            self.stored_mark = mark
+
+    def set_mark(self, stored_ts):
+        """
+        记录写入时间不晚于 stored_ts 的论文都已在索引中
+
+        Args:
+            stored_ts: 论文库中已处理到的写入时间（UNIX秒）
+        """
+        tmp_path = self.mark_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"{stored_ts} {len(self.ids)}\n")
+        os.replace(tmp_path, self.mark_path)
+        self.stored_mark = stored_ts
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, paper_id):
+        return paper_id in self.positions
+
+    def add(self, items):
+        """
+        追加一批论文的向量（已在索引中的跳过）
+
+        Args:
+            items: [(论文ID, 文本)]
+
+        Returns:
+            新增的论文数
+        """
+        items = [(paper_id, text) for paper_id, text in items if paper_id not in self.positions]
+        if not items:
+            return 0
+        vectors = quantize(vectorize([text for _, text in items]))
+
+        if len(self.ids) == 0 or not os.path.exists(self.path):
+            with open(self.path, 'wb') as f:
+                f.write(self.MAGIC + DIM.to_bytes(4, 'little') + bytes(4))
+            with open(self.ids_path, 'w', encoding='utf-8'):
+                pass
+        with open(self.path, 'r+b') as f:
+            # 截掉上次中断时多写的行，保证与ID列表对齐
+            f.truncate(self.HEADER_SIZE + len(self.ids) * self.row_bytes)
+            f.seek(0, os.SEEK_END)
+            f.write(vectors.tobytes())
+        with open(self.ids_path, 'r+', encoding='utf-8') as f:
+            f.truncate(sum(len(paper_id.encode('utf-8')) + 1 for paper_id in self.ids))
+            f.seek(0, os.SEEK_END)
+            f.write("".join(f"{paper_id}\n" for paper_id, _ in items))
+
+        for paper_id, _ in items:
+            self.positions[paper_id] = len(self.ids)
+            self.ids.append(paper_id)
+        return len(items)
+
+    def vector(self, paper_id):
+        """索引中某篇论文的归一化向量（float32），不在索引中时返回None"""
+        import numpy as np
+
+        position = self.positions.get(paper_id)
+        if position is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(self.HEADER_SIZE + position * self.row_bytes)
+            vector = np.frombuffer(f.read(self.row_bytes), dtype=np.int8).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def nearest(self, vector, top_n=10, exclude=()):
+        """
+        余弦相似度最高的论文
+
+        Args:
+            vector: 查询向量（已归一化）
+            top_n: 返回的篇数
+            exclude: 不参与排序的论文ID
+
+        Returns:
+            [(论文ID, 相似度)]，相似度从高到低
+        """
+        import numpy as np
+
+        if not self.ids:
+            return []
+        matrix = np.memmap(self.path, dtype=np.int8, mode='r', offset=self.HEADER_SIZE,
+                           shape=(len(self.ids), DIM))
+        vector = vector.astype(np.float32)
+        excluded = {self.positions[i] for i in exclude if i in self.positions}
+        best_scores = np.empty(0, dtype=np.float32)
+        best_rows = np.empty(0, dtype=np.intp)
+        want = top_n + len(excluded)
+        for start in range(0, len(self.ids), self.CHUNK_ROWS):
+            chunk = matrix[start:start + self.CHUNK_ROWS].astype(np.float32)
+            norms = np.linalg.norm(chunk, axis=1)
+            norms[norms == 0] = 1
+            scores = (chunk @ vector) / norms
+            if len(scores) > want:
+                top = np.argpartition(-scores, want)[:want]
+            else:
+                top = np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > want:
+                keep = np.argpartition(-best_scores, want)[:want]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+        del matrix
+
+        results = []
+        for i in np.argsort(-best_scores, kind="stable"):
+            row = int(best_rows[i])
+            if row in excluded:
+                continue
+            results.append((self.ids[row], float(best_scores[i])))
+            if len(results) >= top_n:
+                break
+        return results